@@ -1,8 +1,13 @@
 from paraview import catalyst
 from paraview.simple import *
-from paraview.catalyst import get_args, get_execute_params
-import time
+from paraview.catalyst import get_args
 import os
+import sys
+
+# catalyst_insitu_utils.py is installed next to this script; realpath finds it
+# when the script is a symlink, e.g. in an insitu_benchmark run directory
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import catalyst_insitu_utils as gs
 
 # print values for parameters passed via adaptor (note these don't change,
 # and hence must be created as command line params)
@@ -201,37 +206,29 @@ options = catalyst.Options()
 options.GlobalTrigger = "TimeStep"
 options.EnableCatalystLive = 1
 options.CatalystLiveTrigger = "TimeStep"
+# connect Live to the client on $CATALYST_CLIENT
+options.CatalystLiveURL = gs.live_url()
 
 # --------------------------------------------------------------
-# Dynamically determine client
-clientport = 22222
-clienthost = "localhost"
-options.CatalystLiveURL = "localhost:22222"
-if "CATALYST_CLIENT" in os.environ:
-    clienthost = os.environ["CATALYST_CLIENT"]
-options.CatalystLiveURL = str(clienthost) + ":" + str(clientport)
+# The adaptive trigger, production mode, Live transport and asynchronous
+# writing are set up from the GS_CATALYST_* variables by the controller. With
+# GS_CATALYST_ASYNC=1 the image is rendered and copied, then encoded and
+# written on a background thread instead of by the extractor.
+controller = gs.InsituController(options, producer, jPG1.Trigger)
+
+
+def save_image(info):
+    controller.writer.save_screenshot(
+        renderView1, "RenderView1_{:06d}.jpg".format(info.timestep)
+    )
 
 
 def catalyst_execute(info):
-    global producer
-
-    producer.UpdatePipeline()
-
-    # get params as example of a parameter changing during the simulation
-    params = get_execute_params()
-
-    print("\n===================================")
-    print("executing (cycle={}, time={})".format(info.cycle, info.time))
-    print("-----")
-    print("pipeline parameters:")
-    print("\n".join(params))
-    print("-----")
-    print("bounds:", producer.GetDataInformation().GetBounds())
-    print("v-range:", producer.PointData["v"].GetRange(-1))
-    print("u-range:", producer.PointData["u"].GetRange(-1))
-    print("===================================\n")
-    # slow things down for live view
-    time.sleep(1)
+    controller.execute(info, save_image)
+
+
+def catalyst_finalize():
+    controller.finalize()
 
 
 # ------------------------------------------------------------------------------
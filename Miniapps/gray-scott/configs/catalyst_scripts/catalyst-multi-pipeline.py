@@ -1,8 +1,14 @@
 from paraview import catalyst
 from paraview.simple import *
-from paraview.catalyst import get_args, get_execute_params
+from paraview.catalyst import get_args
 import time
 import os
+import sys
+
+# catalyst_insitu_utils.py is installed next to this script; realpath finds it
+# when the script is a symlink, e.g. in an insitu_benchmark run directory
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import catalyst_insitu_utils as gs
 
 
 paraview.simple._DisableFirstRenderCameraReset()
@@ -36,6 +42,15 @@ renderView1.CameraParallelScale = 5.629165124598851
 renderView1.BackEnd = "OSPRay raycaster"
 renderView1.OSPRayMaterialLibrary = materialLibrary1
 
+# Render profile: image resolution
+# (GS_CATALYST_RENDER_PROFILE=preview|test|publication)
+renderProfile = gs.env_str("RENDER_PROFILE")
+imageResolution = [2113, 1338]
+if renderProfile:
+    imageResolution = gs.apply_render_profile(
+        renderView1, renderProfile, imageResolution
+    )
+
 SetActiveView(None)
 
 # ----------------------------------------------------------------
@@ -45,7 +60,7 @@ SetActiveView(None)
 # create new layout object 'Layout #1'
 layout1 = CreateLayout(name="Layout #1")
 layout1.AssignView(0, renderView1)
-layout1.SetSize(2113, 1338)
+layout1.SetSize(*imageResolution)
 
 # ----------------------------------------------------------------
 # restore active view
@@ -287,7 +302,7 @@ pNG1.Trigger = "TimeStep"
 
 # init the 'PNG' selected for 'Writer'
 pNG1.Writer.FileName = "RenderView1_{timestep:06d}{camera}.png"
-pNG1.Writer.ImageResolution = [2113, 1338]
+pNG1.Writer.ImageResolution = imageResolution
 pNG1.Writer.Format = "PNG"
 
 # ----------------------------------------------------------------
@@ -303,37 +318,116 @@ options = catalyst.Options()
 options.GlobalTrigger = "TimeStep"
 options.EnableCatalystLive = 1
 options.CatalystLiveTrigger = "TimeStep"
+# connect Live to the client on $CATALYST_CLIENT
+options.CatalystLiveURL = gs.live_url()
+
+# --------------------------------------------------------------
+# The adaptive trigger, production mode, Live transport and asynchronous
+# writing are set up from the GS_CATALYST_* variables by the controller. With
+# GS_CATALYST_ASYNC=1 the image is rendered and copied, then encoded and
+# written on a background thread instead of by the extractor. The cinema,
+# level of detail and render profile options also write the images with the
+# script's writer; with a render profile this records the time of every
+# render in the extract report.
+controller = gs.InsituController(
+    options,
+    producer,
+    pNG1.Trigger,
+    gs.env_flag("CINEMA") or gs.env_flag("LOD") or bool(renderProfile),
+)
+writer = controller.writer
 
 # --------------------------------------------------------------
-# Dynamically determine client
-clientport = 22222
-clienthost = "localhost"
-options.CatalystLiveURL = "localhost:22222"
-if "CATALYST_CLIENT" in os.environ:
-    clienthost = os.environ["CATALYST_CLIENT"]
-options.CatalystLiveURL = str(clienthost) + ":" + str(clientport)
+# Cinema image database: every combination of u isovalue and clip position,
+# seen from cameras around the cube, instead of the single PNG
+# (GS_CATALYST_CINEMA=1)
+cinema = None
+if gs.env_flag("CINEMA"):
+    bounds = producer.GetDataInformation().GetBounds()
+    cinema = gs.CinemaBatch.from_env(renderView1, writer, bounds)
+
+    isovalues = gs.env_floats("CINEMA_ISOVALUES", [0.5])
+    contour1 = Contour(registrationName="Contour1", Input=producer)
+    contour1.ContourBy = ["POINTS", "u"]
+    contour1.Isosurfaces = isovalues[:1]
+    contour1Display = Show(contour1, renderView1, "GeometryRepresentation")
+    ColorBy(contour1Display, ("POINTS", "v"))
+    cinema.add_parameter(
+        "isovalue", isovalues, lambda value: setattr(contour1, "Isosurfaces", [value])
+    )
+
+    def set_clip(fraction):
+        x = bounds[0] + fraction * (bounds[1] - bounds[0])
+        clip1.ClipType.Origin = [x] + list(clip1.ClipType.Origin[1:])
+
+    cinema.add_parameter(
+        "clip", gs.env_floats("CINEMA_CLIPS", [0.25, 0.5, 0.75]), set_clip
+    )
+
+# --------------------------------------------------------------
+# Level of detail: volume render a resampled copy of the grid sized for a
+# target frame time, and keep the clip of an earlier step while u barely
+# changes (GS_CATALYST_LOD=1)
+lod = None
+clipCache = None
+if gs.env_flag("LOD"):
+    resampleToImage1 = ResampleToImage(
+        registrationName="ResampleToImage1", Input=producer
+    )
+    resampleToImage1.UseInputBounds = 1
+    lod = gs.VolumeLOD.from_env(resampleToImage1, gs.global_dimensions(producer))
+
+    Hide(producer, renderView1)
+    resampleToImage1Display = Show(
+        resampleToImage1, renderView1, "UniformGridRepresentation"
+    )
+    resampleToImage1Display.Representation = "Volume"
+    resampleToImage1Display.ColorArrayName = ["POINTS", "u"]
+    resampleToImage1Display.LookupTable = uLUT
+    resampleToImage1Display.ScalarOpacityFunction = uPWF
+    resampleToImage1Display.TransferFunction2D = uTF2D
+
+    # the cinema clip positions change the clip on every view
+    if not cinema:
+        clipCache = gs.CachedOutput(
+            clip1, "Clip1Cache", gs.env_float("LOD_CLIP_THRESHOLD", 0.01)
+        )
+        Hide(clip1, renderView1)
+        clipCacheDisplay = Show(
+            clipCache.proxy, renderView1, "UnstructuredGridRepresentation"
+        )
+        clipCacheDisplay.Representation = "Surface"
+        clipCacheDisplay.ColorArrayName = ["POINTS", "u"]
+        clipCacheDisplay.LookupTable = uLUT
+
+
+def save_images(info):
+    if clipCache:
+        clipCache.update(producer)
+    start = time.perf_counter()
+    if cinema:
+        cinema.render(info)
+    else:
+        writer.save_screenshot(
+            renderView1, "RenderView1_{:06d}.png".format(info.timestep)
+        )
+    if lod:
+        frame_time = time.perf_counter() - start
+        if cinema:
+            frame_time = cinema.view_times[-1]
+        clip_reused = clipCache.reused if clipCache else False
+        lod.update(info.timestep, frame_time, clip_reused)
+        controller.metrics["frame_s"] = lod.frame_times[-1]
 
 
 def catalyst_execute(info):
-    global producer
-
-    producer.UpdatePipeline()
-
-    # get params as example of a parameter changing during the simulation
-    params = get_execute_params()
-
-    print("\n===================================")
-    print("executing (cycle={}, time={})".format(info.cycle, info.time))
-    print("-----")
-    print("pipeline parameters:")
-    print("\n".join(params))
-    print("-----")
-    print("bounds:", producer.GetDataInformation().GetBounds())
-    print("v-range:", producer.PointData["v"].GetRange(-1))
-    print("u-range:", producer.PointData["u"].GetRange(-1))
-    print("===================================\n")
-    # slow things down for live view
-    time.sleep(1)
+    controller.execute(info, save_images)
+
+
+def catalyst_finalize():
+    if cinema:
+        cinema.summary()
+    controller.finalize()
 
 
 # ------------------------------------------------------------------------------
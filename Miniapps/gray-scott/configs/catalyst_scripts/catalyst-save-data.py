@@ -1,8 +1,13 @@
 from paraview import catalyst
 from paraview.simple import *
-from paraview.catalyst import get_args, get_execute_params
-import time
+from paraview.catalyst import get_args
 import os
+import sys
+
+# catalyst_insitu_utils.py is installed next to this script; realpath finds it
+# when the script is a symlink, e.g. in an insitu_benchmark run directory
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import catalyst_insitu_utils as gs
 
 frequency = 1
 
@@ -75,9 +80,6 @@ for i in range(numPointArrays):
 print("=======================================================")
 producer.PointArrayStatus = ["v", "u"]
 
-
-extractor = create_extractor(producer)
-
 # ------------------------------------------------------------------------------
 # Catalyst options
 options = catalyst.Options()
@@ -85,37 +87,63 @@ options.ExtractsOutputDirectory = outputDirectory
 options.GlobalTrigger.Frequency = frequency
 options.EnableCatalystLive = 1
 options.CatalystLiveTrigger = "TimeStep"
+# connect Live to the client on $CATALYST_CLIENT
+options.CatalystLiveURL = gs.live_url()
 
 # --------------------------------------------------------------
-# Dynamically determine client
-clientport = 22222
-clienthost = "localhost"
-options.CatalystLiveURL = "localhost:22222"
-if "CATALYST_CLIENT" in os.environ:
-    clienthost = os.environ["CATALYST_CLIENT"]
-options.CatalystLiveURL = str(clienthost) + ":" + str(clientport)
+# Reduced extracts: downsampling and a region of interest with ExtractSubset
+# (GS_CATALYST_STRIDE, GS_CATALYST_ROI="i0,i1,j0,j1,k0,k1"), float32 fields
+# (GS_CATALYST_FLOAT32) and compression (GS_CATALYST_COMPRESSOR,
+# GS_CATALYST_COMPRESSION_LEVEL). They are applied to the extractor's input
+# and writer, so the extracts stay comparable with the full ones.
+stride = gs.env_int("STRIDE", 1)
+roi = gs.env_str("ROI")
+output = producer
+if stride > 1 or roi:
+    output = ExtractSubset(registrationName="ExtractSubset1", Input=output)
+    # the VOI is clamped to the whole extent
+    output.VOI = [int(i) for i in roi.split(",")] if roi else [0, 2**31 - 1] * 3
+    output.SampleRateI = stride
+    output.SampleRateJ = stride
+    output.SampleRateK = stride
+if gs.env_flag("FLOAT32"):
+    for name in ["u", "v"]:
+        # the result replaces the float64 array of the same name
+        output = Calculator(registrationName="Float32_" + name, Input=output)
+        output.Function = name
+        output.ResultArrayName = name
+        output.ResultArrayType = "Float"
+output.UpdatePipeline()
+
+extractor = create_extractor(output)
+compressor = gs.env_str("COMPRESSOR")
+if compressor:
+    extractor.Writer.CompressorType = compressor
+compressionLevel = gs.env_int("COMPRESSION_LEVEL", 0)
+if compressionLevel:
+    extractor.Writer.CompressionLevel = compressionLevel
 
+# --------------------------------------------------------------
+# The adaptive trigger, production mode, Live transport and asynchronous
+# writing are set up from the GS_CATALYST_* variables by the controller. With
+# GS_CATALYST_ASYNC=1, the local data is copied and written by the script
+# instead of by the extractor.
+controller = gs.InsituController(options, producer, extractor.Trigger)
 
-def catalyst_execute(info):
-    global producer
 
-    producer.UpdatePipeline()
+def save_data(info):
+    if info.timestep % frequency == 0:
+        controller.writer.save_dataset(
+            output, "{}_{:06d}".format(channel_name, info.timestep)
+        )
+
+
+def catalyst_execute(info):
+    controller.execute(info, save_data)
 
-    # get params as example of a parameter changing during the simulation
-    params = get_execute_params()
 
-    print("\n===================================")
-    print("executing (cycle={}, time={})".format(info.cycle, info.time))
-    print("-----")
-    print("pipeline parameters:")
-    print("\n".join(params))
-    print("-----")
-    print("bounds:", producer.GetDataInformation().GetBounds())
-    print("v-range:", producer.PointData["v"].GetRange(-1))
-    print("u-range:", producer.PointData["u"].GetRange(-1))
-    print("===================================\n")
-    # slow things down for live view
-    time.sleep(1)
+def catalyst_finalize():
+    controller.finalize()
 
 
 # ------------------------------------------------------------------------------
@@ -124,4 +152,4 @@ if __name__ == "__main__":
 
     # Code for non in-situ environments; if executing in post-processing
     # i.e. non-Catalyst mode, let's generate extracts using Catalyst options
-    SaveExtractsUsingCatalystOptions(options)
\ No newline at end of file
+    SaveExtractsUsingCatalystOptions(options)
@@ -0,0 +1,1439 @@
+"""
+Shared helpers for the gray-scott Catalyst scripts.
+
+The Catalyst adaptor only passes '--channel-name' to the scripts, so all of
+the options below are read from 'GS_CATALYST_*' environment variables. This
+module must be installed next to the scripts, which import it with:
+
+    sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+    import catalyst_insitu_utils as gs
+"""
+
+import os
+import json
+import time
+import zlib
+import queue
+import socket
+import struct
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from paraview.vtk.numpy_interface import dataset_adapter as dsa
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkDoubleArray, vtkLogger
+from vtkmodules.vtkParallelCore import vtkCommunicator, vtkMultiProcessController
+
+ENV_PREFIX = "GS_CATALYST_"
+
+# -----------------------------
+# Environment options
+# -----------------------------
+
+
+def env_str(name, default=""):
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def env_flag(name, default=False):
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    return int(os.environ.get(ENV_PREFIX + name, default))
+
+
+def env_float(name, default):
+    return float(os.environ.get(ENV_PREFIX + name, default))
+
+
+def env_floats(name, default=()):
+    """
+    Reads a comma separated list of numbers.
+    """
+    value = os.environ.get(ENV_PREFIX + name)
+    if not value:
+        return list(default)
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+# -----------------------------
+# MPI helpers
+# -----------------------------
+
+
+def get_controller():
+    """
+    Returns the global controller ParaView set up for the simulation ranks.
+    """
+    return vtkMultiProcessController.GetGlobalController()
+
+
+def get_rank():
+    controller = get_controller()
+    return controller.GetLocalProcessId() if controller else 0
+
+
+def allreduce(values, op=vtkCommunicator.SUM_OP):
+    """
+    Reduces a 1D numpy array across all ranks with a single collective and
+    returns the result on every rank.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    controller = get_controller()
+    if controller is None or controller.GetNumberOfProcesses() == 1:
+        return values.copy()
+
+    send = numpy_to_vtk(values, deep=1)
+    recv = vtkDoubleArray()
+    controller.AllReduce(send, recv, op)
+    return vtk_to_numpy(recv).copy()
+
+
+# -----------------------------
+# Local data access
+# -----------------------------
+
+
+def local_point_array(producer, name):
+    """
+    Returns the values of a point array on this rank as one numpy array,
+    without any communication. Works for plain and composite datasets.
+    """
+    data = producer.GetClientSideObject().GetOutputDataObject(0)
+    array = dsa.WrapDataObject(data).PointData[name]
+    if array is dsa.NoneArray:
+        return np.empty(0)
+    if isinstance(array, dsa.VTKCompositeDataArray):
+        pieces = [np.ravel(a) for a in array.Arrays if a is not dsa.NoneArray]
+        return np.concatenate(pieces) if pieces else np.empty(0)
+    return np.ravel(array)
+
+
+class FieldHistograms:
+    """
+    Global histograms of point fields over a fixed value range. The local
+    histograms of all fields, plus any extra values to average over the ranks,
+    are reduced in one collective.
+    """
+
+    def __init__(self, fields, bins=64, value_range=(0.0, 1.0)):
+        self.fields = list(fields)
+        self.bins = bins
+        self.edges = np.linspace(value_range[0], value_range[1], bins + 1)
+
+    def compute(self, producer, extra=()):
+        local = [
+            np.histogram(
+                np.clip(local_point_array(producer, f), self.edges[0], self.edges[-1]),
+                self.edges,
+            )[0]
+            for f in self.fields
+        ]
+        extra = np.asarray(extra, dtype=np.float64)
+        reduced = allreduce(np.concatenate(local + [extra, [1.0]]))
+        nranks = reduced[-1]
+        counts = reduced[: self.bins * len(self.fields)].reshape(len(self.fields), -1)
+        histograms = {f: counts[i] for i, f in enumerate(self.fields)}
+        return histograms, reduced[len(counts.ravel()) : -1] / nranks
+
+    def occupied_range(self, counts):
+        """
+        Approximates the global value range from the occupied bins.
+        """
+        occupied = np.nonzero(counts)[0]
+        if len(occupied) == 0:
+            return (0.0, 0.0)
+        return (self.edges[occupied[0]], self.edges[occupied[-1] + 1])
+
+
+def histogram_distance(a, b):
+    """
+    Total variation distance between two histograms, 0 (same) to 1 (disjoint).
+    """
+    a = a / max(a.sum(), 1.0)
+    b = b / max(b.sum(), 1.0)
+    return 0.5 * np.abs(a - b).sum()
+
+
+# -----------------------------
+# Triggers
+# -----------------------------
+
+
+def set_trigger_active(trigger, step, active):
+    """
+    Enables or disables a 'TimeStep' trigger for the given step. The trigger
+    fires every step from StartTimeStep on, so moving the start past the
+    current step skips it.
+    """
+    trigger.Frequency = 1
+    trigger.UseStartTimeStep = 1
+    trigger.StartTimeStep = step if active else step + 1
+
+
+class StepIntervalEstimator:
+    """
+    Estimates the simulation time per step and the cost of extracts from the
+    wall time between calls to catalyst_execute. Time spent inside
+    catalyst_execute, such as the sleep of the demo mode, is not part of the
+    interval. Extracts of the extractors are generated after catalyst_execute
+    returns, so the interval after a step with extracts includes their cost.
+    Extracts written inside catalyst_execute are timed there and passed to
+    end() instead.
+    """
+
+    def __init__(self, smoothing=0.3):
+        self.smoothing = smoothing
+        self.sim_interval = None
+        self.extract_cost = 0.0
+        self._last_end = None
+        self._last_extracted = False
+
+    def begin(self):
+        """
+        Called at the start of catalyst_execute. Returns the measured interval.
+        """
+        now = time.perf_counter()
+        if self._last_end is None:
+            return None
+        interval = now - self._last_end
+        if self._last_extracted and self.sim_interval is not None:
+            cost = max(interval - self.sim_interval, 0.0)
+            self.extract_cost += self.smoothing * (cost - self.extract_cost)
+        elif not self._last_extracted:
+            if self.sim_interval is None:
+                self.sim_interval = interval
+            else:
+                self.sim_interval += self.smoothing * (interval - self.sim_interval)
+        return interval
+
+    def end(self, extracted, cost=None):
+        """
+        Called at the end of catalyst_execute. cost is the time of the
+        extracts written inside catalyst_execute, if they were.
+        """
+        self._last_end = time.perf_counter()
+        if cost is not None:
+            if extracted:
+                self.extract_cost += self.smoothing * (cost - self.extract_cost)
+            # the next interval is simulation time only
+            extracted = False
+        self._last_extracted = extracted
+
+
+class AdaptiveTrigger:
+    """
+    Decides per step whether the extracts should be generated. An extract is
+    made when the u/v histograms changed enough since the last extract and
+    the extract cost fits the time budget (a fraction of the simulation time),
+    or when max_interval steps passed without one. The first step always
+    extracts.
+
+    The decision only uses reduced values, so all ranks agree on it.
+    """
+
+    def __init__(self, threshold=0.05, budget=0.1, max_interval=50, bins=64):
+        self.threshold = threshold
+        self.budget = budget
+        self.max_interval = max_interval
+        self.histograms = FieldHistograms(["u", "v"], bins)
+        self.estimator = StepIntervalEstimator()
+        self.reference = None
+        self.steps_since = 0
+        self.last_change = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            threshold=env_float("CHANGE_THRESHOLD", 0.05),
+            budget=env_float("TIME_BUDGET", 0.1),
+            max_interval=env_int("MAX_INTERVAL", 50),
+            bins=env_int("HISTOGRAM_BINS", 64),
+        )
+
+    def change_since_reference(self, histograms):
+        """
+        Largest change of any field since the last extract, taking the max of
+        the histogram distance and the relative change of the value range.
+        """
+        change = 0.0
+        for field, counts in histograms.items():
+            reference = self.reference[field]
+            lo, hi = self.histograms.occupied_range(counts)
+            ref_lo, ref_hi = self.histograms.occupied_range(reference)
+            width = max(ref_hi - ref_lo, self.histograms.edges[1])
+            range_change = max(abs(lo - ref_lo), abs(hi - ref_hi)) / width
+            change = max(change, histogram_distance(counts, reference), range_change)
+        return change
+
+    def update(self, producer):
+        """
+        Evaluates the current step and returns True if it should be extracted.
+        """
+        self.estimator.begin()
+        timing = [
+            self.estimator.sim_interval or 0.0,
+            self.estimator.extract_cost,
+        ]
+        histograms, (sim_interval, extract_cost) = self.histograms.compute(
+            producer, timing
+        )
+        self.steps_since += 1
+
+        if self.reference is None:
+            extract = True
+            self.last_change = 1.0
+        else:
+            self.last_change = self.change_since_reference(histograms)
+            allowed = extract_cost <= self.budget * sim_interval * self.steps_since
+            extract = self.steps_since >= self.max_interval or (
+                self.last_change >= self.threshold and allowed
+            )
+
+        if extract:
+            self.reference = histograms
+            self.steps_since = 0
+        return extract
+
+    def finish(self, extracted, cost=None):
+        self.estimator.end(extracted, cost)
+
+
+# -----------------------------
+# Production mode
+# -----------------------------
+
+
+class ProductionMonitor:
+    """
+    Replaces the per-step prints and sleep of the demo mode. Each rank records
+    its local u/v ranges and step interval without communicating, and every
+    'every' steps the buffered values are reduced in one MAX collective. Rank
+    0 appends one JSON line per step to the metrics file.
+
+    Catalyst Live is throttled without blocking the simulation: the Live
+    trigger frequency is set so that Live updates are at least live_interval
+    seconds apart, based on the reduced step interval.
+    """
+
+    FIELDS = ("u", "v")
+
+    def __init__(
+        self,
+        live_trigger=None,
+        every=10,
+        live_interval=1.0,
+        metrics_file="catalyst_metrics.jsonl",
+    ):
+        self.live_trigger = live_trigger
+        self.every = max(every, 1)
+        self.live_interval = live_interval
+        self.metrics_file = metrics_file
+        self.rank = get_rank()
+        self.live_frequency = 1
+        self._pending = []
+        self._last = None
+        self._bounds = None
+
+    @classmethod
+    def from_env(cls, options):
+        live_trigger = (
+            options.CatalystLiveTrigger if options.EnableCatalystLive else None
+        )
+        return cls(
+            live_trigger=live_trigger,
+            every=env_int("METRICS_EVERY", 10),
+            live_interval=env_float("LIVE_INTERVAL", 1.0),
+            metrics_file=env_str("METRICS_FILE", "catalyst_metrics.jsonl"),
+        )
+
+    def record(self, info, producer, extra=None):
+        """
+        Records the local metrics of a step. extra is a dict of additional
+        numbers (same keys on every rank) that are reduced with MAX as well.
+        """
+        now = time.perf_counter()
+        interval = now - self._last if self._last is not None else 0.0
+        self._last = now
+        if self._bounds is None:
+            # the bounds do not change, query them once
+            self._bounds = list(producer.GetDataInformation().GetBounds())
+
+        values = [interval]
+        for field in self.FIELDS:
+            local = local_point_array(producer, field)
+            if local.size:
+                values += [-float(local.min()), float(local.max())]
+            else:
+                values += [-np.inf, -np.inf]
+        extra = extra or {}
+        values += [float(v) for v in extra.values()]
+        self._pending.append((info.timestep, info.time, list(extra), values))
+
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def flush(self):
+        """
+        Reduces the buffered steps in one collective and writes them out.
+        """
+        if not self._pending:
+            return
+        sizes = [len(values) for *_, values in self._pending]
+        reduced = allreduce(
+            np.concatenate([values for *_, values in self._pending]),
+            vtkCommunicator.MAX_OP,
+        )
+        reduced = np.where(np.isfinite(reduced), reduced, np.nan)
+        offsets = np.cumsum([0] + sizes)
+
+        intervals = reduced[offsets[:-1]]
+        intervals = intervals[intervals > 0]
+        if len(intervals):
+            self.live_frequency = max(
+                1, int(np.ceil(self.live_interval / intervals.mean()))
+            )
+        if self.live_trigger is not None:
+            self.live_trigger.Frequency = self.live_frequency
+
+        if self.rank == 0:
+            with open(self.metrics_file, "a") as f:
+                for (step, sim_time, keys, _), start in zip(
+                    self._pending, offsets[:-1]
+                ):
+                    v = reduced[start:]
+                    row = {
+                        "step": int(step),
+                        "time": float(sim_time),
+                        "interval_s": _json_float(v[0]),
+                        "u_range": [_json_float(-v[1]), _json_float(v[2])],
+                        "v_range": [_json_float(-v[3]), _json_float(v[4])],
+                        "bounds": self._bounds,
+                        "live_frequency": self.live_frequency,
+                    }
+                    row.update({k: _json_float(v[5 + i]) for i, k in enumerate(keys)})
+                    f.write(json.dumps(row) + "\n")
+        self._pending = []
+
+    def finalize(self):
+        self.flush()
+
+
+def _json_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+
+
+@contextmanager
+def log_scope(name):
+    """
+    Times a block with a vtkLogger scope, like the 'Writing: Catalyst' scope of
+    the adaptor, so it shows up in the same logs and in timing_ingest.
+    """
+    vtkLogger.StartScope(vtkLogger.VERBOSITY_TRACE, name, __file__, 0)
+    try:
+        yield
+    finally:
+        vtkLogger.EndScope(name)
+
+
+# -----------------------------
+# Render profiles
+# -----------------------------
+
+# Output resolution of the render profiles as a fraction of the resolution
+# of the script, as in the ParaView vignettes.
+RENDER_PROFILES = {
+    "preview": {"scale": 0.25},
+    "test": {"scale": 0.5},
+    "publication": {"scale": 1.0},
+}
+
+
+def apply_render_profile(view, name, resolution):
+    """
+    Sizes the view for a render profile and returns the scaled resolution.
+    """
+    if name not in RENDER_PROFILES:
+        raise ValueError(
+            "Unknown render profile '{}', use one of {}".format(
+                name, sorted(RENDER_PROFILES)
+            )
+        )
+    scale = RENDER_PROFILES[name]["scale"]
+    resolution = [max(int(round(r * scale)), 1) for r in resolution]
+    view.ViewSize = resolution
+    return resolution
+
+
+# -----------------------------
+# Asynchronous extract writing
+# -----------------------------
+
+# XML file extension of each dataset type the writer can save
+XML_EXTENSIONS = [
+    ("vtkImageData", "vti"),
+    ("vtkRectilinearGrid", "vtr"),
+    ("vtkStructuredGrid", "vts"),
+    ("vtkPolyData", "vtp"),
+    ("vtkUnstructuredGrid", "vtu"),
+]
+
+
+def encode_png(pixels, level=6):
+    """
+    Encodes an 8-bit (height, width, components) image as PNG. Only zlib is
+    used, which releases the GIL while compressing.
+    """
+    height, width, components = pixels.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[components]
+    rows = np.empty((height, width * components + 1), dtype=np.uint8)
+    rows[:, 0] = 0  # no filter
+    rows[:, 1:] = pixels.reshape(height, -1)
+
+    def chunk(tag, data):
+        crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", header),
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), level)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+def write_image(pixels, filename, png_level=6, jpeg_quality=95):
+    """
+    Writes an 8-bit image to a PNG or JPEG file, chosen by the extension.
+    """
+    if not filename.lower().endswith((".jpg", ".jpeg")):
+        with open(filename, "wb") as f:
+            f.write(encode_png(pixels, png_level))
+        return
+
+    try:
+        from PIL import Image
+
+        Image.fromarray(np.squeeze(pixels)).save(filename, quality=jpeg_quality)
+    except ImportError:
+        from vtkmodules.vtkCommonDataModel import vtkImageData
+        from vtkmodules.vtkIOImage import vtkJPEGWriter
+
+        height, width, components = pixels.shape
+        image = vtkImageData()
+        image.SetDimensions(width, height, 1)
+        scalars = numpy_to_vtk(pixels[::-1].reshape(-1, components), deep=1)
+        image.GetPointData().SetScalars(scalars)
+        writer = vtkJPEGWriter()
+        writer.SetInputData(image)
+        writer.SetQuality(jpeg_quality)
+        writer.SetFileName(filename)
+        writer.Write()
+
+
+def local_datasets(producer):
+    """
+    Returns the datasets of the producer's output on this rank.
+    """
+    data = producer.GetClientSideObject().GetOutputDataObject(0)
+    if not data.IsA("vtkCompositeDataSet"):
+        return [data]
+    iterator = data.NewIterator()
+    iterator.SkipEmptyNodesOn()
+    iterator.InitTraversal()
+    datasets = []
+    while not iterator.IsDoneWithTraversal():
+        datasets.append(iterator.GetCurrentDataObject())
+        iterator.GoToNextItem()
+    return datasets
+
+
+def xml_type_index(dataset):
+    for i, (class_name, _) in enumerate(XML_EXTENSIONS):
+        if dataset.IsA(class_name):
+            return i
+    raise RuntimeError("Unsupported dataset type: " + dataset.GetClassName())
+
+
+# Compressors of the VTK XML writers. VTK has no ZSTD compressor.
+COMPRESSORS = ["None", "ZLib", "LZ4", "LZMA"]
+
+
+def write_dataset(dataset, filename, compressor=None, level=None):
+    """
+    Writes a dataset with the VTK XML writer of its type. compressor is one of
+    COMPRESSORS, None writes uncompressed like the ParaView writers. level is
+    1 (fast) to 9 (small); None keeps the VTK default.
+    """
+    from vtkmodules.vtkIOXML import vtkXMLDataObjectWriter
+
+    writer = vtkXMLDataObjectWriter()
+    getattr(writer, "SetCompressorTypeTo" + (compressor or "None"))()
+    if level is not None:
+        writer.SetCompressionLevel(level)
+    writer.SetInputData(dataset)
+    writer.SetFileName(filename)
+    writer.Write()
+
+
+def copy_dataset(dataset, float32=False):
+    """
+    Deep copies a dataset, optionally converting its float64 point and cell
+    arrays to float32.
+    """
+    copy = dataset.NewInstance()
+    copy.DeepCopy(dataset)
+    if float32:
+        for attributes in (copy.GetPointData(), copy.GetCellData()):
+            for i in range(attributes.GetNumberOfArrays()):
+                array = attributes.GetArray(i)
+                if array is None or array.GetDataTypeAsString() != "double":
+                    continue
+                values = vtk_to_numpy(array).astype(np.float32)
+                converted = numpy_to_vtk(values, deep=1)
+                converted.SetName(array.GetName())
+                attributes.AddArray(converted)
+    return copy
+
+
+def write_vtpd(filename, pieces):
+    """
+    Writes a partitioned dataset file that refers to already written pieces.
+    """
+    with open(filename, "w") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write('<VTKFile type="vtkPartitionedDataSet" version="1.0">\n')
+        f.write("  <vtkPartitionedDataSet>\n")
+        for i, piece in enumerate(pieces):
+            f.write('    <DataSet index="{}" file="{}"/>\n'.format(i, piece))
+        f.write("  </vtkPartitionedDataSet>\n")
+        f.write("</VTKFile>\n")
+
+
+class AsyncExtractWriter:
+    """
+    Writes image and dataset extracts on a background thread. The calling
+    step only pays for copying the rendered image or the local datasets; the
+    compression and file I/O happen on the thread. When max_pending extracts
+    are queued, submitting blocks until the thread catches up, which bounds
+    the memory held by the copies. With max_pending=0 the extracts are written
+    synchronously.
+
+    The copy, the wait for a free slot and the write are timed with vtkLogger
+    scopes, so they appear in the Catalyst logs next to 'Writing: Catalyst'.
+    The bytes and times of every extract, including the render time of
+    images, are also reduced on close and written by rank 0 to report_file.
+    """
+
+    def __init__(
+        self,
+        output_dir=".",
+        max_pending=4,
+        png_level=6,
+        jpeg_quality=95,
+        compressor=None,
+        compression_level=None,
+        float32=False,
+        report_file="extract_report.csv",
+    ):
+        if compressor is not None and compressor not in COMPRESSORS:
+            raise ValueError(
+                "Unknown compressor '{}', use one of {}".format(compressor, COMPRESSORS)
+            )
+        self.output_dir = output_dir
+        self.png_level = png_level
+        self.jpeg_quality = jpeg_quality
+        self.compressor = compressor
+        self.compression_level = compression_level
+        self.float32 = float32
+        self.report_file = report_file
+        self.rank = get_rank()
+        self.errors = []
+        # [name, render_s, copy_s, write_s, bytes] of every extract, in
+        # submission order
+        self.stats = []
+        self._queue = None
+        if max_pending > 0:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def from_env(cls, output_dir=".", asynchronous=True):
+        compression_level = env_int("COMPRESSION_LEVEL", 0)
+        return cls(
+            output_dir=output_dir,
+            max_pending=env_int("ASYNC_QUEUE", 4) if asynchronous else 0,
+            png_level=env_int("PNG_LEVEL", 6),
+            jpeg_quality=env_int("JPEG_QUALITY", 95),
+            compressor=env_str("COMPRESSOR") or None,
+            compression_level=compression_level or None,
+            float32=env_flag("FLOAT32"),
+            report_file=env_str("EXTRACT_REPORT", "extract_report.csv"),
+        )
+
+    def _run(self):
+        vtkLogger.SetThreadName("Rank_{}_io".format(self.rank))
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._write(*item)
+
+    def _write(self, stats, write, args):
+        start = time.perf_counter()
+        try:
+            with log_scope("Async write: " + stats[0]):
+                stats[4] = write(*args)
+        except Exception as e:
+            self.errors.append("{}: {}".format(stats[0], e))
+            print("Error writing {}: {}".format(stats[0], e))
+        stats[3] = time.perf_counter() - start
+
+    def _submit(self, stats, write, *args):
+        self.stats.append(stats)
+        if write is None:
+            return
+        if self._queue is None:
+            self._write(stats, write, args)
+            return
+        with log_scope("Async wait: " + stats[0]):
+            self._queue.put((stats, write, args))
+
+    def _path(self, filename):
+        path = os.path.join(self.output_dir, filename)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return path
+
+    def save_screenshot(self, view, filename):
+        """
+        Renders the view and queues the image for writing. Must be called on
+        all ranks; rank 0 writes the file.
+        """
+        start = time.perf_counter()
+        with log_scope("Render: " + filename):
+            image = view.SMProxy.CaptureImage(1)
+        render_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with log_scope("Async copy: " + filename):
+            if self.rank != 0 or image is None:
+                self._submit(
+                    [filename, render_s, time.perf_counter() - start, 0.0, 0], None
+                )
+                return
+            width, height, _ = image.GetDimensions()
+            scalars = image.GetPointData().GetScalars()
+            pixels = vtk_to_numpy(scalars).reshape(height, width, -1)
+            # VTK images start at the bottom row
+            pixels = np.ascontiguousarray(pixels[::-1])
+        self._submit(
+            [filename, render_s, time.perf_counter() - start, 0.0, 0],
+            self._write_image,
+            pixels,
+            self._path(filename),
+        )
+
+    def _write_image(self, pixels, path):
+        write_image(pixels, path, self.png_level, self.jpeg_quality)
+        return os.path.getsize(path)
+
+    def save_dataset(self, producer, name):
+        """
+        Copies the local datasets of the producer and queues them for writing
+        as the pieces of 'name.vtpd'. Must be called on all ranks. The piece
+        count and type of every rank are reduced in one collective, so that
+        rank 0 can write the .vtpd file without waiting for the others.
+        """
+        start = time.perf_counter()
+        with log_scope("Async copy: " + name):
+            producer.UpdatePipeline()
+            copies = [copy_dataset(d, self.float32) for d in local_datasets(producer)]
+
+            controller = get_controller()
+            nranks = controller.GetNumberOfProcesses() if controller else 1
+            layout = np.zeros((nranks, 2))
+            if copies:
+                layout[self.rank] = [len(copies), xml_type_index(copies[0])]
+            layout = allreduce(layout.ravel()).reshape(nranks, 2).astype(int)
+
+        stem = os.path.basename(name)
+        pieces = [
+            (
+                rank,
+                "{}/{}_{}_{}.{}".format(stem, stem, rank, i, XML_EXTENSIONS[kind][1]),
+            )
+            for rank, (count, kind) in enumerate(layout)
+            for i in range(count)
+        ]
+        self._submit(
+            [name + ".vtpd", 0.0, time.perf_counter() - start, 0.0, 0],
+            self._write_pieces,
+            name,
+            copies,
+            pieces,
+        )
+
+    def _write_pieces(self, name, copies, pieces):
+        directory = os.path.dirname(name)
+        local = [piece for rank, piece in pieces if rank == self.rank]
+        paths = []
+        for dataset, piece in zip(copies, local):
+            paths.append(self._path(os.path.join(directory, piece)))
+            write_dataset(dataset, paths[-1], self.compressor, self.compression_level)
+        if self.rank == 0:
+            paths.append(self._path(name + ".vtpd"))
+            write_vtpd(paths[-1], [piece for _, piece in pieces])
+        return sum(os.path.getsize(path) for path in paths)
+
+    def write_report(self):
+        """
+        Reduces the bytes (summed) and times (slowest rank) of every extract
+        and writes them to report_file on rank 0. Must be called on all ranks.
+        """
+        if not self.stats:
+            return
+        stats = np.array([s[1:] for s in self.stats], dtype=np.float64)
+        times = allreduce(stats[:, :3].ravel(), vtkCommunicator.MAX_OP)
+        sizes = allreduce(stats[:, 3])
+        if self.rank != 0:
+            return
+
+        times = times.reshape(-1, 3)
+        with open(self.report_file, "w") as f:
+            f.write("extract,render_s,copy_s,write_s,bytes\n")
+            for (name, *_), seconds, size in zip(self.stats, times, sizes):
+                f.write(
+                    "{},{:.6f},{:.6f},{:.6f},{}\n".format(name, *seconds, int(size))
+                )
+        print(
+            "{} extracts: {:.2f} MB, {:.3f} s render, {:.3f} s copy and {:.3f} s "
+            "write per extract (compressor={}, level={}, float32={})".format(
+                len(sizes),
+                sizes.mean() / 1024**2,
+                times[:, 0].mean(),
+                times[:, 1].mean(),
+                times[:, 2].mean(),
+                self.compressor or "None",
+                self.compression_level or "default",
+                self.float32,
+            )
+        )
+
+    def close(self):
+        """
+        Writes the queued extracts, stops the thread and writes the report.
+        """
+        if self._queue is not None:
+            self._queue.put(None)
+            with log_scope("Async drain"):
+                self._thread.join()
+        self.write_report()
+
+
+# -----------------------------
+# Cinema image database
+# -----------------------------
+
+
+class CinemaBatch:
+    """
+    Renders a Cinema (spec D) image database: every combination of the
+    parameters added with add_parameter, seen from cameras around the data.
+    The loops are ordered so that the pipeline is only updated when a
+    parameter changes, and all cameras are rendered from the same geometry.
+
+    The render (and copy) time of every view is stored in data.csv, so the
+    camera set can be sized for a time budget.
+    """
+
+    def __init__(
+        self,
+        view,
+        writer,
+        bounds,
+        directory="cinema.cdb",
+        phi=8,
+        theta=(-30.0, 30.0),
+        budget=None,
+    ):
+        self.view = view
+        self.writer = writer
+        self.directory = directory
+        self.budget = budget
+        self.parameters = []
+        self.rank = get_rank()
+        self.view_times = []
+
+        center = np.array(
+            [
+                (bounds[0] + bounds[1]) / 2,
+                (bounds[2] + bounds[3]) / 2,
+                (bounds[4] + bounds[5]) / 2,
+            ]
+        )
+        distance = np.linalg.norm(
+            np.array(view.CameraPosition) - np.array(view.CameraFocalPoint)
+        )
+        self.cameras = []
+        for elevation in theta:
+            for azimuth in np.linspace(0.0, 360.0, phi, endpoint=False):
+                a, e = np.radians(azimuth), np.radians(elevation)
+                direction = [np.cos(e) * np.cos(a), np.cos(e) * np.sin(a), np.sin(e)]
+                position = center + distance * np.array(direction)
+                self.cameras.append((azimuth, elevation, list(position), list(center)))
+
+    @classmethod
+    def from_env(cls, view, writer, bounds):
+        budget = env_float("CINEMA_BUDGET", 0.0)
+        return cls(
+            view,
+            writer,
+            bounds,
+            directory=env_str("CINEMA_DIR", "cinema.cdb"),
+            phi=env_int("CINEMA_PHI", 8),
+            theta=env_floats("CINEMA_THETA", (-30.0, 30.0)),
+            budget=budget or None,
+        )
+
+    def add_parameter(self, name, values, apply):
+        """
+        Adds a parameter; apply(value) changes the pipeline for that value.
+        """
+        if values:
+            self.parameters.append((name, list(values), apply))
+
+    def _combinations(self):
+        combinations = [[]]
+        for name, values, apply in self.parameters:
+            combinations = [
+                c + [(name, v, apply)] for c in combinations for v in values
+            ]
+        return combinations
+
+    def render(self, info):
+        """
+        Renders all views of the current step. Must be called on all ranks.
+        """
+        camera = (
+            list(self.view.CameraPosition),
+            list(self.view.CameraFocalPoint),
+            list(self.view.CameraViewUp),
+        )
+        rows = []
+        applied = {}
+        start = time.perf_counter()
+        for combination in self._combinations():
+            for name, value, apply in combination:
+                if applied.get(name) != value:
+                    apply(value)
+                    applied[name] = value
+            for azimuth, elevation, position, focal in self.cameras:
+                self.view.CameraPosition = position
+                self.view.CameraFocalPoint = focal
+                self.view.CameraViewUp = [0.0, 0.0, 1.0]
+                filename = "image/{:06d}/{:04d}.png".format(info.timestep, len(rows))
+                view_start = time.perf_counter()
+                self.writer.save_screenshot(
+                    self.view, os.path.join(self.directory, filename)
+                )
+                seconds = time.perf_counter() - view_start
+                values = [v for _, v, _ in combination]
+                rows.append(
+                    [info.time, azimuth, elevation] + values + [filename, seconds]
+                )
+        total = time.perf_counter() - start
+
+        (
+            self.view.CameraPosition,
+            self.view.CameraFocalPoint,
+            self.view.CameraViewUp,
+        ) = camera
+        self.view_times.append(total / max(len(rows), 1))
+        if self.rank == 0:
+            self._write_rows(rows)
+        return total
+
+    def _write_rows(self, rows):
+        path = os.path.join(self.writer.output_dir, self.directory, "data.csv")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        new = not os.path.exists(path)
+        with open(path, "a") as f:
+            if new:
+                names = [name for name, _, _ in self.parameters]
+                header = ["time", "phi", "theta"] + names + ["FILE", "render_s"]
+                f.write(",".join(header) + "\n")
+            for row in rows:
+                f.write(",".join(str(v) for v in row) + "\n")
+
+    def summary(self):
+        """
+        Prints the mean cost per view and, with a budget, how many views fit.
+        """
+        if self.rank != 0 or not self.view_times:
+            return
+        per_view = float(np.mean(self.view_times))
+        views = len(self._combinations()) * len(self.cameras)
+        print(
+            "Cinema: {} views per step, {:.4f} s per view, {:.3f} s per step".format(
+                views, per_view, per_view * views
+            )
+        )
+        if self.budget:
+            print(
+                "Cinema: a budget of {:.3f} s per step fits {} views".format(
+                    self.budget, int(self.budget / per_view)
+                )
+            )
+
+
+# -----------------------------
+# Catalyst Live transport
+# -----------------------------
+
+
+def tcp_established(address):
+    """
+    Returns whether a TCP connection to address (host, port) is established,
+    read from /proc/net/tcp without opening a connection. Returns None where
+    /proc/net is not available.
+    """
+    host, port = address
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except OSError:
+        return False
+    targets = set()
+    for family, _, _, _, sockaddr in infos:
+        packed = socket.inet_pton(family, sockaddr[0])
+        if family == socket.AF_INET:
+            # IPv4 addresses also appear mapped in /proc/net/tcp6
+            variants = [packed, bytes(10) + b"\xff\xff" + packed]
+        else:
+            variants = [packed]
+        for raw in variants:
+            # the kernel prints each 32 bit word in host byte order
+            words = struct.unpack("=%dI" % (len(raw) // 4), raw)
+            targets.add("".join("%08X" % w for w in words) + ":%04X" % port)
+
+    readable = False
+    for name in ["/proc/net/tcp", "/proc/net/tcp6"]:
+        try:
+            with open(name, "r") as f:
+                lines = f.read().splitlines()[1:]
+        except OSError:
+            continue
+        readable = True
+        for line in lines:
+            fields = line.split()
+            # fields[2] is the remote address, state 01 is ESTABLISHED
+            if len(fields) > 3 and fields[3] == "01" and fields[2] in targets:
+                return True
+    return False if readable else None
+
+
+class LiveTransport:
+    """
+    Decides on which steps Catalyst Live runs. Without a client, every Live
+    trigger makes ParaView try to connect; here rank 0 probes the client on a
+    background thread with exponential backoff instead, and Live only runs
+    once the client answered, so ParaView connects once and keeps the link.
+    While the link is established the client is not probed; probing resumes
+    when the link is lost.
+
+    Every gate_every steps the probe result and the measured Live cost are
+    reduced in one collective. When Live costs more than budget times the
+    simulation time, the Live frame rate is halved (frames are dropped), and
+    doubled again when the client keeps up. Probes and decisions are logged
+    with their latency to log_file by rank 0.
+    """
+
+    def __init__(
+        self,
+        trigger,
+        url,
+        gate_every=10,
+        budget=0.1,
+        max_decimation=64,
+        probe_timeout=0.2,
+        max_backoff=60.0,
+        log_file="catalyst_live.csv",
+    ):
+        self.trigger = trigger
+        host, _, port = url.rpartition(":")
+        self.address = (host, int(port))
+        self.gate_every = max(gate_every, 1)
+        self.budget = budget
+        self.max_decimation = max_decimation
+        self.probe_timeout = probe_timeout
+        self.max_backoff = max_backoff
+        self.log_file = log_file
+        self.rank = get_rank()
+        self.estimator = StepIntervalEstimator()
+        self.available = False
+        self.decimation = 1
+        self.steps = 0
+        self._probe = (False, 0.0)
+        self._stop = threading.Event()
+        self._log_lock = threading.Lock()
+        if self.rank == 0:
+            with open(self.log_file, "w") as f:
+                f.write("time,event,available,latency_s,live_cost_s,decimation\n")
+            self._thread = threading.Thread(target=self._run_probe, daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def from_env(cls, options):
+        return cls(
+            options.CatalystLiveTrigger,
+            options.CatalystLiveURL,
+            gate_every=env_int("LIVE_GATE_EVERY", 10),
+            budget=env_float("LIVE_BUDGET", 0.1),
+            max_decimation=env_int("LIVE_MAX_DECIMATION", 64),
+            probe_timeout=env_float("LIVE_PROBE_TIMEOUT", 0.2),
+            max_backoff=env_float("LIVE_MAX_BACKOFF", 60.0),
+            log_file=env_str("LIVE_LOG", "catalyst_live.csv"),
+        )
+
+    def _log(self, event, available, latency, cost=0.0):
+        with self._log_lock, open(self.log_file, "a") as f:
+            f.write(
+                "{:.3f},{},{},{:.6f},{:.6f},{}\n".format(
+                    time.time(), event, int(available), latency, cost, self.decimation
+                )
+            )
+
+    def _run_probe(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            if self._probe[0]:
+                # leave an established Live link alone
+                connected = tcp_established(self.address)
+                if connected or connected is None:
+                    self._stop.wait(self.max_backoff)
+                    continue
+                self._log("lost", False, 0.0)
+                backoff = 1.0
+
+            start = time.perf_counter()
+            try:
+                with socket.create_connection(self.address, self.probe_timeout):
+                    pass
+                available = True
+            except OSError:
+                available = False
+            latency = time.perf_counter() - start
+            self._probe = (available, latency)
+            self._log("probe", available, latency)
+            # once the client is there, give ParaView time to connect
+            if available:
+                backoff = self.max_backoff
+            else:
+                backoff = min(backoff * 2, self.max_backoff)
+            self._stop.wait(backoff)
+
+    def _gate(self):
+        available, latency = self._probe if self.rank == 0 else (False, 0.0)
+        sim_interval = self.estimator.sim_interval or 0.0
+        cost = self.estimator.extract_cost
+        reduced = allreduce(
+            [float(available), latency, sim_interval, cost], vtkCommunicator.MAX_OP
+        )
+        available, latency, sim_interval, cost = reduced
+        self.available = available > 0
+
+        # cost per simulation step of a Live update every decimation steps
+        if self.available and sim_interval > 0:
+            share = cost / (sim_interval * self.decimation)
+            if share > self.budget:
+                self.decimation = min(self.decimation * 2, self.max_decimation)
+            elif share < self.budget / 4:
+                self.decimation = max(self.decimation // 2, 1)
+        if self.rank == 0:
+            self._log("gate", self.available, latency, cost)
+
+    def update(self, step, base_frequency=1):
+        """
+        Called on every step by all ranks. Returns True if Live runs this step.
+        """
+        self.estimator.begin()
+        if self.steps % self.gate_every == 0:
+            self._gate()
+        self.steps += 1
+        active = self.available and step % (base_frequency * self.decimation) == 0
+        set_trigger_active(self.trigger, step, active)
+        return active
+
+    def finish(self, active):
+        self.estimator.end(active)
+
+    def close(self):
+        self._stop.set()
+
+
+# -----------------------------
+# Level of detail
+# -----------------------------
+
+
+def global_dimensions(producer):
+    """
+    Returns the global point dimensions of a structured producer, from the
+    local extents reduced in one collective.
+    """
+    upper = np.zeros(3)
+    for dataset in local_datasets(producer):
+        if dataset.IsA("vtkImageData") or dataset.IsA("vtkRectilinearGrid"):
+            extent = dataset.GetExtent()
+            upper = np.maximum(upper, [extent[1], extent[3], extent[5]])
+    return [int(n) + 1 for n in allreduce(upper, vtkCommunicator.MAX_OP)]
+
+
+class VolumeLOD:
+    """
+    Sizes the resampled copy of the data that is volume rendered so that the
+    frame time follows a target. The frame time of the slowest rank is taken
+    to grow with the number of samples, so the sample count along each axis
+    is scaled by the cube root of target / frame time, with damping.
+
+    The achieved frame time and sample dimensions of every step are written
+    to log_file by rank 0.
+    """
+
+    def __init__(
+        self,
+        resample,
+        full_dimensions,
+        target=0.1,
+        min_samples=16,
+        smoothing=0.5,
+        log_file="catalyst_lod.csv",
+    ):
+        self.resample = resample
+        self.full_dimensions = list(full_dimensions)
+        self.target = target
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self.log_file = log_file
+        self.rank = get_rank()
+        self.scale = 1.0
+        self.frame_times = []
+        self.resample.SamplingDimensions = self.dimensions()
+        if self.rank == 0:
+            with open(self.log_file, "w") as f:
+                f.write("step,frame_s,nx,ny,nz,clip_reused\n")
+
+    @classmethod
+    def from_env(cls, resample, full_dimensions):
+        return cls(
+            resample,
+            full_dimensions,
+            target=env_float("LOD_FRAME_TIME", 0.1),
+            min_samples=env_int("LOD_MIN_SAMPLES", 16),
+            log_file=env_str("LOD_LOG", "catalyst_lod.csv"),
+        )
+
+    def dimensions(self):
+        return [
+            max(min(self.min_samples, n), int(round(n * self.scale)))
+            for n in self.full_dimensions
+        ]
+
+    def update(self, step, frame_time, clip_reused=False):
+        """
+        Records the frame time of a step and resizes the resampling for the
+        next one. Must be called on all ranks.
+        """
+        frame = allreduce([frame_time], vtkCommunicator.MAX_OP)[0]
+        self.frame_times.append(frame)
+        dimensions = self.dimensions()
+        if self.rank == 0:
+            with open(self.log_file, "a") as f:
+                f.write(
+                    "{},{:.6f},{},{},{},{}\n".format(
+                        step, frame, *dimensions, int(clip_reused)
+                    )
+                )
+
+        if frame > 0:
+            wanted = self.scale * (self.target / frame) ** (1.0 / 3.0)
+            self.scale += self.smoothing * (wanted - self.scale)
+            self.scale = min(max(self.scale, 0.0), 1.0)
+        if self.dimensions() != dimensions:
+            self.resample.SamplingDimensions = self.dimensions()
+        return frame
+
+
+class CachedOutput:
+    """
+    Shows the output of a filter through a TrivialProducer holding a copy of
+    it, so the filter only executes when refresh() is called. update()
+    refreshes the copy only when the u histogram changed by more than
+    threshold since the last refresh.
+    """
+
+    def __init__(self, source, registration_name, threshold=0.01, bins=64):
+        from paraview.simple import TrivialProducer
+
+        self.source = source
+        self.proxy = TrivialProducer(registrationName=registration_name)
+        self.threshold = threshold
+        self.histograms = FieldHistograms(["u"], bins)
+        self.reference = None
+        self.reused = False
+
+    def refresh(self):
+        self.source.UpdatePipeline()
+        data = self.source.GetClientSideObject().GetOutputDataObject(0)
+        copy = data.NewInstance()
+        copy.DeepCopy(data)
+        self.proxy.GetClientSideObject().SetOutput(copy)
+        self.proxy.MarkModified(self.proxy)
+
+    def update(self, producer):
+        """
+        Refreshes the copy if needed. Must be called on all ranks; returns
+        True if the previous copy was reused.
+        """
+        histograms, _ = self.histograms.compute(producer)
+        counts = histograms["u"]
+        self.reused = (
+            self.reference is not None
+            and histogram_distance(counts, self.reference) < self.threshold
+        )
+        if not self.reused:
+            self.refresh()
+            self.reference = counts
+        return self.reused
+
+
+# -----------------------------
+# Script controller
+# -----------------------------
+
+
+def live_url(port=22222):
+    """
+    Returns the Catalyst Live URL of the client on $CATALYST_CLIENT, or on
+    localhost.
+    """
+    return "{}:{}".format(os.environ.get("CATALYST_CLIENT", "localhost"), port)
+
+
+class InsituController:
+    """
+    Runs the steps the Catalyst scripts share around their pipelines: the
+    adaptive trigger (GS_CATALYST_ADAPTIVE), production mode (GS_CATALYST_MODE),
+    the Live transport (GS_CATALYST_LIVE_TRANSPORT) and the script's own
+    extract writer, which replaces the extractor whose trigger is given. The
+    writer is created with GS_CATALYST_ASYNC=1 or when use_writer is set.
+
+    execute() is called from catalyst_execute with a function that writes
+    the extracts of the step, which is only called when the writer is used
+    and the step is extracted. Values put in metrics are recorded with every
+    step in production mode.
+    """
+
+    def __init__(self, options, producer, trigger, use_writer=False):
+        self.producer = producer
+        self.trigger = trigger
+        self.metrics = {}
+        self.adaptive = AdaptiveTrigger.from_env() if env_flag("ADAPTIVE") else None
+        self.monitor = None
+        if env_str("MODE", "demo") == "production":
+            self.monitor = ProductionMonitor.from_env(options)
+        self.live = None
+        if env_flag("LIVE_TRANSPORT") and options.EnableCatalystLive:
+            self.live = LiveTransport.from_env(options)
+            if self.monitor:
+                # the transport decides when Live runs
+                self.monitor.live_trigger = None
+        self.writer = None
+        if env_flag("ASYNC") or use_writer:
+            self.writer = AsyncExtractWriter.from_env(
+                options.ExtractsOutputDirectory, asynchronous=env_flag("ASYNC")
+            )
+
+    def execute(self, info, write=None):
+        self.producer.UpdatePipeline()
+
+        extract = True
+        if self.adaptive:
+            extract = self.adaptive.update(self.producer)
+        write_cost = None
+        if self.writer:
+            # the extractor is replaced by the script's writer
+            set_trigger_active(self.trigger, info.timestep, False)
+            write_cost = 0.0
+            if extract and write:
+                start = time.perf_counter()
+                write(info)
+                write_cost = time.perf_counter() - start
+        elif self.adaptive:
+            set_trigger_active(self.trigger, info.timestep, extract)
+
+        live_active = False
+        if self.live:
+            base_frequency = self.monitor.live_frequency if self.monitor else 1
+            live_active = self.live.update(info.timestep, base_frequency)
+
+        if self.monitor:
+            extra = dict(self.metrics)
+            if self.adaptive:
+                extra["adaptive_change"] = self.adaptive.last_change
+                extra["extracted"] = extract
+            self.monitor.record(info, self.producer, extra or None)
+        else:
+            self.print_step(info, extract)
+            # slow things down for live view
+            time.sleep(1)
+
+        if self.adaptive:
+            self.adaptive.finish(extract, write_cost)
+        if self.live:
+            self.live.finish(live_active)
+        return extract
+
+    def print_step(self, info, extract):
+        from paraview.catalyst import get_execute_params
+
+        # get params as example of a parameter changing during the simulation
+        params = get_execute_params()
+
+        print("\n===================================")
+        print("executing (cycle={}, time={})".format(info.cycle, info.time))
+        print("-----")
+        print("pipeline parameters:")
+        print("\n".join(params))
+        print("-----")
+        print("bounds:", self.producer.GetDataInformation().GetBounds())
+        print("v-range:", self.producer.PointData["v"].GetRange(-1))
+        print("u-range:", self.producer.PointData["u"].GetRange(-1))
+        if self.adaptive:
+            print(
+                "adaptive trigger: change={:.4f} extract={}".format(
+                    self.adaptive.last_change, extract
+                )
+            )
+        print("===================================\n")
+
+    def finalize(self):
+        if self.live:
+            self.live.close()
+        if self.monitor:
+            self.monitor.finalize()
+        if self.writer:
+            self.writer.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import time
+import socket
+import argparse
+
+
+def serve(port, hold, up_for, down_for):
+    """
+    Accepts connections on the Catalyst Live port and logs them, standing in
+    for a ParaView client when testing GS_CATALYST_LIVE_TRANSPORT. Each
+    connection is read and discarded for 'hold' seconds, which simulates a
+    slow client. With up_for and down_for the listener periodically goes away,
+    which exercises the probe backoff.
+    """
+    start = time.time()
+    while True:
+        server = socket.create_server(("", port))
+        server.settimeout(1.0)
+        print(f"[{time.time() - start:8.2f}s] listening on port {port}")
+        up_since = time.time()
+        while not up_for or time.time() - up_since < up_for:
+            try:
+                connection, address = server.accept()
+            except socket.timeout:
+                continue
+            print(f"[{time.time() - start:8.2f}s] connection from {address[0]}")
+            received = 0
+            with connection:
+                connection.settimeout(0.1)
+                deadline = time.time() + hold
+                while time.time() < deadline:
+                    try:
+                        data = connection.recv(65536)
+                    except socket.timeout:
+                        continue
+                    if not data:
+                        break
+                    received += len(data)
+            print(f"[{time.time() - start:8.2f}s] closed, {received} bytes received")
+        server.close()
+        print(f"[{time.time() - start:8.2f}s] down for {down_for} s")
+        time.sleep(down_for)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stand-in Catalyst Live listener for testing the Live "
+        "transport of the gray-scott Catalyst scripts."
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=22222, help="Port to listen on."
+    )
+    parser.add_argument(
+        "--hold",
+        type=float,
+        default=0.0,
+        help="Seconds to keep each connection open, to simulate a slow client.",
+    )
+    parser.add_argument(
+        "--up-for",
+        type=float,
+        default=0.0,
+        help="Stop listening after this many seconds (0 listens forever).",
+    )
+    parser.add_argument(
+        "--down-for",
+        type=float,
+        default=10.0,
+        help="Seconds to stay away before listening again.",
+    )
+    args = parser.parse_args()
+
+    try:
+        serve(args.port, args.hold, args.up_for, args.down_for)
+    except KeyboardInterrupt:
+        pass
@@ -10,3 +10,8 @@ rm -rf reader_timers*
 rm -rf writer_timers*
 rm -rf ascent_filter_times*
 rm -rf ascent_data*
+rm -rf .timing_cache
+rm -f catalyst_metrics.jsonl
+rm -f extract_report.csv
+rm -f catalyst_live.csv
+rm -f catalyst_lod.csv
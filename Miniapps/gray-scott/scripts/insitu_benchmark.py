@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import shlex
+import argparse
+import itertools
+import subprocess
+
+import pandas as pd
+
+import timing_ingest
+
+# Parameters that only change the behavior of the ADIOS writer. Combinations
+# that vary them for other output types are duplicates and are skipped.
+ADIOS_ONLY_PARAMETERS = ["adios_span", "adios_memory_selection"]
+
+# Settings keys that name a file the run directory must contain
+FILE_SETTINGS = ["catalyst_script_path", "kombynelite_script_path", "adios_config"]
+
+# Files that must be linked next to the file named by a settings key, e.g.
+# the helper module the Catalyst scripts import
+COMPANION_FILES = {"catalyst_script_path": ["catalyst_insitu_utils.py"]}
+
+# Run directory entries that are not simulation output
+NOT_OUTPUT = {
+    "settings.json",
+    "writer_timers",
+    "reader_timers",
+    "everything.log",
+    "latest_readable.log",
+    "stdout.log",
+    timing_ingest.CACHE_DIR_NAME,
+}
+
+
+def expand_matrix(parameters):
+    """
+    Expands the parameter matrix into a list of configurations, dropping
+    combinations that only differ in parameters the output type ignores.
+    """
+    names = list(parameters)
+    configs = []
+    seen = set()
+    for values in itertools.product(*(parameters[n] for n in names)):
+        config = dict(zip(names, values))
+        if config.get("output_type") != "adios":
+            for name in ADIOS_ONLY_PARAMETERS:
+                if name in config:
+                    config[name] = False
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def config_name(config):
+    """
+    Builds a readable directory name for a configuration.
+    """
+    parts = [str(config.get("output_type", "run"))]
+    for key, value in config.items():
+        if key == "output_type" or value is False:
+            continue
+        parts.append(key if value is True else f"{key}{value}")
+    return "_".join(parts)
+
+
+def write_settings(run_dir, config, matrix, settings_dir):
+    """
+    Writes the settings file of a run from the output type's template and the
+    matrix values, and links the files it references into the run directory.
+    """
+    template = matrix["templates"][config["output_type"]]
+    with open(os.path.join(settings_dir, template), "r") as f:
+        settings = json.load(f)
+    settings.update(config)
+
+    settings_file = os.path.join(run_dir, "settings.json")
+    with open(settings_file, "w") as f:
+        json.dump(settings, f, indent=4)
+
+    links = [settings.get(key) for key in FILE_SETTINGS]
+    for key, companions in COMPANION_FILES.items():
+        if settings.get(key):
+            directory = os.path.dirname(settings[key])
+            links += [os.path.join(directory, name) for name in companions]
+    links += matrix.get("link_files", {}).get(config["output_type"], [])
+    for name in filter(None, links):
+        source = os.path.abspath(os.path.join(settings_dir, name))
+        target = os.path.join(run_dir, os.path.basename(name))
+        if os.path.exists(source) and not os.path.lexists(target):
+            os.symlink(source, target)
+    return settings_file
+
+
+def output_bytes(run_dir):
+    """
+    Sums the size of everything the simulation wrote to the run directory,
+    excluding timers, logs and linked input files.
+    """
+    total = 0
+    for entry in os.scandir(run_dir):
+        if entry.name in NOT_OUTPUT or entry.is_symlink():
+            continue
+        if entry.is_file():
+            total += entry.stat().st_size
+        elif entry.is_dir():
+            for root, _, files in os.walk(entry.path):
+                total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def summarize_run(run_dir, settings):
+    """
+    Collects the PerfLogger and backend timings of one run. The in-situ
+    overhead per step is the write_step time of the slowest rank, averaged
+    over all simulation steps.
+    """
+    df = timing_ingest.load_run(run_dir)
+    writer = df[df["backend"] == "writer"]
+    if writer.empty:
+        return None
+
+    per_step = writer.pivot_table(
+        index="step", columns="op", values="duration", aggfunc="max", observed=True
+    )
+    steps = len(per_step)
+    summary = {
+        "steps": steps,
+        "total_step_s": per_step["total_step"].mean(),
+        "compute_step_s": per_step["compute_step"].mean(),
+        "insitu_overhead_s": per_step["write_step"].sum() / max(steps, 1),
+        "write_step_s": per_step.loc[
+            per_step.index % settings["plotgap"] == 0, "write_step"
+        ].mean(),
+        "bytes_written": output_bytes(run_dir),
+        "peak_rss_MB": writer["rss"].max(),
+    }
+    # nested timers are part of their parent's time
+    backend = timing_ingest.top_level(df[~df["backend"].isin(["writer", "reader"])])
+    if not backend.empty:
+        summary["backend_s"] = backend["duration"].sum() / backend["rank"].nunique()
+    return summary
+
+
+def run_benchmark(matrix, settings_dir, output_dir, dry_run=False):
+    """
+    Runs every configuration of the matrix the requested number of times and
+    returns one row of results per run.
+    """
+    executable = os.path.abspath(os.path.join(settings_dir, matrix["executable"]))
+    launcher = shlex.split(matrix.get("mpirun", "mpirun"))
+    repetitions = matrix.get("repetitions", 1)
+    configs = expand_matrix(matrix["parameters"])
+    print(f"Running {len(configs)} configurations x {repetitions} repetitions")
+
+    results = []
+    for config in configs:
+        name = config_name(config)
+        for rep in range(repetitions):
+            run_dir = os.path.join(output_dir, name, f"rep{rep}")
+            os.makedirs(run_dir, exist_ok=True)
+            settings_file = write_settings(run_dir, config, matrix, settings_dir)
+            command = launcher + [
+                "-np",
+                str(matrix.get("np", 1)),
+                executable,
+                f"--settings-file={os.path.abspath(settings_file)}",
+            ]
+            print(f"[{name} rep {rep}] {' '.join(command)}")
+            if dry_run:
+                continue
+
+            start = time.perf_counter()
+            with open(os.path.join(run_dir, "stdout.log"), "w") as log:
+                status = subprocess.run(
+                    command, cwd=run_dir, stdout=log, stderr=subprocess.STDOUT
+                ).returncode
+            wall = time.perf_counter() - start
+            if status != 0:
+                print(f"  failed with exit code {status}, see {run_dir}/stdout.log")
+                continue
+
+            with open(settings_file, "r") as f:
+                settings = json.load(f)
+            summary = summarize_run(run_dir, settings)
+            if summary is None:
+                print("  no writer_timers found, was the miniapp built with timers?")
+                continue
+            results.append(
+                {"config": name, "repetition": rep, "wall_s": wall, **config, **summary}
+            )
+    return pd.DataFrame(results)
+
+
+def comparison_table(results):
+    """
+    Averages the repetitions of each configuration.
+    """
+    results = results.assign(MB_written=results["bytes_written"] / 1024**2)
+    metrics = [
+        "insitu_overhead_s",
+        "write_step_s",
+        "total_step_s",
+        "MB_written",
+        "peak_rss_MB",
+        "wall_s",
+    ]
+    metrics = [m for m in metrics + ["backend_s"] if m in results.columns]
+    table = results.groupby("config")[metrics].agg(["mean", "std"])
+    return table.sort_values(("insitu_overhead_s", "mean"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a matrix of gray-scott configurations and compare the "
+        "in-situ overhead, bytes written and peak RSS of each."
+    )
+    parser.add_argument(
+        "-m",
+        "--matrix",
+        default="benchmark-matrix.json",
+        help="JSON file describing the parameter matrix.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default="benchmark_runs",
+        help="Directory in which one run directory per configuration is created.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only create the run directories and print the commands.",
+    )
+    args = parser.parse_args()
+
+    with open(args.matrix, "r") as f:
+        matrix = json.load(f)
+    settings_dir = os.path.dirname(os.path.abspath(args.matrix))
+
+    results = run_benchmark(matrix, settings_dir, args.output_dir, args.dry_run)
+    if results.empty:
+        if not args.dry_run:
+            print("Error: No run produced timing data.")
+    else:
+        results.to_csv(
+            os.path.join(args.output_dir, "benchmark_results.csv"), index=False
+        )
+        table = comparison_table(results)
+        table.to_csv(os.path.join(args.output_dir, "benchmark_summary.csv"))
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(table)
+        print(f"Results written to '{args.output_dir}'.")
@@ -1,57 +1,157 @@
-import pandas as pd
-import plotly.express as px
+import os
 import glob
+import json
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from timing_ingest.readers import (
+    PATH_SEPARATOR,
+    get_rank_from_filename,
+    is_kombyne_file,
+    read_kombyne_tree,
+)
 
-def parse_and_process_kombyne_files():
+
+def parse_and_process_kombyne_files(input_dir=".", jobs=None):
     """
-    Parses all 'timings.*.txt' files, aggregates the data by operation name,
-    and prepares it for plotting.
+    Parses all 'timings.*.txt' files in parallel, rebuilds the timer tree of
+    every rank and returns a DataFrame with one row per timer instance.
     """
-    timing_files = glob.glob("timings.*.txt")
+    timing_files = sorted(
+        filter(is_kombyne_file, glob.glob(os.path.join(input_dir, "timings.*.txt"))),
+        key=get_rank_from_filename,
+    )
     if not timing_files:
-        print("Error: No 'timings.*.txt' files found in the current directory.")
+        print(f"Error: No 'timings.*.txt' files found in '{input_dir}'.")
         return None
 
     print(f"Found and processing {len(timing_files)} timing files...")
-    all_data = []
-    for filename in timing_files:
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-            # Skip header lines by looking for the start of the data
-            data_lines = [line for line in lines if line.strip() and not line.strip().startswith('#') and not line.strip().startswith('TimerId')]
-            for line in data_lines:
-                try:
-                    # Format is: TimerId, Level, Start, End, Time, Name
-                    parts = line.strip().split(',')
-                    time_val = float(parts[4])
-                    # Name is the last part; strip whitespace
-                    name = ','.join(parts[5:]).strip()
-                    all_data.append([time_val, name])
-                except (ValueError, IndexError):
-                    continue # Skip malformed lines
-    
-    if not all_data:
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        frames = [f for f in pool.map(read_kombyne_tree, timing_files) if not f.empty]
+
+    if not frames:
         print("Error: No valid timing data was parsed.")
         return None
 
-    # Create a DataFrame and aggregate the total time for each operation
-    df = pd.DataFrame(all_data, columns=['Time', 'Name'])
-    agg_df = df.groupby('Name')['Time'].sum().reset_index()
-
-    # Create the structure for the sunburst plot
-    # This creates a flat hierarchy with a single root node.
-    total_time = agg_df['Time'].sum()
-    plot_data = {
-        "ids": ["Total"] + agg_df['Name'].tolist(),
-        "parents": [""] + ["Total"] * len(agg_df),
-        "values": [total_time] + agg_df['Time'].tolist(), # FIX: Added total_time to match other array lengths
-        "names": ["Total"] + agg_df['Name'].tolist()
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate_timer_tree(timers):
+    """
+    Aggregates the per-rank timer instances by their path in the tree,
+    summing inclusive and exclusive time across all ranks and steps.
+    """
+    agg = (
+        timers.groupby("path", sort=False)
+        .agg(
+            name=("Name", "first"),
+            depth=("depth", "first"),
+            inclusive=("inclusive", "sum"),
+            exclusive=("exclusive", "sum"),
+            calls=("inclusive", "size"),
+            ranks=("rank", "nunique"),
+        )
+        .reset_index()
+    )
+    agg["parent"] = agg["path"].str.rpartition(PATH_SEPARATOR)[0]
+    return agg.sort_values(["depth", "path"]).reset_index(drop=True)
+
+
+def build_sunburst_data(agg):
+    """
+    Prepares the aggregated tree for a plotly sunburst. Every node carries its
+    exclusive time and plotly adds the children on top of it, so the sector
+    size of a node is its inclusive time.
+    """
+    total_inclusive = agg.loc[agg["depth"] == 0, "inclusive"].sum()
+    parents = agg["parent"].where(agg["parent"] != "", "Total")
+    return {
+        "ids": ["Total"] + agg["path"].tolist(),
+        "parents": [""] + parents.tolist(),
+        "values": [0.0] + agg["exclusive"].tolist(),
+        "names": ["Total"] + agg["name"].tolist(),
+        "inclusive": [total_inclusive] + agg["inclusive"].tolist(),
+        "exclusive": [0.0] + agg["exclusive"].tolist(),
+    }
+
+
+def write_speedscope(timers, output_filename):
+    """
+    Writes one evented speedscope profile per rank. The file can be opened at
+    https://www.speedscope.app to browse the timers as a flame graph.
+    """
+    frame_names = sorted(timers["Name"].unique())
+    frame_index = {name: i for i, name in enumerate(frame_names)}
+
+    profiles = []
+    for rank, rank_timers in timers.groupby("rank", sort=True):
+        rank_timers = rank_timers.sort_values(["Start", "depth"], kind="stable")
+        children = rank_timers[rank_timers["parent"] >= 0].groupby("parent")["node"]
+        children = {parent: nodes.tolist() for parent, nodes in children}
+        rows = rank_timers.set_index("node")
+
+        events = []
+
+        def emit(node, lower, upper):
+            # clamp to the enclosing interval so the events always nest, even
+            # when the printed timers are slightly inconsistent
+            start = min(max(rows.at[node, "Start"], lower), upper)
+            end = min(max(rows.at[node, "End"], start), upper)
+            frame = frame_index[rows.at[node, "Name"]]
+            events.append({"type": "O", "frame": frame, "at": start})
+            cursor = start
+            for child in children.get(node, []):
+                cursor = emit(child, cursor, end)
+            events.append({"type": "C", "frame": frame, "at": end})
+            return end
+
+        cursor = -np.inf
+        for root in rows.index[rows["parent"] < 0]:
+            cursor = emit(root, cursor, np.inf)
+
+        profiles.append(
+            {
+                "type": "evented",
+                "name": f"Rank {rank}",
+                "unit": "seconds",
+                "startValue": events[0]["at"] if events else 0.0,
+                "endValue": events[-1]["at"] if events else 0.0,
+                "events": events,
+            }
+        )
+
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": name} for name in frame_names]},
+        "profiles": profiles,
+        "name": "Kombyne timings",
+        "exporter": "kombyne_timings_plotter.py",
     }
-    
-    return plot_data
+    with open(output_filename, "w") as f:
+        json.dump(document, f)
+    print(f"Speedscope profile saved to '{output_filename}'.")
+
+
+def print_top_timers(agg, count=10):
+    """
+    Prints the timers with the largest exclusive time.
+    """
+    print(f"\nTop {count} timers by exclusive time (summed across ranks):")
+    top = agg.nlargest(count, "exclusive")
+    for _, row in top.iterrows():
+        print(
+            f"  {row['exclusive']:12.6f} s excl  {row['inclusive']:12.6f} s incl  "
+            f"{row['path'].replace(PATH_SEPARATOR, ' > ')}"
+        )
 
-def plot_sunburst_to_pdf(data, output_filename="kombyne_sunburst_performance.pdf", show_plot=False):
+
+def plot_sunburst_to_pdf(
+    data, output_filename="kombyne_sunburst_performance.pdf", show_plot=False
+):
     """
     Creates and saves a sunburst plot as a PDF file from the processed data.
     """
@@ -60,20 +160,19 @@ def plot_sunburst_to_pdf(data, output_filename="kombyne_sunburst_performance.pdf
         return
 
     print("Generating sunburst plot PDF...")
-    
+
     fig = px.sunburst(
         data,
-        ids='ids',
-        parents='parents',
-        values='values',
-        names='names',
-        branchvalues='total', # ensures leaves sum up to parent
-        title='Kombyne Performance Breakdown (Time Summed Across All Ranks and Steps)'
+        ids="ids",
+        parents="parents",
+        values="values",
+        names="names",
+        branchvalues="remainder",  # children are added to the parent's own time
+        hover_data=["inclusive", "exclusive"],
+        title="Kombyne Performance Breakdown (Time Summed Across All Ranks and Steps)",
     )
 
-    fig.update_traces(
-        textinfo='label+percent parent'
-    )
+    fig.update_traces(textinfo="label+percent parent")
     fig.update_layout(margin=dict(t=50, l=25, r=25, b=25))
 
     # Note: Exporting to PDF requires the 'kaleido' package.
@@ -82,8 +181,8 @@ def plot_sunburst_to_pdf(data, output_filename="kombyne_sunburst_performance.pdf
         # Using write_image to save as a static PDF file
         fig.write_image(output_filename, width=1200, height=1200)
         print(f"Plot saved successfully to '{output_filename}'.")
-    except ValueError as e:
-        print(f"\n--- ERROR SAVING PDF ---")
+    except (ValueError, RuntimeError) as e:
+        print("\n--- ERROR SAVING PDF ---")
         print(f"{e}")
         print("\nPlease ensure you have the 'kaleido' package installed.")
         print("Install it by running: pip install kaleido\n")
@@ -91,11 +190,51 @@ def plot_sunburst_to_pdf(data, output_filename="kombyne_sunburst_performance.pdf
     if show_plot:
         fig.show()
 
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Parse and visualize Kombyne timer files into a sunburst plot PDF.")
-    parser.add_argument("--show", action="store_true", help="Display the plot interactively in a window after saving.")
+    parser = argparse.ArgumentParser(
+        description="Parse Kombyne timer files, rebuild the timer hierarchy and "
+        "visualize it as a sunburst plot PDF and a speedscope flame graph."
+    )
+    parser.add_argument(
+        "-i",
+        "--input-dir",
+        default=".",
+        help="Directory containing the 'timings.*.txt' files.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        default="kombyne_sunburst_performance.pdf",
+        help="Output sunburst PDF file.",
+    )
+    parser.add_argument(
+        "--speedscope",
+        default="kombyne_timings.speedscope.json",
+        help="Output speedscope JSON file, pass an empty string to skip it.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes used to parse the rank files.",
+    )
+    parser.add_argument(
+        "--show",
+        action="store_true",
+        help="Display the plot interactively in a window after saving.",
+    )
     args = parser.parse_args()
 
-    processed_data = parse_and_process_kombyne_files()
-    plot_sunburst_to_pdf(processed_data, show_plot=args.show)
-
+    timers = parse_and_process_kombyne_files(args.input_dir, args.jobs)
+    if timers is None:
+        plot_sunburst_to_pdf(None)
+    else:
+        tree = aggregate_timer_tree(timers)
+        print_top_timers(tree)
+        if args.speedscope:
+            write_speedscope(timers, args.speedscope)
+        plot_sunburst_to_pdf(
+            build_sunburst_data(tree), args.output_file, show_plot=args.show
+        )
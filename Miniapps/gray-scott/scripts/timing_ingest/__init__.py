@@ -0,0 +1,74 @@
+"""
+Timing ingest for the gray-scott miniapp.
+
+Normalizes the Ascent, Kombyne, Catalyst (vtkLogger) and PerfLogger timing
+outputs of a run directory into one columnar schema
+(backend, rank, step, op, start, end, duration, rss), with parallel readers,
+a memory-mappable cache and a small query API.
+
+Example:
+    import timing_ingest
+    runs = {t: timing_ingest.load_run(f"run-{t}") for t in ["ascent", "catalyst"]}
+    print(timing_ingest.compare_backends(runs, ops=["write_step", "total_step"]))
+"""
+
+import os
+
+from .cache import load_cache, save_cache
+from .query import compare_backends, op_summary, peak_rss, step_summary, top_level
+from .readers import (
+    find_timing_files,
+    read_ascent_file,
+    read_kombyne_timings,
+    read_perflogger_file,
+    read_run,
+    read_vtk_log,
+)
+from .schema import SCHEMA_COLUMNS, SCHEMA_DTYPES, concat, empty_frame, normalize
+
+# Name of the cache directory created inside a run directory
+CACHE_DIR_NAME = ".timing_cache"
+
+
+def load_run(run_dir, jobs=None, cache=True):
+    """
+    Loads all timing outputs of a gray-scott run directory into one schema
+    frame. The result is cached in '<run_dir>/.timing_cache' and reused as
+    long as none of the source files changed.
+    """
+    files = find_timing_files(run_dir)
+    all_files = [f for paths in files.values() for f in paths]
+    cache_dir = os.path.join(run_dir, CACHE_DIR_NAME)
+
+    if cache:
+        df = load_cache(cache_dir, all_files)
+        if df is not None:
+            return df
+
+    df = read_run(files, jobs)
+    if cache and all_files:
+        save_cache(df, cache_dir, all_files)
+    return df
+
+
+__all__ = [
+    "SCHEMA_COLUMNS",
+    "SCHEMA_DTYPES",
+    "compare_backends",
+    "concat",
+    "empty_frame",
+    "find_timing_files",
+    "load_cache",
+    "load_run",
+    "normalize",
+    "op_summary",
+    "peak_rss",
+    "read_ascent_file",
+    "read_kombyne_timings",
+    "read_perflogger_file",
+    "read_run",
+    "read_vtk_log",
+    "save_cache",
+    "step_summary",
+    "top_level",
+]
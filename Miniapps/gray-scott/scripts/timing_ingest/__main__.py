@@ -0,0 +1,33 @@
+import argparse
+import os
+
+import pandas as pd
+
+from . import compare_backends, load_run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python3 -m timing_ingest",
+        description="Load the timing outputs of one or more gray-scott run "
+        "directories and compare them side by side.",
+    )
+    parser.add_argument("run_dirs", nargs="+", help="gray-scott run directories.")
+    parser.add_argument(
+        "--ops", nargs="+", default=None, help="Only report these operations."
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of reader workers."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and do not write the cache."
+    )
+    args = parser.parse_args()
+
+    runs = {
+        os.path.basename(os.path.normpath(d)): load_run(
+            d, args.jobs, cache=not args.no_cache
+        )
+        for d in args.run_dirs
+    }
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(compare_backends(runs, args.ops))
@@ -0,0 +1,76 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from .schema import SCHEMA_COLUMNS, SCHEMA_DTYPES, SCHEMA_VERSION
+
+MANIFEST_NAME = "manifest.json"
+
+
+def source_fingerprint(files):
+    """
+    Describes the source files by path, size and modification time. A cache
+    is only valid while the fingerprint of its sources is unchanged.
+    """
+    fingerprint = []
+    for path in sorted(files):
+        info = os.stat(path)
+        fingerprint.append([os.path.abspath(path), info.st_size, info.st_mtime_ns])
+    return fingerprint
+
+
+def save_cache(df, cache_dir, files, key=""):
+    """
+    Stores a schema frame as one .npy file per column. Categorical columns are
+    stored as integer codes with their categories in the manifest.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    categories = {}
+    for col in SCHEMA_COLUMNS:
+        values = df[col]
+        if SCHEMA_DTYPES[col] == "category":
+            categories[col] = values.cat.categories.tolist()
+            values = values.cat.codes
+        np.save(os.path.join(cache_dir, f"{col}.npy"), values.to_numpy())
+
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "key": key,
+        "rows": len(df),
+        "sources": source_fingerprint(files),
+        "categories": categories,
+    }
+    # the manifest is written last so an interrupted save is never valid
+    with open(os.path.join(cache_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+
+
+def load_cache(cache_dir, files, key="", mmap=True):
+    """
+    Loads a cached schema frame if it is still valid for the given source
+    files, otherwise returns None. The columns are memory-mapped by default.
+    """
+    manifest_file = os.path.join(cache_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    if (
+        manifest.get("schema_version") != SCHEMA_VERSION
+        or manifest.get("key") != key
+        or manifest.get("sources") != source_fingerprint(files)
+    ):
+        return None
+
+    mmap_mode = "r" if mmap else None
+    columns = {}
+    for col in SCHEMA_COLUMNS:
+        values = np.load(os.path.join(cache_dir, f"{col}.npy"), mmap_mode=mmap_mode)
+        if col in manifest["categories"]:
+            values = pd.Categorical.from_codes(
+                values, categories=manifest["categories"][col]
+            )
+        columns[col] = values
+    return pd.DataFrame(columns, columns=SCHEMA_COLUMNS)
@@ -0,0 +1,80 @@
+import pandas as pd
+
+from .readers import PATH_SEPARATOR
+
+
+def step_summary(df, ops=None):
+    """
+    Summarizes each (backend, op, step) across ranks. The max over ranks is
+    the time the step took for the slowest rank.
+    """
+    if ops is not None:
+        df = df[df["op"].isin(ops)]
+    return (
+        df.groupby(["backend", "op", "step"], observed=True)["duration"]
+        .agg(["mean", "min", "max", "count"])
+        .rename(columns={"count": "ranks"})
+    )
+
+
+def op_summary(df, ops=None):
+    """
+    Summarizes each (backend, op) over all steps: total time summed over ranks,
+    and mean/max per-step time of the slowest rank.
+    """
+    steps = step_summary(df, ops)
+    per_op = steps.groupby(["backend", "op"], observed=True).agg(
+        steps=("max", "size"),
+        mean_step=("max", "mean"),
+        max_step=("max", "max"),
+    )
+    per_op["total"] = (
+        df.groupby(["backend", "op"], observed=True)["duration"].sum().loc[per_op.index]
+    )
+    return per_op.sort_values("total", ascending=False)
+
+
+def top_level(df):
+    """
+    Drops the timings nested in another timing of the same rank, so that the
+    durations can be summed: Kombyne timers below the root of their tree and
+    timings inside the [start, end] of an enclosing one, such as nested
+    vtkLogger scopes. Timings without start and end are kept.
+    """
+    keep = ~(
+        (df["backend"] == "kombyne")
+        & df["op"].astype(str).str.contains(PATH_SEPARATOR, regex=False)
+    )
+    timed = df[keep & df["start"].notna()].sort_values(
+        ["backend", "rank", "start", "end"], ascending=[True, True, True, False]
+    )
+    enclosing_end = timed.groupby(["backend", "rank"], observed=True)["end"].transform(
+        lambda end: end.cummax().shift()
+    )
+    keep[timed.index[timed["end"] <= enclosing_end]] = False
+    return df[keep]
+
+
+def peak_rss(df):
+    """
+    Peak RSS (MB) of any rank for each backend, NaN where it is not recorded.
+    """
+    return df.groupby("backend", observed=True)["rss"].max()
+
+
+def compare_backends(runs, ops=None):
+    """
+    Compares several runs side by side. runs maps a label (e.g. the
+    output_type) to a schema frame, see load_run. Returns one row per label
+    and op with the mean per-step time of the slowest rank, the total time and
+    the peak RSS of the run.
+    """
+    tables = []
+    for label, df in runs.items():
+        table = op_summary(df, ops).reset_index()
+        table["peak_rss_MB"] = df["rss"].max()
+        table.insert(0, "run", label)
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables, ignore_index=True).set_index(["run", "backend", "op"])
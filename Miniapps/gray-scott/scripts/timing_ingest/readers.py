@@ -0,0 +1,378 @@
+import os
+import re
+import glob
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .schema import concat, normalize
+
+# -----------------------------
+# Common helpers
+# -----------------------------
+
+
+def get_rank_from_filename(filename):
+    """
+    Extracts the MPI rank from '..._123.csv', 'timings.0003.txt' or
+    'rank_5.csv' style file names. Returns -1 if there is none.
+    """
+    match = re.search(r"[_.](\d+)\.(?:txt|csv)$", filename)
+    return int(match.group(1)) if match else -1
+
+
+def read_files(reader, files, jobs=None, processes=False):
+    """
+    Applies a reader to all files in parallel and concatenates the results.
+    Threads are used by default, the pandas parsers release the GIL. Readers
+    doing a lot of Python work per file can use processes instead.
+    """
+    if not files:
+        return concat([])
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=jobs) as pool:
+        return concat(list(pool.map(reader, files)))
+
+
+def _data_lines(filename):
+    """
+    Returns the stripped, non-empty, non-comment lines of a text file.
+    """
+    with open(filename, "r") as f:
+        lines = pd.Series(f.read().splitlines(), dtype="string").str.strip()
+    return lines[(lines.str.len() > 0) & ~lines.str.startswith("#")]
+
+
+# -----------------------------
+# Ascent: 'rank operation time' per line, one file per rank
+# -----------------------------
+
+
+def read_ascent_file(filename):
+    """
+    Reads an Ascent 'timings.*.txt' or 'ascent_filter_times_*.csv' file. The
+    rank is taken from the file name and the order of the lines of an
+    operation gives the step. Lines without exactly 3 fields are skipped.
+    """
+    tokens = _data_lines(filename).str.split()
+    valid = tokens.str.len() == 3
+    if not valid.all():
+        warnings.warn(
+            "{}: skipped {} lines without 3 fields".format(
+                filename, int((~valid).sum())
+            )
+        )
+    tokens = tokens[valid]
+    if tokens.empty:
+        return None
+    df = pd.DataFrame(
+        {
+            "rank": get_rank_from_filename(filename),
+            "op": tokens.str[1].astype(str),
+            "duration": pd.to_numeric(tokens.str[2], errors="coerce"),
+        }
+    ).dropna(subset=["duration"])
+    df["step"] = df.groupby("op").cumcount()
+    return normalize(df, "ascent")
+
+
+# -----------------------------
+# Kombyne: 'TimerId, Level, Start, End, Time, Name' with nested timers
+# -----------------------------
+
+# Kombyne timers are written as 'TimerId, Level, Start, End, Time, Name'. The
+# name is last and may itself contain commas.
+KOMBYNE_COLUMNS = ["TimerId", "Level", "Start", "End", "Time", "Name"]
+
+# Separator used to build the path of a timer in the tree. Speedscope
+# and flame graph tools use ';' for collapsed stacks, so we do the same.
+PATH_SEPARATOR = ";"
+
+# Timers are printed with limited precision, allow a little slack when
+# checking that a child interval is contained in its parent.
+CONTAINMENT_TOLERANCE = 1e-6
+
+
+def is_kombyne_file(filename):
+    """
+    Kombyne and Ascent both write 'timings.*.txt' files. Kombyne's have a
+    'TimerId' header and comma separated fields.
+    """
+    with open(filename, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                return line.startswith("TimerId") or "," in line
+    return False
+
+
+def read_kombyne_file(filename):
+    """
+    Reads a single 'timings.*.txt' file into a DataFrame with one row per
+    timer instance. Comment and header lines are dropped and malformed lines
+    are skipped.
+    """
+    lines = _data_lines(filename)
+    lines = lines[~lines.str.startswith("TimerId")]
+    if lines.empty:
+        return pd.DataFrame(columns=KOMBYNE_COLUMNS + ["rank"])
+
+    df = lines.str.split(",", n=5, expand=True)
+    if df.shape[1] != len(KOMBYNE_COLUMNS):
+        return pd.DataFrame(columns=KOMBYNE_COLUMNS + ["rank"])
+    df.columns = KOMBYNE_COLUMNS
+
+    for col in ["TimerId", "Level", "Start", "End", "Time"]:
+        df[col] = pd.to_numeric(df[col].str.strip(), errors="coerce")
+    df["Name"] = df["Name"].str.strip()
+    df = df.dropna(subset=["Level", "Start", "End", "Time", "Name"])
+
+    df = df.astype({"Level": "int64", "Start": "float64", "End": "float64"})
+    df["Name"] = df["Name"].astype(object)
+    df["rank"] = get_rank_from_filename(filename)
+    return df.reset_index(drop=True)
+
+
+def build_timer_tree(df):
+    """
+    Rebuilds the parent/child relationships of the timers of a single rank.
+
+    A timer at level L is parented to the timer at level L-1 that started most
+    recently before it, provided the child interval is contained in the parent
+    interval. Timers without a valid parent become roots. Adds the columns
+    'node', 'parent', 'root', 'path', 'depth', 'inclusive' and 'exclusive'.
+    """
+    df = df.sort_values(["Start", "Level"], kind="stable").reset_index(drop=True)
+    df["node"] = np.arange(len(df))
+    df["parent"] = -1
+    df["root"] = df["node"]
+    df["path"] = df["Name"]
+
+    levels = sorted(df["Level"].unique())
+    for level in levels[1:]:
+        children = df.loc[df["Level"] == level, ["node", "Start", "End"]]
+        candidates = df.loc[
+            df["Level"] == level - 1, ["node", "Start", "End", "root", "path"]
+        ]
+        if candidates.empty:
+            continue
+
+        candidates = candidates.rename(
+            columns={
+                "node": "parent_node",
+                "Start": "parent_start",
+                "End": "parent_end",
+                "root": "parent_root",
+                "path": "parent_path",
+            }
+        )
+        matched = pd.merge_asof(
+            children,
+            candidates,
+            left_on="Start",
+            right_on="parent_start",
+            direction="backward",
+        )
+        contained = matched["parent_node"].notna() & (
+            matched["End"] <= matched["parent_end"] + CONTAINMENT_TOLERANCE
+        )
+        matched = matched[contained]
+
+        idx = matched["node"].to_numpy()
+        df.loc[idx, "parent"] = matched["parent_node"].astype("int64").to_numpy()
+        df.loc[idx, "root"] = matched["parent_root"].astype("int64").to_numpy()
+        df.loc[idx, "path"] = (
+            matched["parent_path"] + PATH_SEPARATOR + df.loc[idx, "Name"].to_numpy()
+        ).to_numpy()
+
+    df["depth"] = df["path"].str.count(PATH_SEPARATOR)
+
+    # inclusive time is what the timer measured, exclusive time removes the
+    # time spent in the direct children
+    df["inclusive"] = df["Time"].astype("float64")
+    child_time = df[df["parent"] >= 0].groupby("parent")["inclusive"].sum()
+    df["exclusive"] = (df["inclusive"] - df["node"].map(child_time).fillna(0.0)).clip(
+        lower=0.0
+    )
+    return df
+
+
+def read_kombyne_tree(filename):
+    """
+    Reads one rank's Kombyne timings and builds its timer tree.
+    """
+    df = read_kombyne_file(filename)
+    if df.empty:
+        return df
+    return build_timer_tree(df)
+
+
+def read_kombyne_timings(filename):
+    """
+    Reads one rank's Kombyne timings into the timing schema. The op is the
+    path of the timer in the tree, and every execution of a root timer is a
+    step that its children inherit.
+    """
+    tree = read_kombyne_tree(filename)
+    if tree.empty:
+        return None
+    roots = tree[tree["parent"] < 0]
+    root_step = roots.groupby("Name").cumcount()
+    tree["step"] = tree["root"].map(pd.Series(root_step.to_numpy(), roots["node"]))
+    df = tree.rename(
+        columns={"path": "op", "Start": "start", "End": "end", "inclusive": "duration"}
+    )
+    return normalize(df, "kombyne")
+
+
+# -----------------------------
+# PerfLogger: wide per-rank CSVs in writer_timers/ and reader_timers/
+# -----------------------------
+
+# Columns written by the PerfLogger that are not timers
+STAT_COLS = ["step", "rank", "hostname", "rss_MB", "user_s", "sys_s"]
+
+# Cumulative CPU counters keep double precision so that the per-step deltas
+# stay accurate for long runs, everything else fits in 32 bits.
+CPU_COLS = ["user_s", "sys_s"]
+
+
+def timer_csv_dtypes(path):
+    """
+    Derives compact dtypes for a PerfLogger CSV from its header line.
+    """
+    with open(path, "r") as f:
+        columns = f.readline().strip().split(",")
+    dtypes = {}
+    for c in columns:
+        if c in ("step", "rank"):
+            dtypes[c] = "int32"
+        elif c == "hostname":
+            dtypes[c] = "category"
+        elif c in CPU_COLS:
+            dtypes[c] = "float64"
+        else:
+            dtypes[c] = "float32"
+    return dtypes
+
+
+def read_timer_csv(path, chunksize=None):
+    """
+    Reads a PerfLogger CSV with compact dtypes. With a chunksize an iterator
+    over DataFrames is returned instead.
+    """
+    return pd.read_csv(path, dtype=timer_csv_dtypes(path), chunksize=chunksize)
+
+
+def get_timer_cols(columns):
+    """
+    Finds all timers by excluding the known stat columns and total_step.
+    """
+    return [c for c in columns if c not in STAT_COLS + ["total_step"]]
+
+
+def read_perflogger_file(path, backend="perflogger"):
+    """
+    Reads a PerfLogger CSV into the timing schema, one row per timer and
+    step. The RSS of the step is repeated on every timer row.
+    """
+    wide = read_timer_csv(path)
+    timers = [c for c in wide.columns if c not in STAT_COLS]
+    df = wide.melt(
+        id_vars=["step", "rank", "rss_MB"],
+        value_vars=timers,
+        var_name="op",
+        value_name="duration",
+    )
+    return normalize(df.rename(columns={"rss_MB": "rss"}), backend)
+
+
+# -----------------------------
+# Catalyst: vtkLogger scopes in everything.log
+# -----------------------------
+
+# loguru prints the end of a scope as
+#   (   0.512s) [Rank_0   ]  writerCatalyst.cpp:75  TRACE| . } 0.071 s: Writing: Catalyst
+VTK_LOG_SCOPE_END = re.compile(
+    r"\(\s*(?P<uptime>[\d.]+)s\)\s*\[(?P<thread>[^\]]*)\].*?\|[\s.]*\}\s+"
+    r"(?P<duration>[\d.]+)\s*s:\s*(?P<op>.+?)\s*$"
+)
+
+
+def read_vtk_log(path, backend="catalyst"):
+    """
+    Reads the timed scopes (vtkLogStartScope/vtkLogEndScope) from a vtkLogger
+    file such as the simulation's 'everything.log'. The rank comes from the
+    'Rank_N' thread name and the order of the scopes gives the step.
+    """
+    with open(path, "r", errors="replace") as f:
+        lines = pd.Series(f.read().splitlines(), dtype="string")
+    parts = lines.str.extract(VTK_LOG_SCOPE_END).dropna()
+    if parts.empty:
+        return None
+
+    rank = parts["thread"].str.extract(r"Rank_(\d+)", expand=False)
+    df = pd.DataFrame(
+        {
+            "rank": pd.to_numeric(rank, errors="coerce").fillna(-1),
+            "op": parts["op"].astype(str),
+            "end": parts["uptime"].astype("float64"),
+            "duration": parts["duration"].astype("float64"),
+        }
+    )
+    df["start"] = df["end"] - df["duration"]
+    df["step"] = df.groupby(["rank", "op"]).cumcount()
+    return normalize(df, backend)
+
+
+# -----------------------------
+# Run directories
+# -----------------------------
+
+
+def find_timing_files(run_dir):
+    """
+    Finds all timing outputs of a gray-scott run directory and groups them by
+    the reader that understands them.
+    """
+    txt = sorted(glob.glob(os.path.join(run_dir, "timings.*.txt")))
+    kombyne = [f for f in txt if is_kombyne_file(f)]
+    ascent = [f for f in txt if f not in kombyne]
+    ascent += sorted(glob.glob(os.path.join(run_dir, "ascent_filter_times_*.csv")))
+    return {
+        "ascent": sorted(ascent, key=get_rank_from_filename),
+        "kombyne": sorted(kombyne, key=get_rank_from_filename),
+        "writer": sorted(glob.glob(os.path.join(run_dir, "writer_timers", "*.csv"))),
+        "reader": sorted(glob.glob(os.path.join(run_dir, "reader_timers", "*.csv"))),
+        "catalyst": sorted(glob.glob(os.path.join(run_dir, "everything.log"))),
+    }
+
+
+def _read_writer_timers(path):
+    return read_perflogger_file(path, "writer")
+
+
+def _read_reader_timers(path):
+    return read_perflogger_file(path, "reader")
+
+
+READERS = {
+    "ascent": (read_ascent_file, False),
+    "kombyne": (read_kombyne_timings, True),
+    "writer": (_read_writer_timers, False),
+    "reader": (_read_reader_timers, False),
+    "catalyst": (read_vtk_log, False),
+}
+
+
+def read_run(files, jobs=None):
+    """
+    Reads the files found by find_timing_files into one schema frame.
+    """
+    frames = []
+    for source, paths in files.items():
+        reader, processes = READERS[source]
+        frames.append(read_files(reader, paths, jobs, processes))
+    return concat(frames)
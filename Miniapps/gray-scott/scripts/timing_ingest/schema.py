@@ -0,0 +1,58 @@
+import pandas as pd
+
+# Every reader returns one row per (backend, rank, step, op) timing in this
+# layout. Columns a format does not provide are left as NaN, e.g. Ascent has
+# no start/end times and only the PerfLogger records the RSS.
+SCHEMA_COLUMNS = ["backend", "rank", "step", "op", "start", "end", "duration", "rss"]
+
+SCHEMA_DTYPES = {
+    "backend": "category",
+    "rank": "int32",
+    "step": "int32",
+    "op": "category",
+    "start": "float64",
+    "end": "float64",
+    "duration": "float64",
+    "rss": "float32",
+}
+
+# Bumped whenever the layout above changes so that old caches are rebuilt
+SCHEMA_VERSION = 1
+
+
+def empty_frame():
+    """
+    Returns an empty DataFrame with the timing schema.
+    """
+    return normalize(pd.DataFrame(columns=SCHEMA_COLUMNS))
+
+
+def normalize(df, backend=None):
+    """
+    Brings a reader's output into the timing schema: adds missing columns,
+    orders them and applies the compact dtypes.
+    """
+    df = df.copy()
+    if backend is not None:
+        df["backend"] = backend
+    for col in SCHEMA_COLUMNS:
+        if col not in df.columns:
+            df[col] = float("nan")
+    df = df[SCHEMA_COLUMNS]
+    for col in ["backend", "op"]:
+        df[col] = df[col].astype(str)
+    return df.astype(SCHEMA_DTYPES).reset_index(drop=True)
+
+
+def concat(frames):
+    """
+    Concatenates schema frames, unifying the categories so the backend and
+    op columns stay categorical.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return empty_frame()
+    df = pd.concat(frames, ignore_index=True)
+    for col in ["backend", "op"]:
+        df[col] = df[col].astype(str).astype("category")
+    return df
@@ -1,69 +1,370 @@
 #!/usr/bin/env python3
-import os, glob
+import io
+import os
+import glob
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import argparse
 
+from timing_ingest.readers import (
+    CPU_COLS,
+    get_timer_cols,
+    read_timer_csv,
+    timer_csv_dtypes,
+)
+
+# Number of per-rank total_step lines kept when streaming large directories
+MAX_RANK_LINES = 64
+
+# Timers of the phases a rank works through in each step. The writer setup
+# and printSelf timers are one-off and do not count towards the busy time.
+STEP_PHASES = ["compute_step", "write_step", "create_checkpoint"]
+
+
+def busy_timer_cols(timer_cols):
+    """
+    Returns the timers summed into the busy time of a step: the STEP_PHASES
+    of the simulation, or for CSVs without them (reader_timers) every timer
+    except the *_Wait ones.
+    """
+    phases = [c for c in STEP_PHASES if c in timer_cols]
+    return phases or [c for c in timer_cols if not c.endswith("_Wait")]
+
+
+def add_cpu_deltas(df, last_cpu=None):
+    """
+    Adds per-step CPU time deltas computed from the cumulative user_s/sys_s
+    counters of each rank. last_cpu holds the last counters seen for each
+    rank in a previous chunk.
+    """
+    df = df.sort_values(["rank", "step"])
+    first = ~df["rank"].duplicated()
+    for col in CPU_COLS:
+        delta = df.groupby("rank", observed=True)[col].diff()
+        if last_cpu is not None and not last_cpu.empty:
+            previous = df.loc[first, "rank"].map(last_cpu[col])
+            delta[first] = df.loc[first, col] - previous
+        df[col + "_delta"] = delta.fillna(df[col])
+    return df
+
+
+def load_timer_csvs(csv_files, jobs=None):
+    """
+    Reads all CSVs in parallel with compact dtypes and concatenates them. The
+    hostname categories are unified first so the result stays categorical.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        dfs = list(pool.map(read_timer_csv, csv_files))
+
+    if "hostname" in dfs[0].columns:
+        hosts = pd.api.types.union_categoricals([d["hostname"] for d in dfs]).categories
+        for d in dfs:
+            d["hostname"] = d["hostname"].cat.set_categories(hosts)
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+def compute_step_stats(df, cols):
+    """
+    Computes the mean, min and max of every column per step in a single
+    groupby aggregation.
+    """
+    return df.groupby("step")[cols].agg(["mean", "min", "max"])
+
+
+class StepAggregator:
+    """
+    Accumulates per-step statistics from chunks of PerfLogger rows so that
+    directories larger than memory can be summarized. Rows of a rank must
+    arrive in step order, rows of different ranks may be interleaved freely.
+    """
+
+    def __init__(self, max_rank_lines=MAX_RANK_LINES):
+        self.max_rank_lines = max_rank_lines
+        self.cols = None
+        self._sum = None
+        self._count = None
+        self._min = None
+        self._max = None
+        self._last_cpu = pd.DataFrame(columns=CPU_COLS, dtype="float64")
+        self._rank_totals = []
+
+    def update(self, chunk):
+        """
+        Adds a chunk of rows to the running aggregates.
+        """
+        if chunk.empty:
+            return
+        if self.cols is None:
+            self.cols = get_timer_cols(chunk.columns) + [
+                "total_step",
+                "rss_MB",
+                "user_s_delta",
+                "sys_s_delta",
+            ]
+
+        chunk = add_cpu_deltas(chunk, self._last_cpu)
+        last = chunk.groupby("rank", observed=True)[CPU_COLS].last()
+        self._last_cpu = pd.concat([self._last_cpu, last])
+        self._last_cpu = self._last_cpu[~self._last_cpu.index.duplicated(keep="last")]
+
+        agg = chunk.groupby("step")[self.cols].agg(["sum", "count", "min", "max"])
+        parts = {
+            name: agg.xs(name, axis=1, level=1)
+            for name in ["sum", "count", "min", "max"]
+        }
+        if self._sum is None:
+            self._sum, self._count = parts["sum"], parts["count"]
+            self._min, self._max = parts["min"], parts["max"]
+        else:
+            self._sum = self._sum.add(parts["sum"], fill_value=0)
+            self._count = self._count.add(parts["count"], fill_value=0)
+            self._min = pd.concat([self._min, parts["min"]]).groupby(level=0).min()
+            self._max = pd.concat([self._max, parts["max"]]).groupby(level=0).max()
+
+        kept = chunk[chunk["rank"] < self.max_rank_lines]
+        if not kept.empty:
+            self._rank_totals.append(kept[["rank", "step", "total_step"]])
+
+    def stats(self):
+        """
+        Returns the per-step mean/min/max with the same layout as
+        compute_step_stats.
+        """
+        mean = (self._sum / self._count).sort_index()
+        return pd.concat(
+            {
+                "mean": mean,
+                "min": self._min.sort_index(),
+                "max": self._max.sort_index(),
+            },
+            axis=1,
+        ).swaplevel(axis=1)[self.cols]
+
+    def rank_totals(self):
+        """
+        Returns the total_step rows kept for the first max_rank_lines ranks.
+        """
+        if not self._rank_totals:
+            return pd.DataFrame(columns=["rank", "step", "total_step"])
+        totals = pd.concat(self._rank_totals, ignore_index=True)
+        self._rank_totals = [totals]
+        return totals.sort_values(["rank", "step"])
 
-def main(timer_dir, output_file):
-    # Collect CSVs
-    csv_files = glob.glob(os.path.join(timer_dir, "*.csv"))
-    if not csv_files:
-        print(f"Error: No CSV files found in directory '{timer_dir}'.")
-        return
 
-    dfs = []
-    for f in csv_files:
-        df = pd.read_csv(f)
-        dfs.append(df)
-
-    # Concatenate
-    df_all = pd.concat(dfs, ignore_index=True)
-
-    # Identify columns
-    all_cols = df_all.columns.tolist()
-    # This logic dynamically finds all timers by excluding known stat columns
-    timer_cols = [
-        c
-        for c in all_cols
-        if c
-        not in ["step", "rank", "hostname", "rss_MB", "user_s", "sys_s", "total_step"]
-    ]
-    stat_cols = ["rss_MB", "user_s", "sys_s"]
-
-    # Compute per-step CPU deltas
-    df_all = df_all.sort_values(["rank", "step"]).copy()
-    for col in ["user_s", "sys_s"]:
-        df_all[col + "_delta"] = df_all.groupby("rank")[col].diff().fillna(df_all[col])
+def stream_timer_csvs(csv_files, chunksize):
+    """
+    Summarizes the CSVs chunk by chunk without ever holding all rows.
+    """
+    aggregator = StepAggregator()
+    for path in csv_files:
+        for chunk in read_timer_csv(path, chunksize=chunksize):
+            aggregator.update(chunk)
+    return aggregator
+
+
+def analyze_load_imbalance(df_all, timer_cols):
+    """
+    Computes per-step load imbalance and straggler statistics.
+
+    The ranks synchronize inside total_step, so the time a rank spends waiting
+    for the others is total_step minus its busy time, the sum of the
+    busy_timer_cols timers. The rank with the largest busy time in a step is the
+    straggler of that step and sits on the critical path.
+    """
+    df = df_all[["step", "rank", "hostname", "rss_MB", "total_step"]].copy()
+    df["busy"] = df_all[busy_timer_cols(timer_cols)].sum(axis=1)
+    df["wait"] = (df["total_step"] - df["busy"]).clip(lower=0.0)
+
+    # RSS is the peak resident set size, so growth between steps is its diff
+    df = df.sort_values(["rank", "step"])
+    df["rss_growth"] = df.groupby("rank")["rss_MB"].diff().fillna(0.0)
+
+    grouped = df.groupby("step")
+    per_step = grouped["busy"].agg(["max", "mean", "min"])
+    per_step["imbalance"] = per_step["max"] / per_step["mean"].where(
+        per_step["mean"] > 0
+    )
+    straggler_rows = df.loc[grouped["busy"].idxmax()]
+    per_step["straggler_rank"] = straggler_rows["rank"].to_numpy()
+    per_step["straggler_host"] = straggler_rows["hostname"].to_numpy()
+    per_step["lost_s"] = per_step["max"] - per_step["mean"]
+    per_step["mean_wait"] = grouped["wait"].mean()
+
+    # Straggler frequency and accumulated critical-path time per rank
+    per_rank = (
+        per_step.groupby("straggler_rank")
+        .agg(
+            straggler_steps=("max", "size"),
+            critical_path_s=("max", "sum"),
+            lost_s=("lost_s", "sum"),
+        )
+        .sort_values("critical_path_s", ascending=False)
+    )
+    per_rank.index.name = "rank"
+    per_host = per_step["straggler_host"].value_counts().rename("straggler_steps")
+
+    # Correlation between RSS growth and step time
+    rss_corr = df["rss_growth"].corr(df["busy"])
+    rank_totals = df.groupby("rank").agg(
+        rss_growth=("rss_growth", "sum"), busy=("busy", "mean")
+    )
+    rank_rss_corr = rank_totals["rss_growth"].corr(rank_totals["busy"])
+
+    heatmaps = {
+        name: df.pivot(index="rank", columns="step", values=name)
+        for name in ["busy", "wait"]
+    }
+
+    return {
+        "per_step": per_step,
+        "per_rank": per_rank,
+        "per_host": per_host,
+        "rss_step_corr": rss_corr,
+        "rss_rank_corr": rank_rss_corr,
+        "heatmaps": heatmaps,
+        "total_wait": df["wait"].sum(),
+        "total_step": df["total_step"].sum(),
+    }
+
+
+def write_imbalance_report(analysis, report_file, top=10):
+    """
+    Writes a ranked text report of the load-imbalance analysis and echoes it to
+    the console.
+    """
+    per_step = analysis["per_step"]
+    per_rank = analysis["per_rank"]
+    lines = []
+    lines.append("Load-imbalance analysis")
+    lines.append("=======================")
+    wait_pct = 100.0 * analysis["total_wait"] / max(analysis["total_step"], 1e-12)
+    lines.append(
+        f"Time spent waiting: {analysis['total_wait']:.3f} s of "
+        f"{analysis['total_step']:.3f} s total_step ({wait_pct:.1f}%)"
+    )
+    imbalance = per_step["imbalance"].dropna()
+    if imbalance.empty:
+        lines.append("Mean imbalance (max/mean busy): n/a, no step has busy time")
+    else:
+        lines.append(
+            f"Mean imbalance (max/mean busy): {imbalance.mean():.3f}, "
+            f"worst {imbalance.max():.3f} at step {imbalance.idxmax()}"
+        )
+    if not per_rank.empty:
+        lines.append(f"Critical-path rank: {per_rank.index[0]}")
+    lines.append(
+        f"Correlation RSS growth vs busy time (per step): "
+        f"{analysis['rss_step_corr']:.3f}"
+    )
+    lines.append(
+        f"Correlation RSS growth vs mean busy time (per rank): "
+        f"{analysis['rss_rank_corr']:.3f}"
+    )
+
+    lines.append("")
+    lines.append(f"Top {top} ranks on the critical path:")
+    lines.append(per_rank.head(top).to_string(float_format=lambda v: f"{v:.4f}"))
+    lines.append("")
+    lines.append(f"Top {top} straggler hosts:")
+    lines.append(analysis["per_host"].head(top).to_string())
+    lines.append("")
+    lines.append(f"Top {top} most imbalanced steps:")
+    lines.append(
+        per_step.nlargest(top, "imbalance").to_string(float_format=lambda v: f"{v:.4f}")
+    )
+
+    report = "\n".join(lines)
+    print(report)
+    with open(report_file, "w") as f:
+        f.write(report + "\n")
+    print(f"Successfully wrote load-imbalance report: {report_file}")
+
+
+def plot_imbalance_heatmaps(analysis, output_file, title):
+    """
+    Plots rank x step heatmaps of busy and wait time together with the per-step
+    imbalance factor.
+    """
+    fig, axs = plt.subplots(3, 1, figsize=(12, 16), constrained_layout=True)
+    fig.suptitle(f"Load Imbalance from: {title}", fontsize=16)
+
+    for ax, name in zip(axs[:2], ["busy", "wait"]):
+        pivot = analysis["heatmaps"][name]
+        steps = pivot.columns.to_numpy()
+        ranks = pivot.index.to_numpy()
+        image = ax.imshow(
+            pivot.to_numpy(),
+            aspect="auto",
+            origin="lower",
+            interpolation="nearest",
+            cmap="viridis",
+            extent=[
+                steps.min() - 0.5,
+                steps.max() + 0.5,
+                ranks.min() - 0.5,
+                ranks.max() + 0.5,
+            ],
+        )
+        fig.colorbar(image, ax=ax, label="Time (s)")
+        ax.set_xlabel("Step")
+        ax.set_ylabel("Rank")
+        ax.set_title(f"{name.capitalize()} time per rank and step")
+
+    ax = axs[2]
+    per_step = analysis["per_step"]
+    ax.plot(
+        per_step.index.to_numpy(),
+        per_step["imbalance"].to_numpy(),
+        color="tab:red",
+        marker="o",
+        markersize=3,
+    )
+    ax.set_xlabel("Step")
+    ax.set_ylabel("max / mean busy time")
+    ax.set_title("Load Imbalance per Step")
+    ax.grid(True)
+
+    fig.savefig(output_file, dpi=300)
+    print(f"Successfully generated load-imbalance plot: {output_file}")
+
+
+def plot_summary(stats, rank_totals, timer_cols, title, output_file):
+    """
+    Draws the four-panel performance summary from the per-step statistics and
+    the per-rank total_step rows.
+    """
+    steps = stats.index.to_numpy()
 
     # -----------------------------
     # 1) Timer line plot with min/max shading
     # -----------------------------
     fig, axs = plt.subplots(4, 1, figsize=(12, 18), constrained_layout=True)
-    fig.suptitle(f"Performance Analysis from: {timer_dir}", fontsize=16)
+    fig.suptitle(f"Performance Analysis from: {title}", fontsize=16)
 
     colors = plt.get_cmap("tab10")
     color_map = {name: colors(i) for i, name in enumerate(timer_cols)}
 
     ax = axs[0]
-    for i, t in enumerate(timer_cols):
-        grouped = df_all.groupby("step")[t]
-        mean_vals = grouped.mean()
-        min_vals = grouped.min()
-        max_vals = grouped.max()
+    for t in timer_cols:
         ax.plot(
-            mean_vals.index.to_numpy(),
-            mean_vals.to_numpy(),
+            steps,
+            stats[(t, "mean")].to_numpy(),
             label=t,
             color=color_map[t],
             marker="o",
             markersize=3,
         )
         ax.fill_between(
-            mean_vals.index.to_numpy(),
-            min_vals.to_numpy(),
-            max_vals.to_numpy(),
+            steps,
+            stats[(t, "min")].to_numpy(),
+            stats[(t, "max")].to_numpy(),
             color=color_map[t],
             alpha=0.2,
         )
@@ -77,17 +378,11 @@ def main(timer_dir, output_file):
     # 2) Stacked bar chart (mean only)
     # -----------------------------
     ax = axs[1]
-    bottom = np.zeros(len(mean_vals))
+    bottom = np.zeros(len(steps))
     for t in timer_cols:
-        mean_vals = df_all.groupby("step")[t].mean()
-        ax.bar(
-            mean_vals.index.to_numpy(),
-            mean_vals.to_numpy(),
-            bottom=bottom,
-            color=color_map[t],
-            label=t,
-        )
-        bottom += mean_vals.to_numpy()
+        mean_vals = stats[(t, "mean")].to_numpy()
+        ax.bar(steps, mean_vals, bottom=bottom, color=color_map[t], label=t)
+        bottom += mean_vals
 
     ax.set_ylabel("Time (s)")
     ax.set_title("Timers (stacked, mean across ranks)")
@@ -101,10 +396,9 @@ def main(timer_dir, output_file):
     ax_cpu = axs[2].twinx()
 
     # RSS
-    rss_mean = df_all.groupby("step")["rss_MB"].mean()
     ax_rss.plot(
-        rss_mean.index.to_numpy(),
-        rss_mean.to_numpy(),
+        steps,
+        stats[("rss_MB", "mean")].to_numpy(),
         label="RSS (MB)",
         color="tab:blue",
         marker="o",
@@ -114,19 +408,17 @@ def main(timer_dir, output_file):
     ax_rss.tick_params(axis="y", labelcolor="tab:blue")
 
     # CPU deltas
-    user_mean = df_all.groupby("step")["user_s_delta"].mean()
-    sys_mean = df_all.groupby("step")["sys_s_delta"].mean()
     ax_cpu.plot(
-        user_mean.index.to_numpy(),
-        user_mean.to_numpy(),
+        steps,
+        stats[("user_s_delta", "mean")].to_numpy(),
         label="user_s",
         color="tab:orange",
         marker="s",
         markersize=3,
     )
     ax_cpu.plot(
-        sys_mean.index.to_numpy(),
-        sys_mean.to_numpy(),
+        steps,
+        stats[("sys_s_delta", "mean")].to_numpy(),
         label="sys_s",
         color="tab:green",
         marker="^",
@@ -146,7 +438,7 @@ def main(timer_dir, output_file):
     # 4) Total step time by rank
     # -----------------------------
     ax = axs[3]
-    for rank, grp in df_all.groupby("rank"):
+    for rank, grp in rank_totals.groupby("rank", sort=True):
         ax.plot(
             grp["step"].to_numpy(),
             grp["total_step"].to_numpy(),
@@ -158,7 +450,7 @@ def main(timer_dir, output_file):
     ax.set_ylabel("Total Step Time (s)")
     ax.set_title("Total Step Time by Rank")
     if (
-        len(df_all["rank"].unique()) <= 10
+        rank_totals["rank"].nunique() <= 10
     ):  # Only show legend if there aren't too many ranks
         ax.legend()
     ax.grid(True)
@@ -166,6 +458,202 @@ def main(timer_dir, output_file):
     # Save the final figure
     fig.savefig(output_file, dpi=300)
     print(f"Successfully generated performance plot: {output_file}")
+    return fig
+
+
+class CsvTailer:
+    """
+    Follows the CSV files of a timer directory while they are being written.
+    Only the bytes appended since the previous poll are read, and a partially
+    written last line is kept until it is complete.
+    """
+
+    def __init__(self, timer_dir):
+        self.timer_dir = timer_dir
+        self._files = {}
+        self.restarted = False
+
+    def poll(self):
+        """
+        Returns a DataFrame with the rows appended to any CSV since the last
+        call, or None if nothing new was written. If a CSV was truncated,
+        replaced or removed, every CSV is read again from the start and
+        restarted is set, so that the caller can drop the rows it already has.
+        """
+        paths = sorted(glob.glob(os.path.join(self.timer_dir, "*.csv")))
+        sizes = {path: os.path.getsize(path) for path in paths}
+        self.restarted = any(
+            path not in sizes or sizes[path] < state["offset"]
+            for path, state in self._files.items()
+        )
+        if self.restarted:
+            self._files = {}
+
+        frames = []
+        for path in paths:
+            state = self._files.get(path)
+            size = sizes[path]
+            if state is None:
+                state = {"offset": 0, "pending": b"", "header": None, "dtypes": None}
+                self._files[path] = state
+            if size == state["offset"]:
+                continue
+
+            with open(path, "rb") as f:
+                f.seek(state["offset"])
+                data = state["pending"] + f.read(size - state["offset"])
+            state["offset"] = size
+
+            complete, _, state["pending"] = data.rpartition(b"\n")
+            if not complete:
+                state["pending"] = data
+                continue
+            text = complete.decode()
+            if state["header"] is None:
+                state["header"], _, text = text.partition("\n")
+                state["dtypes"] = timer_csv_dtypes(path)
+                if not text:
+                    continue
+
+            frames.append(
+                pd.read_csv(
+                    io.StringIO(state["header"] + "\n" + text),
+                    dtype=state["dtypes"],
+                )
+            )
+
+        if not frames:
+            return None
+        new_rows = pd.concat(frames, ignore_index=True)
+        if "hostname" in new_rows.columns:
+            new_rows["hostname"] = new_rows["hostname"].astype("category")
+        return new_rows
+
+
+class PlotServer:
+    """
+    Serves the latest summary image over a local HTTP endpoint. The index
+    page reloads itself at the refresh interval.
+    """
+
+    def __init__(self, port, refresh):
+        self.image = None
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/plot.png"):
+                    with server.lock:
+                        body = server.image
+                    if body is None:
+                        self.send_error(503, "No data yet")
+                        return
+                    content_type = "image/png"
+                else:
+                    body = (
+                        f"<html><head><meta http-equiv='refresh' content='{refresh}'>"
+                        "<title>Gray-Scott timers</title></head><body>"
+                        f"<img src='/plot.png?t={time.time()}' style='width:100%'>"
+                        "</body></html>"
+                    ).encode()
+                    content_type = "text/html"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"Serving live plot at http://127.0.0.1:{port}/")
+
+    def update(self, fig):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100)
+        with self.lock:
+            self.image = buffer.getvalue()
+
+
+def follow(timer_dir, output_file, interval=10.0, port=None):
+    """
+    Watches a timer directory while the simulation runs, updates the per-step
+    aggregates with the newly appended rows and re-renders the summary every
+    interval seconds. Stop with Ctrl-C.
+    """
+    plt.switch_backend("Agg")
+    tailer = CsvTailer(timer_dir)
+    aggregator = StepAggregator()
+    server = PlotServer(port, interval) if port else None
+
+    print(f"Following '{timer_dir}' every {interval} s, press Ctrl-C to stop.")
+    try:
+        while True:
+            new_rows = tailer.poll() if os.path.isdir(timer_dir) else None
+            if tailer.restarted:
+                # the rows are read again from the start of every file
+                aggregator = StepAggregator()
+            if new_rows is not None:
+                aggregator.update(new_rows)
+                stats = aggregator.stats()
+                timer_cols = get_timer_cols(stats.columns.get_level_values(0).unique())
+                timer_cols = [c for c in timer_cols if not c.endswith("_delta")]
+
+                # write to a temporary file first so viewers never see a
+                # partially written image
+                root, ext = os.path.splitext(output_file)
+                tmp_file = f"{root}.tmp{ext}"
+                fig = plot_summary(
+                    stats, aggregator.rank_totals(), timer_cols, timer_dir, tmp_file
+                )
+                os.replace(tmp_file, output_file)
+                if server:
+                    server.update(fig)
+                plt.close(fig)
+                print(f"Updated through step {stats.index.max()}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped following.")
+
+
+def main(timer_dir, output_file, analysis=False, jobs=None, chunksize=None):
+    # Collect CSVs
+    csv_files = sorted(glob.glob(os.path.join(timer_dir, "*.csv")))
+    if not csv_files:
+        print(f"Error: No CSV files found in directory '{timer_dir}'.")
+        return
+
+    if chunksize:
+        # Streaming path for directories that do not fit in memory
+        if analysis:
+            print("Warning: --analysis needs all rows in memory, skipping it.")
+            analysis = False
+        aggregator = stream_timer_csvs(csv_files, chunksize)
+        stats = aggregator.stats()
+        rank_totals = aggregator.rank_totals()
+        timer_cols = get_timer_cols(stats.columns.get_level_values(0).unique())
+        timer_cols = [c for c in timer_cols if not c.endswith("_delta")]
+    else:
+        df_all = add_cpu_deltas(load_timer_csvs(csv_files, jobs))
+        timer_cols = get_timer_cols(df_all.columns)
+        timer_cols = [c for c in timer_cols if not c.endswith("_delta")]
+        stats = compute_step_stats(
+            df_all,
+            timer_cols + ["total_step", "rss_MB", "user_s_delta", "sys_s_delta"],
+        )
+        rank_totals = df_all[["rank", "step", "total_step"]]
+
+    plot_summary(stats, rank_totals, timer_cols, timer_dir, output_file)
+
+    if analysis:
+        stem = os.path.splitext(output_file)[0]
+        results = analyze_load_imbalance(df_all, timer_cols)
+        write_imbalance_report(results, stem + "_imbalance.txt")
+        plot_imbalance_heatmaps(results, stem + "_imbalance.png", timer_dir)
 
     # Show the interactive plot window
     plt.show()
@@ -187,6 +675,45 @@ if __name__ == "__main__":
         default="timers_summary.png",
         help="Name of the output PNG image file.",
     )
+    parser.add_argument(
+        "--analysis",
+        action="store_true",
+        help="Also run the load-imbalance analysis and write a ranked report and heatmaps.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of threads used to read the CSV files.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the CSV files in chunks of this many rows instead of loading them all at once.",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Watch the directory while the simulation runs and re-render the plot as rows are appended.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        help="Refresh interval in seconds for --follow.",
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        default=None,
+        help="With --follow, also serve the plot at http://127.0.0.1:PORT/.",
+    )
     args = parser.parse_args()
 
-    main(args.input_dir, args.output_file)
+    if args.follow:
+        follow(args.input_dir, args.output_file, args.interval, args.serve)
+    else:
+        main(args.input_dir, args.output_file, args.analysis, args.jobs, args.chunksize)
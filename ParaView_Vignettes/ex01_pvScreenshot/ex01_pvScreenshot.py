@@ -5,6 +5,7 @@
 # Copyright KAUST
 #
 import sys
+import argparse
 from pathlib import *
 from paraview.simple import *
 
@@ -12,6 +13,25 @@ paraview.simple._DisableFirstRenderCameraReset()
 
 print("Running ParaView example script: ", sys.argv[0], "\n")
 
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
+import vignette_utils
+
+parser = argparse.ArgumentParser(description="Screenshot example.")
+parser.add_argument(
+    "--png-level", type=int, default=5, help="zlib level of the PNG, 0-9."
+)
+parser.add_argument(
+    "--thumbnails",
+    nargs="*",
+    default=[],
+    choices=[".jpg", ".webp"],
+    help="Also write preview thumbnails of these types.",
+)
+parser.add_argument(
+    "--raw", action="store_true", help="Also write the pixels as a .npy array."
+)
+args = parser.parse_args()
+
 # Create a simple cone object
 cone = Cone()
 
@@ -30,6 +50,12 @@ directory.mkdir(parents=True, exist_ok=True)
 
 # show data in view
 cone1Display = Show(cone, renderView1)
-SaveScreenshot(str(directory) + "/ex01_pvScreenshot.png", renderView1)
+
+# render once and write every output from the same image
+screenshots = vignette_utils.ScreenshotService(renderView1, png_level=args.png_level)
+screenshots.save(
+    str(directory) + "/ex01_pvScreenshot.png", thumbnails=args.thumbnails, raw=args.raw
+)
+screenshots.close()
 
 print("\nFinished ParaView example script\n")
@@ -6,6 +6,8 @@
 #
 import os
 import sys
+import time
+import argparse
 import pathlib
 import paraview
 import subprocess
@@ -21,6 +23,21 @@ print("Running ParaView example script: ", sys.argv[0], "\n")
 script_dir = os.path.abspath(os.path.dirname(__file__))
 print("Running script from: ", script_dir)
 
+sys.path.insert(0, os.path.join(script_dir, ".."))
+import vignette_utils
+
+parser = argparse.ArgumentParser(description="Camera animation example.")
+parser.add_argument(
+    "site", nargs="?", default="", help="'ibex' skips the movie generation."
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Render the frames in this many pvbatch processes.",
+)
+args = parser.parse_args()
+
 #### disable automatic camera reset on 'Show'
 paraview.simple._DisableFirstRenderCameraReset()
 
@@ -313,19 +330,63 @@ except FileExistsError:
     pass
 
 
-# save animation
-SaveAnimation(
-    saveDir + "/ex02_pv_png_sequence.png",
-    renderView1,
-    ImageResolution=[4054, 2536],
-    FrameWindow=[0, 99],
-)
+imagePattern = saveDir + "/ex02_pv_png_sequence.%04d.png"
+numFrames = animationScene1.NumberOfFrames
+
+
+def render_frames(frames):
+    """
+    Renders a subset of the animation frames, evaluating the camera path and
+    the opacity track at the time of each frame.
+    """
+    startTime = animationScene1.StartTime
+    endTime = animationScene1.EndTime
+    for frame in frames:
+        animationScene1.AnimationTime = startTime + (endTime - startTime) * frame / (
+            numFrames - 1
+        )
+        print("Saving Image ", frame, " of", numFrames, flush=True)
+        SaveScreenshot(imagePattern % frame, renderView1, ImageResolution=[4054, 2536])
+
+
+# The frames are split over the workers. With --workers this process starts
+# the workers; they can also be started by a launcher as independent pvbatch
+# processes. Worker 0 waits for the others and checks the sequence. Frames
+# and markers of an earlier run are removed first.
+workerStart = time.time()
+worker, workers = vignette_utils.frame_worker(launch=args.workers > 1)
+makeMovie = True
+if args.workers > 1 and workers == 1:
+    vignette_utils.clear_frames(
+        saveDir, imagePattern, range(numFrames), range(args.workers)
+    )
+    failed = vignette_utils.launch_workers(
+        os.path.abspath(__file__), args.workers, [args.site]
+    )
+    if failed:
+        print("Frame workers failed: ", failed, flush=True)
+    makeMovie = False
+elif workers > 1:
+    frames = vignette_utils.frames_for_worker(range(numFrames), worker, workers)
+    vignette_utils.clear_frames(saveDir, imagePattern, frames, [worker])
+    render_frames(frames)
+    makeMovie = vignette_utils.wait_for_workers(saveDir, worker, workers, workerStart)
+    makeMovie = makeMovie and worker == 0
+    makeMovie = makeMovie and vignette_utils.report_frames(
+        imagePattern, range(numFrames)
+    )
+else:
+    # save animation
+    SaveAnimation(
+        saveDir + "/ex02_pv_png_sequence.png",
+        renderView1,
+        ImageResolution=[4054, 2536],
+        FrameWindow=[0, 99],
+    )
 
-runningOnIbex = "no"
-if len(sys.argv) == 2:
-    runningOnIbex = sys.argv[1]
+runningOnIbex = args.site
 
-if runningOnIbex != "ibex":
+if makeMovie and runningOnIbex != "ibex":
     print("Generating movie using ffmpeg\n")
     # layout/tab size in pixels
     layout1.SetSize(2027, 1268)
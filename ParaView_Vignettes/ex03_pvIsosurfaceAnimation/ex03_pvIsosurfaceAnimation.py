@@ -6,6 +6,8 @@
 #
 import os
 import sys
+import time
+import argparse
 import pathlib
 import paraview
 import subprocess
@@ -14,11 +16,26 @@ from paraview.simple import *
 paraview.compatibility.major = 5
 paraview.compatibility.minor = 13
 
-print("Running ParaView example script: ", sys.argv[0], "\n")
+print("Running ParaView example script: ", sys.argv[0], "\n", flush=True)
 
 # Get directory of this script
 script_dir = os.path.abspath(os.path.dirname(__file__))
-print("Running script from: ", script_dir)
+print("Running script from: ", script_dir, flush=True)
+
+sys.path.insert(0, os.path.join(script_dir, ".."))
+
+parser = argparse.ArgumentParser(description="Isosurface animation example.")
+parser.add_argument(
+    "site", nargs="?", default="", help="'ibex' skips the movie generation."
+)
+parser.add_argument(
+    "--sweep",
+    action="store_true",
+    help="Contour only the bricks whose range contains each isovalue.",
+)
+args = parser.parse_args()
+
+numFrames = 35
 
 #### disable automatic camera reset on 'Show'
 paraview.simple._DisableFirstRenderCameraReset()
@@ -157,6 +174,218 @@ contour1.ContourBy = ["POINTS", "hardyglobal"]
 contour1.Isosurfaces = [3.49259752035141]
 contour1.PointMergeMethod = "Uniform Binning"
 
+# With --sweep, the structured blocks are split into bricks and each
+# isovalue is only contoured in the bricks whose hardyglobal range contains
+# it. The brick ranges and filters are built once and reused.
+sweepScript = """
+import vignette_utils
+vignette_utils.sweep_contour(self, "hardyglobal", {})
+"""
+if args.sweep:
+    sweep1 = ProgrammableFilter(registrationName="Sweep1", Input=noisesilo)
+    sweep1.Script = sweepScript.format(3.49259752035141)
+
+
+def set_isovalue(value):
+    if args.sweep:
+        sweep1.Script = sweepScript.format(value)
+    else:
+        contour1.Isosurfaces = [value]
+
+
+isosurface = sweep1 if args.sweep else contour1
+
+# show data in view
+noisesiloDisplay = Show(noisesilo, renderView1, "GeometryRepresentation")
+
+# trace defaults for the display properties.
+noisesiloDisplay.Representation = "Surface"
+noisesiloDisplay.ColorArrayName = [None, ""]
+noisesiloDisplay.SelectTCoordArray = "None"
+noisesiloDisplay.SelectNormalArray = "None"
+noisesiloDisplay.SelectTangentArray = "None"
+noisesiloDisplay.OSPRayScaleArray = "PointVar"
+noisesiloDisplay.OSPRayScaleFunction = "PiecewiseFunction"
+noisesiloDisplay.SelectOrientationVectors = "None"
+noisesiloDisplay.ScaleFactor = 2.0
+noisesiloDisplay.SelectScaleArray = "None"
+noisesiloDisplay.GlyphType = "Arrow"
+noisesiloDisplay.GlyphTableIndexArray = "None"
+noisesiloDisplay.GaussianRadius = 0.1
+noisesiloDisplay.SetScaleArray = ["POINTS", "PointVar"]
+noisesiloDisplay.ScaleTransferFunction = "PiecewiseFunction"
+noisesiloDisplay.OpacityArray = ["POINTS", "PointVar"]
+noisesiloDisplay.OpacityTransferFunction = "PiecewiseFunction"
+noisesiloDisplay.DataAxesGrid = "GridAxesRepresentation"
+noisesiloDisplay.PolarAxes = "PolarAxesRepresentation"
+noisesiloDisplay.SelectInputVectors = ["POINTS", "grad"]
+noisesiloDisplay.WriteLog = ""
+
+# init the 'PiecewiseFunction' selected for 'ScaleTransferFunction'
+noisesiloDisplay.ScaleTransferFunction.Points = [
+    1.0779780149459839,
+    0.0,
+    0.5,
+    0.0,
+    5.925835132598877,
+    1.0,
+    0.5,
+    0.0,
+]
+
+# init the 'PiecewiseFunction' selected for 'OpacityTransferFunction'
+noisesiloDisplay.OpacityTransferFunction.Points = [
+    1.0779780149459839,
+    0.0,
+    0.5,
+    0.0,
+    5.925835132598877,
+    1.0,
+    0.5,
+    0.0,
+]
+
+# reset view to fit data
+renderView1.ResetCamera(False)
+
+# get the material library
+materialLibrary1 = GetMaterialLibrary()
+
+# update the view to ensure updated data information
+renderView1.Update()
+
+# set scalar coloring
+ColorBy(noisesiloDisplay, ("FIELD", "vtkBlockColors"))
+
+# show color bar/color legend
+noisesiloDisplay.SetScalarBarVisibility(renderView1, True)
+
+# get color transfer function/color map for 'vtkBlockColors'
+vtkBlockColorsLUT = GetColorTransferFunction("vtkBlockColors")
+
+# get opacity transfer function/opacity map for 'vtkBlockColors'
+vtkBlockColorsPWF = GetOpacityTransferFunction("vtkBlockColors")
+
+# get 2D transfer function for 'vtkBlockColors'
+vtkBlockColorsTF2D = GetTransferFunction2D("vtkBlockColors")
+
+# set scalar coloring
+ColorBy(noisesiloDisplay, ("POINTS", "hardyglobal"))
+
+# Hide the scalar bar for this color map if no visible data is colored by it.
+HideScalarBarIfNotNeeded(vtkBlockColorsLUT, renderView1)
+
+# rescale color and/or opacity maps used to include current data range
+noisesiloDisplay.RescaleTransferFunctionToDataRange(True, False)
+
+# show color bar/color legend
+noisesiloDisplay.SetScalarBarVisibility(renderView1, True)
+
+# get color transfer function/color map for 'hardyglobal'
+hardyglobalLUT = GetColorTransferFunction("hardyglobal")
+
+# get opacity transfer function/opacity map for 'hardyglobal'
+hardyglobalPWF = GetOpacityTransferFunction("hardyglobal")
+
+# create a new 'Contour'
+contour1 = Contour(registrationName="Contour1", Input=noisesilo)
+contour1.ContourBy = ["POINTS", "hardyglobal"]
+contour1.Isosurfaces = [3.49259752035141]
+contour1.PointMergeMethod = "Uniform Binning"
+
+# With --sweep, each block keeps one vtkContourFilter for all isovalues, so
+# the span space of unstructured blocks is only built once.
+sweepScript = """
+import vignette_utils
+vignette_utils.sweep_contour(self, "hardyglobal", {})
+"""
+sweep1 = ProgrammableFilter(registrationName="Sweep1", Input=noisesilo)
+sweep1.Script = sweepScript.format(3.49259752035141)
+
+
+def set_isovalue(value):
+    if args.sweep:
+        sweep1.Script = sweepScript.format(value)
+    else:
+        contour1.Isosurfaces = [value]
+
+
+isosurface = sweep1 if args.sweep else contour1
+
+# show data in view
+contour1Display = Show(isosurface, renderView1, "GeometryRepresentation")
+
+# trace defaults for the display properties.
+contour1Display.Representation = "Surface"
+contour1Display.ColorArrayName = ["POINTS", "hardyglobal"]
+contour1Display.LookupTable = hardyglobalLUT
+contour1Display.SelectTCoordArray = "None"
+contour1Display.SelectNormalArray = "Normals"
+contour1Display.SelectTangentArray = "None"
+contour1Display.OSPRayScaleArray = "hardyglobal"
+contour1Display.OSPRayScaleFunction = "PiecewiseFunction"
+contour1Display.SelectOrientationVectors = "None"
+contour1Display.ScaleFactor = 2.0
+contour1Display.SelectScaleArray = "hardyglobal"
+contour1Display.GlyphType = "Arrow"
+contour1Display.GlyphTableIndexArray = "hardyglobal"
+contour1Display.GaussianRadius = 0.1
+contour1Display.SetScaleArray = ["POINTS", "hardyglobal"]
+contour1Display.ScaleTransferFunction = "PiecewiseFunction"
+contour1Display.OpacityArray = ["POINTS", "hardyglobal"]
+contour1Display.OpacityTransferFunction = "PiecewiseFunction"
+contour1Display.DataAxesGrid = "GridAxesRepresentation"
+contour1Display.PolarAxes = "PolarAxesRepresentation"
+
+# init the 'PiecewiseFunction' selected for 'ScaleTransferFunction'
+contour1Display.ScaleTransferFunction.Points = [
+    1.6282219886779785,
+    0.0,
+    0.5,
+    0.0,
+    5.889651775360107,
+    1.0,
+    0.5,
+    0.0,
+]
+
+# init the 'PiecewiseFunction' selected for 'OpacityTransferFunction'
+contour1Display.OpacityTransferFunction.Points = [
+    1.6282219886779785,
+    0.0,
+    0.5,
+    0.0,
+    5.889651775360107,
+    1.0,
+    0.5,
+    0.0,
+]
+
+# hide data in view
+Hide(noisesilo, renderView1)
+
+# show color bar/color legend
+contour1Display.SetScalarBarVisibility(renderView1, True)
+
+# get layout
+layout1 = GetLayout()
+
+# layout/tab size in pixels
+layout1.SetSize(2027, 1268)
+
+# current camera placement for renderView1
+renderView1.CameraPosition = [
+    49.0381653030622,
+    3.083657606729836,
+    -45.433581947240924,
+]
+renderView1.CameraViewUp = [
+    -0.018686825287978125,
+    0.9986910201150085,
+    0.047613536964819486,
+]
+renderView1.CameraParallelScale = 17.320508075688775
+
 # create folder to store images
 saveDir = script_dir + "/output"
 try:
@@ -164,100 +393,42 @@ try:
 except FileExistsError:
     pass
 
-# walk over a range of iso values
-for i in range(35):
-    # Properties modified on contour1
-    contour1.Isosurfaces = [2 + 0.1 * i]
-
-    # show data in view
-    contour1Display = Show(contour1, renderView1, "GeometryRepresentation")
-
-    # trace defaults for the display properties.
-    contour1Display.Representation = "Surface"
-    contour1Display.ColorArrayName = ["POINTS", "hardyglobal"]
-    contour1Display.LookupTable = hardyglobalLUT
-    contour1Display.SelectTCoordArray = "None"
-    contour1Display.SelectNormalArray = "Normals"
-    contour1Display.SelectTangentArray = "None"
-    contour1Display.OSPRayScaleArray = "hardyglobal"
-    contour1Display.OSPRayScaleFunction = "PiecewiseFunction"
-    contour1Display.SelectOrientationVectors = "None"
-    contour1Display.ScaleFactor = 2.0
-    contour1Display.SelectScaleArray = "hardyglobal"
-    contour1Display.GlyphType = "Arrow"
-    contour1Display.GlyphTableIndexArray = "hardyglobal"
-    contour1Display.GaussianRadius = 0.1
-    contour1Display.SetScaleArray = ["POINTS", "hardyglobal"]
-    contour1Display.ScaleTransferFunction = "PiecewiseFunction"
-    contour1Display.OpacityArray = ["POINTS", "hardyglobal"]
-    contour1Display.OpacityTransferFunction = "PiecewiseFunction"
-    contour1Display.DataAxesGrid = "GridAxesRepresentation"
-    contour1Display.PolarAxes = "PolarAxesRepresentation"
-
-    # init the 'PiecewiseFunction' selected for 'ScaleTransferFunction'
-    contour1Display.ScaleTransferFunction.Points = [
-        1.6282219886779785,
-        0.0,
-        0.5,
-        0.0,
-        5.889651775360107,
-        1.0,
-        0.5,
-        0.0,
-    ]
-
-    # init the 'PiecewiseFunction' selected for 'OpacityTransferFunction'
-    contour1Display.OpacityTransferFunction.Points = [
-        1.6282219886779785,
-        0.0,
-        0.5,
-        0.0,
-        5.889651775360107,
-        1.0,
-        0.5,
-        0.0,
-    ]
-
-    # hide data in view
-    Hide(noisesilo, renderView1)
-
-    # show color bar/color legend
-    contour1Display.SetScalarBarVisibility(renderView1, True)
-
-    # update the view to ensure updated data information
-    renderView1.Update()
-
-    # get layout
-    layout1 = GetLayout()
-
-    # layout/tab size in pixels
-    layout1.SetSize(2027, 1268)
-
-    # current camera placement for renderView1
-    renderView1.CameraPosition = [
-        49.0381653030622,
-        3.083657606729836,
-        -45.433581947240924,
-    ]
-    renderView1.CameraViewUp = [
-        -0.018686825287978125,
-        0.9986910201150085,
-        0.047613536964819486,
-    ]
-    renderView1.CameraParallelScale = 17.320508075688775
-
-    print("Saving Image ", i, " of 35")
+# walk over a range of iso values, timing the extraction and the render
+timings = []
+for i in range(numFrames):
+    value = 2 + 0.1 * i
+    start = time.perf_counter()
+    set_isovalue(value)
+    isosurface.UpdatePipeline()
+    extractTime = time.perf_counter() - start
+
+    print("Saving Image ", i, " of", numFrames, flush=True)
 
     # save screenshot
+    start = time.perf_counter()
     SaveScreenshot(
-        script_dir + "/output/ex03_contour_%04d.png" % i,
+        saveDir + "/ex03_contour_%04d.png" % i,
         renderView1,
         ImageResolution=[4054, 2536],
     )
+    renderTime = time.perf_counter() - start
+    cells = isosurface.GetDataInformation().GetNumberOfCells()
+    timings.append((value, cells, extractTime, renderTime))
+
+print("\n isovalue  triangles  extract_s  render_s")
+for value, cells, extractTime, renderTime in timings:
+    print("%9.2f %10d %10.3f %9.3f" % (value, cells, extractTime, renderTime))
+print(
+    "Total extract %.2f s, render %.2f s\n"
+    % (sum(t[2] for t in timings), sum(t[3] for t in timings)),
+    flush=True,
+)
+with open(saveDir + "/ex03_sweep_times.csv", "w") as f:
+    f.write("isovalue,triangles,extract_s,render_s\n")
+    for row in timings:
+        f.write("%g,%d,%g,%g\n" % row)
 
-runningOnIbex = "no"
-if len(sys.argv) == 2:
-    runningOnIbex = sys.argv[1]
+runningOnIbex = args.site
 
 if runningOnIbex != "ibex":
     print("Generating movie using ffmpeg\n")
@@ -6,6 +6,8 @@
 #
 import os
 import sys
+import time
+import argparse
 import pathlib
 import paraview
 import subprocess
@@ -20,6 +22,29 @@ print("Running ParaView example script: ", sys.argv[0], "\n", flush=True)
 script_dir = os.path.abspath(os.path.dirname(__file__))
 print("Running script from: ", script_dir, flush=True)
 
+sys.path.insert(0, os.path.join(script_dir, ".."))
+import vignette_utils
+
+parser = argparse.ArgumentParser(description="Streamline animation example.")
+parser.add_argument(
+    "site", nargs="?", default="", help="'ibex' skips the movie generation."
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Render the frames in this many pvbatch processes.",
+)
+parser.add_argument(
+    "--reintegrate",
+    action="store_true",
+    help="Integrate the streamlines again for every frame, instead of once.",
+)
+vignette_utils.add_profile_argument(parser)
+args = parser.parse_args()
+
+numFrames = 125
+
 #### disable automatic camera reset on 'Show'
 paraview.simple._DisableFirstRenderCameraReset()
 
@@ -53,6 +78,9 @@ renderView1.UseColorPaletteForBackground = 1
 renderView1.BackEnd = "OSPRay raycaster"
 renderView1.OSPRayMaterialLibrary = materialLibrary1
 renderView1.ShowAnnotation = False  # Disables render view annotations
+profile = vignette_utils.apply_render_profile(renderView1, args.profile)
+renderLog = vignette_utils.RenderLog(args.profile)
+resolution = vignette_utils.scaled_resolution([4054, 2536], profile)
 
 SetActiveView(None)
 
@@ -519,6 +547,49 @@ seedIdsPWF = GetOpacityTransferFunction("SeedIds")
 seedIdsPWF.Points = [0.0, 0.0, 0.5, 0.0, 342.0, 1.0, 0.5, 0.0]
 seedIdsPWF.ScalarRangeInitialized = 1
 
+# ----------------------------------------------------------------
+# incremental animation: the streamlines are integrated once, up to the
+# last frame, and each frame clips them at its step index instead of
+# integrating them again from the seeds
+# ----------------------------------------------------------------
+
+if not args.reintegrate:
+    streamTracerWithCustomSource1.MaximumSteps = numFrames - 1
+
+    # number the points of every streamline by integration step
+    stepIndex1 = ProgrammableFilter(
+        registrationName="StepIndex1", Input=streamTracerWithCustomSource1
+    )
+    stepIndex1.CopyArrays = 1
+    stepIndex1.Script = """
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+lines = inputs[0].VTKObject.GetLines()
+offsets = vtk_to_numpy(lines.GetOffsetsArray())
+connectivity = vtk_to_numpy(lines.GetConnectivityArray())
+steps = np.zeros(inputs[0].GetNumberOfPoints())
+steps[connectivity] = np.arange(len(connectivity)) - np.repeat(
+    offsets[:-1], np.diff(offsets)
+)
+output.PointData.append(steps, "StepIndex")
+"""
+
+    revealClip1 = Clip(registrationName="RevealClip1", Input=stepIndex1)
+    revealClip1.ClipType = "Scalar"
+    revealClip1.Scalars = ["POINTS", "StepIndex"]
+    revealClip1.Invert = 1
+
+    Hide(streamTracerWithCustomSource1, renderView1)
+    revealClip1Display = Show(
+        revealClip1, renderView1, "UnstructuredGridRepresentation"
+    )
+    revealClip1Display.Representation = "Surface"
+    revealClip1Display.ColorArrayName = ["CELLS", "SeedIds"]
+    revealClip1Display.LookupTable = seedIdsLUT
+    revealClip1Display.LineWidth = 7.0
+    revealClip1Display.RenderLinesAsTubes = 1
+
 # ----------------------------------------------------------------
 # restore active source
 SetActiveSource(slice3)
@@ -531,21 +602,55 @@ try:
 except FileExistsError:
     pass
 
-for ts in range(0, 125):
-    streamTracerWithCustomSource1.MaximumSteps = ts
-    print("Saving Image ", ts, " of 125", flush=True)
-    # save screenshot
-    SaveScreenshot(
-        script_dir + "/output/ex04_%04d.png" % ts,
-        renderView1,
-        ImageResolution=[4054, 2536],
+imagePattern = script_dir + "/output/ex04_%04d.png"
+
+
+def render_frames(frames):
+    for ts in frames:
+        if args.reintegrate:
+            streamTracerWithCustomSource1.MaximumSteps = ts
+        else:
+            revealClip1.Value = ts
+        print("Saving Image ", ts, " of", numFrames, flush=True)
+        # save screenshot
+        with renderLog.render("frame %04d" % ts):
+            SaveScreenshot(imagePattern % ts, renderView1, ImageResolution=resolution)
+
+
+# The frames are split over the workers. With --workers this process starts
+# the workers; they can also be started by a launcher as independent pvbatch
+# processes. Worker 0 waits for the others and checks the sequence. Frames
+# and markers of an earlier run are removed first.
+workerStart = time.time()
+worker, workers = vignette_utils.frame_worker(launch=args.workers > 1)
+if args.workers > 1 and workers == 1:
+    workerArgs = [args.site, "--profile", args.profile]
+    workerArgs += ["--reintegrate"] if args.reintegrate else []
+    vignette_utils.clear_frames(
+        saveDir, imagePattern, range(numFrames), range(args.workers)
     )
-
-runningOnIbex = "no"
-if len(sys.argv) == 2:
-    runningOnIbex = sys.argv[1]
-
-if runningOnIbex != "ibex":
+    failed = vignette_utils.launch_workers(
+        os.path.abspath(__file__), args.workers, workerArgs
+    )
+    if failed:
+        print("Frame workers failed: ", failed, flush=True)
+    makeMovie = False
+else:
+    frames = vignette_utils.frames_for_worker(range(numFrames), worker, workers)
+    vignette_utils.clear_frames(saveDir, imagePattern, frames, [worker])
+    render_frames(frames)
+    renderLog.report(saveDir + "/ex04_render_times_%d.csv" % worker)
+    makeMovie = worker == 0
+    if workers > 1:
+        makeMovie = vignette_utils.wait_for_workers(
+            saveDir, worker, workers, workerStart
+        )
+        makeMovie = makeMovie and worker == 0
+        makeMovie = makeMovie and vignette_utils.report_frames(
+            imagePattern, range(numFrames)
+        )
+
+if makeMovie and args.site != "ibex":
     print("Generating movie using ffmpeg\n", flush=True)
     # ffmpeg create video
     imageLoc = script_dir + "/output/ex04_%04d.png"
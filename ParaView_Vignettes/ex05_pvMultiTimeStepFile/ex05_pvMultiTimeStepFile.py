@@ -6,6 +6,8 @@
 #
 import os
 import sys
+import time
+import argparse
 import pathlib
 import paraview
 import subprocess
@@ -14,11 +16,43 @@ from paraview.simple import *
 paraview.compatibility.major = 5
 paraview.compatibility.minor = 13
 
-print("Running ParaView example script: ", sys.argv[0], "\n")
+print("Running ParaView example script: ", sys.argv[0], "\n", flush=True)
 
 # Get directory of this script
 script_dir = os.path.abspath(os.path.dirname(__file__))
-print("Running script from: ", script_dir)
+print("Running script from: ", script_dir, flush=True)
+
+sys.path.insert(0, os.path.join(script_dir, ".."))
+sys.path.insert(0, os.path.join(script_dir, "..", "..", "data"))
+import vignette_utils
+import convert_varying_data
+
+parser = argparse.ArgumentParser(description="Time series example.")
+parser.add_argument(
+    "site", nargs="?", default="", help="'ibex' skips the movie generation."
+)
+parser.add_argument(
+    "--legacy-reader",
+    action="store_true",
+    help="Read the series with the Legacy VTK Reader, without prefetching.",
+)
+parser.add_argument(
+    "--prefetch",
+    type=int,
+    default=2,
+    help="Number of timesteps read ahead on a background thread.",
+)
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="Parse the legacy files on every run instead of using the .npy cache.",
+)
+parser.add_argument(
+    "--no-converted",
+    action="store_true",
+    help="Ignore the series converted by data/convert_varying_data.py.",
+)
+args = parser.parse_args()
 
 #### disable automatic camera reset on 'Show'
 paraview.simple._DisableFirstRenderCameraReset()
@@ -69,32 +103,45 @@ SetActiveView(renderView1)
 # setup the data processing pipelines
 # ----------------------------------------------------------------
 
-# create a new 'Legacy VTK Reader'
-varying00vtk = LegacyVTKReader(
-    registrationName="varying00.vtk*",
-    FileNames=[
-        script_dir + "/../../data/varying_data/varying00.vtk",
-        script_dir + "/../../data/varying_data/varying01.vtk",
-        script_dir + "/../../data/varying_data/varying02.vtk",
-        script_dir + "/../../data/varying_data/varying03.vtk",
-        script_dir + "/../../data/varying_data/varying04.vtk",
-        script_dir + "/../../data/varying_data/varying05.vtk",
-        script_dir + "/../../data/varying_data/varying06.vtk",
-        script_dir + "/../../data/varying_data/varying07.vtk",
-        script_dir + "/../../data/varying_data/varying08.vtk",
-        script_dir + "/../../data/varying_data/varying09.vtk",
-        script_dir + "/../../data/varying_data/varying10.vtk",
-        script_dir + "/../../data/varying_data/varying11.vtk",
-        script_dir + "/../../data/varying_data/varying12.vtk",
-        script_dir + "/../../data/varying_data/varying13.vtk",
-        script_dir + "/../../data/varying_data/varying14.vtk",
-        script_dir + "/../../data/varying_data/varying15.vtk",
-        script_dir + "/../../data/varying_data/varying16.vtk",
-        script_dir + "/../../data/varying_data/varying17.vtk",
-        script_dir + "/../../data/varying_data/varying18.vtk",
-        script_dir + "/../../data/varying_data/varying19.vtk",
-    ],
-)
+dataDir = script_dir + "/../../data/varying_data"
+varyingFiles = [dataDir + "/varying%02d.vtk" % i for i in range(20)]
+
+# The compressed XML series written by data/convert_varying_data.py is used
+# when it is up to date with the legacy files
+converted = None
+if not (args.legacy_reader or args.no_converted):
+    converted = convert_varying_data.converted_series(script_dir + "/../../data")
+
+if converted:
+    print("Reading the converted series: ", converted["pvd"], flush=True)
+    varying00vtk = PVDReader(
+        registrationName="varying00.vtk*", FileName=converted["pvd"]
+    )
+elif args.legacy_reader:
+    # create a new 'Legacy VTK Reader'
+    varying00vtk = LegacyVTKReader(
+        registrationName="varying00.vtk*", FileNames=varyingFiles
+    )
+else:
+    # Serve the series from a background reader that stays ahead of the
+    # timestep being rendered. The parsed files are cached as .npy arrays.
+    series = vignette_utils.open_series(
+        "varying",
+        varyingFiles,
+        cache_dir=None if args.no_cache else dataDir + "/.series_cache",
+        lookahead=args.prefetch,
+        capacity=args.prefetch + 2,
+    )
+    varying00vtk = ProgrammableSource(registrationName="varying00.vtk*")
+    varying00vtk.OutputDataSetType = "vtkRectilinearGrid"
+    varying00vtk.ScriptRequestInformation = """
+import vignette_utils
+vignette_utils.series_information(self, "varying")
+"""
+    varying00vtk.Script = """
+import vignette_utils
+vignette_utils.series_data(self, "varying")
+"""
 
 # ----------------------------------------------------------------
 # setup the visualization in view 'renderView1'
@@ -232,13 +279,16 @@ try:
 except FileExistsError:
     pass
 
-# generate extracts
+# generate extracts, timing the reads and renders of all timesteps
+start = time.perf_counter()
 SaveExtracts(ExtractsOutputDirectory=saveDir)
+print("Time series read and rendered in %.2f s" % (time.perf_counter() - start))
 
+if not (converted or args.legacy_reader):
+    series.close()
+    series.summary()
 
-runningOnIbex = "no"
-if len(sys.argv) == 2:
-    runningOnIbex = sys.argv[1]
+runningOnIbex = args.site
 
 if runningOnIbex != "ibex":
     print("Generating movie using ffmpeg\n")
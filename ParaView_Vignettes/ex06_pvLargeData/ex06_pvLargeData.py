@@ -6,6 +6,7 @@
 #
 import os
 import sys
+import argparse
 import pathlib
 import paraview
 import subprocess
@@ -14,11 +15,51 @@ from paraview.simple import *
 paraview.compatibility.major = 5
 paraview.compatibility.minor = 13
 
-print("Running ParaView example script: ", sys.argv[0], "\n")
+print("Running ParaView example script: ", sys.argv[0], "\n", flush=True)
 
 # Get directory of this script
 script_dir = os.path.abspath(os.path.dirname(__file__))
-print("Running script from: ", script_dir)
+print("Running script from: ", script_dir, flush=True)
+
+sys.path.insert(0, os.path.join(script_dir, ".."))
+import vignette_utils
+
+parser = argparse.ArgumentParser(description="Large data example.")
+parser.add_argument(
+    "--all-arrays",
+    action="store_true",
+    help="Load every array of the cyclone data, instead of only the used ones.",
+)
+parser.add_argument(
+    "--no-filter-cache",
+    action="store_true",
+    help="Always resample, instead of loading resampled volumes from the cache.",
+)
+parser.add_argument(
+    "--redistribute",
+    action="store_true",
+    help="Balance the cyclone data over the ranks before filtering it.",
+)
+parser.add_argument(
+    "--png-level", type=int, default=5, help="zlib level of the PNG, 0-9."
+)
+parser.add_argument(
+    "--thumbnails",
+    nargs="*",
+    default=[],
+    choices=[".jpg", ".webp"],
+    help="Also write preview thumbnails of these types.",
+)
+parser.add_argument(
+    "--raw", action="store_true", help="Also write the pixels as a .npy array."
+)
+vignette_utils.add_profile_argument(parser)
+args = parser.parse_args()
+
+# With 'pvbatch --symmetric' every rank runs this script, which times the
+# read, filter and render stages of each rank
+timer = vignette_utils.RankTimer()
+ioStart = vignette_utils.io_snapshot()
 
 #### disable automatic camera reset on 'Show'
 paraview.simple._DisableFirstRenderCameraReset()
@@ -54,6 +95,8 @@ renderView1.BackgroundColorMode = "Gradient"
 renderView1.BackEnd = "OSPRay raycaster"
 renderView1.OSPRayMaterialLibrary = materialLibrary1
 renderView1.ShowAnnotation = False  # Disables render view annotations
+profile = vignette_utils.apply_render_profile(renderView1, args.profile)
+renderLog = vignette_utils.RenderLog(args.profile)
 SetActiveView(None)
 
 # ----------------------------------------------------------------
@@ -190,6 +233,27 @@ xslice.SliceType.Origin = [2239.0, 1505.0, 222.5]
 # init the 'Plane' selected for 'HyperTreeGridSlicer'
 xslice.HyperTreeGridSlicer.Origin = [1120.0, 752.5, 44.5]
 
+# Unless --all-arrays is given, the displays are set up before any array is
+# loaded and with the resamplers sampling a single cell. Once the arrays the
+# filters and displays use are known, only those are loaded.
+# The .vtm blocks are split over the ranks by the reader. When there are
+# fewer or uneven blocks, RedistributeDataSet balances the cells instead.
+if args.redistribute:
+    redistributeDataSet1 = RedistributeDataSet(
+        registrationName="RedistributeDataSet1",
+        Input=cyclonechapala20151102_000000mbvtm,
+    )
+    vignette_utils.replace_source(
+        cyclonechapala20151102_000000mbvtm, redistributeDataSet1
+    )
+
+resamplers = [resampleToImageqice, resampleToImageqrain]
+resampleDimensions = [list(r.SamplingDimensions) for r in resamplers]
+if not args.all_arrays:
+    cyclonechapala20151102_000000mbvtm.PointArrayStatus = []
+    for resampler in resamplers:
+        resampler.SamplingDimensions = [2, 2, 2]
+
 # ----------------------------------------------------------------
 # setup the visualization in view 'renderView1'
 # ----------------------------------------------------------------
@@ -3235,6 +3299,29 @@ SetActiveSource(currentRainfallsilo)
 # ----------------------------------------------------------------
 
 
+if not args.all_arrays:
+    usedArrays = vignette_utils.consumed_arrays(cyclonechapala20151102_000000mbvtm)
+    print("Loading the used arrays: ", usedArrays, flush=True)
+    cyclonechapala20151102_000000mbvtm.PointArrayStatus = usedArrays
+    for resampler, dimensions in zip(resamplers, resampleDimensions):
+        resampler.SamplingDimensions = dimensions
+
+# The resampled volumes only depend on the data and the filter parameters.
+# They are stored in data/.filter_cache and loaded by later runs.
+uncachedResamplers = []
+if not args.no_filter_cache:
+    filterCache = vignette_utils.FilterCache(script_dir + "/../../data/.filter_cache")
+    for resampler in resamplers:
+        key, cached = filterCache.load(resampler, cyclonechapala20151102_000000mbvtm)
+        if cached is None:
+            uncachedResamplers.append((resampler, key))
+
+    # arrays that only the cached volumes used no longer need to be loaded
+    if filterCache.hits and not args.all_arrays:
+        usedArrays = vignette_utils.consumed_arrays(cyclonechapala20151102_000000mbvtm)
+        print("Loading the used arrays: ", usedArrays, flush=True)
+        cyclonechapala20151102_000000mbvtm.PointArrayStatus = usedArrays
+
 # create folder to store images
 saveDir = script_dir + "/output"
 try:
@@ -3242,9 +3329,40 @@ try:
 except FileExistsError:
     pass
 
-# save screenshot
-SaveScreenshot(
-    script_dir + "/output/ex06.png", renderView1, ImageResolution=[2850, 1750]
+ioSetup = vignette_utils.io_snapshot()
+
+with timer.stage("read"):
+    cyclonechapala20151102_000000mbvtm.UpdatePipeline()
+    currentRainfallsilo.UpdatePipeline()
+if args.redistribute:
+    with timer.stage("redistribute"):
+        redistributeDataSet1.UpdatePipeline()
+with timer.stage("filter"):
+    for source in vignette_utils.visible_sources(renderView1):
+        source.UpdatePipeline()
+
+# render once at the output resolution and write every output from the same
+# image
+resolution = vignette_utils.scaled_resolution([2850, 1750], profile)
+layout1.SetSize(*resolution)
+screenshots = vignette_utils.ScreenshotService(
+    renderView1, resolution=resolution, png_level=args.png_level, log=renderLog
 )
+with timer.stage("render"):
+    screenshots.save(
+        script_dir + "/output/ex06.png", thumbnails=args.thumbnails, raw=args.raw
+    )
+screenshots.close()
+renderLog.report(saveDir + "/ex06_render_times.csv")
+timer.report(saveDir + "/ex06_rank_times.csv")
+
+# the cache is only written by single rank runs, which hold the whole volume
+if not args.no_filter_cache and timer.ranks == 1:
+    for resampler, key in uncachedResamplers:
+        filterCache.store(resampler, key)
+    filterCache.summary()
+
+vignette_utils.report_io("Pipeline set up", ioStart, ioSetup)
+vignette_utils.report_io("Screenshot saved", ioSetup, vignette_utils.io_snapshot())
 
 print("\nFinished ParaView example script\n")
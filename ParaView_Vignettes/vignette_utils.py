@@ -0,0 +1,1211 @@
+#
+# KAUST Visualization Vignettes
+#
+# Author: James Kress, <james.kress@kaust.edu.sa>
+# Copyright KAUST
+#
+# Helpers shared by the ParaView vignettes. The vignettes import this module
+# with:
+#
+#     sys.path.insert(0, os.path.join(script_dir, ".."))
+#     import vignette_utils
+#
+import os
+import sys
+import re
+import json
+import time
+import hashlib
+import shutil
+import threading
+import subprocess
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Environment variables with the index and count of a frame worker, in the
+# order they are checked. The first pair is set by launch_workers, the others
+# by the launchers when they start independent pvbatch processes. The srun
+# step variables are used rather than SLURM_NTASKS, which is also set in the
+# batch script itself.
+WORKER_ENV = [
+    ("VIGNETTE_WORKER", "VIGNETTE_WORKERS"),
+    ("OMPI_COMM_WORLD_RANK", "OMPI_COMM_WORLD_SIZE"),
+    ("PMI_RANK", "PMI_SIZE"),
+    ("SLURM_PROCID", "SLURM_STEP_NUM_TASKS"),
+]
+
+# Environment variables that would make a child pvbatch join the MPI job of
+# its parent
+MPI_ENV_PREFIXES = ("OMPI_", "PMI_", "PMIX_", "HYDRA_", "MPICH_", "SLURM_")
+
+
+def frame_worker(launch=False):
+    """
+    Returns (index, count) of this frame worker. A pvbatch that runs as one
+    parallel MPI job renders every frame together, so it is a single worker.
+    With launch, the script starts its own workers with launch_workers, so
+    only the variables set by launch_workers are used.
+    """
+    from paraview import servermanager
+
+    process_module = servermanager.vtkProcessModule.GetProcessModule()
+    if process_module.GetNumberOfLocalPartitions() > 1:
+        return 0, 1
+
+    for index_var, count_var in WORKER_ENV[:1] if launch else WORKER_ENV:
+        if index_var in os.environ and count_var in os.environ:
+            return int(os.environ[index_var]), int(os.environ[count_var])
+    return 0, 1
+
+
+def frames_for_worker(frames, index, count):
+    """
+    Interleaves the frames over the workers, so that expensive parts of an
+    animation are shared.
+    """
+    return list(frames)[index::count]
+
+
+def find_pvbatch():
+    paraview_path = os.environ.get("PARAVIEW_PATH")
+    if paraview_path:
+        pvbatch = os.path.join(paraview_path, "pvbatch")
+        if os.access(pvbatch, os.X_OK):
+            return pvbatch
+    return shutil.which("pvbatch")
+
+
+def launch_workers(script, count, args=()):
+    """
+    Runs count copies of script in independent, serial pvbatch processes and
+    waits for them. Returns the indices of the workers that failed.
+    """
+    pvbatch = find_pvbatch()
+    if pvbatch is None:
+        raise RuntimeError("pvbatch not found, set PARAVIEW_PATH")
+
+    env = {k: v for k, v in os.environ.items() if not k.startswith(MPI_ENV_PREFIXES)}
+    processes = []
+    for index in range(count):
+        worker_env = dict(env, VIGNETTE_WORKER=str(index), VIGNETTE_WORKERS=str(count))
+        command = [pvbatch, "--force-offscreen-rendering", script, *args]
+        processes.append(subprocess.Popen(command, env=worker_env))
+    return [i for i, p in enumerate(processes) if p.wait() != 0]
+
+
+def worker_marker(directory, index):
+    return os.path.join(directory, ".worker_%d.done" % index)
+
+
+def clear_frames(directory, pattern, frames, workers=()):
+    """
+    Removes the images of frames and the done markers of workers left by an
+    earlier run, so that they are not mistaken for the output of this one.
+    """
+    for frame in frames:
+        if os.path.exists(pattern % frame):
+            os.remove(pattern % frame)
+    for index in workers:
+        if os.path.exists(worker_marker(directory, index)):
+            os.remove(worker_marker(directory, index))
+
+
+def wait_for_workers(directory, index, count, since, timeout=3600.0):
+    """
+    Marks this worker as done and, on worker 0, waits until all workers are.
+    Used when the workers were started by a launcher rather than by
+    launch_workers. Markers older than since, the time this worker started,
+    are left from an earlier run and ignored. Returns False on a timeout.
+    """
+    os.makedirs(directory, exist_ok=True)
+    open(worker_marker(directory, index), "w").close()
+    if index != 0:
+        return True
+
+    # allow for workers that were started a little earlier than this one
+    since -= 60.0
+
+    def done(marker):
+        return os.path.exists(marker) and os.path.getmtime(marker) >= since
+
+    markers = [worker_marker(directory, i) for i in range(count)]
+    deadline = time.time() + timeout
+    while not all(done(m) for m in markers):
+        if time.time() > deadline:
+            return False
+        time.sleep(1.0)
+    for marker in markers:
+        os.remove(marker)
+    return True
+
+
+def missing_frames(pattern, frames):
+    """
+    Returns the frames whose image (pattern % frame) does not exist.
+    """
+    return [f for f in frames if not os.path.exists(pattern % f)]
+
+
+def report_frames(pattern, frames):
+    """
+    Prints and returns whether the image sequence is complete.
+    """
+    missing = missing_frames(pattern, frames)
+    if missing:
+        print("Missing %d frames: %s" % (len(missing), missing), flush=True)
+    else:
+        print("All %d frames were written" % len(frames), flush=True)
+    sys.stdout.flush()
+    return not missing
+
+
+def new_contour_filter(array_name):
+    """
+    Returns a vtkContourFilter of a point array that also outputs its scalars.
+    """
+    from vtkmodules.vtkCommonDataModel import vtkDataObject
+    from vtkmodules.vtkFiltersCore import vtkContourFilter
+
+    contour = vtkContourFilter()
+    contour.SetInputArrayToProcess(
+        0, 0, 0, vtkDataObject.FIELD_ASSOCIATION_POINTS, array_name
+    )
+    contour.ComputeScalarsOn()
+    return contour
+
+
+class BrickIndex:
+    """
+    The range of a point array over bricks of brick^3 cells of a structured
+    dataset. An isovalue is only contoured in the bricks whose range contains
+    it. Each brick keeps its extract and contour filters, so a brick is copied
+    out of the dataset once and then reused by every later isovalue.
+    """
+
+    def __init__(self, dataset, array_name, brick=16):
+        from vtkmodules.util.numpy_support import vtk_to_numpy
+
+        self.dataset = dataset
+        self.array_name = array_name
+        scalars = vtk_to_numpy(dataset.GetPointData().GetArray(array_name))
+        grid = scalars.reshape(dataset.GetDimensions()[::-1])
+
+        # bricks share their boundary points, so that no cell is left out
+        starts = [range(0, max(n - 1, 1), brick) for n in dataset.GetDimensions()]
+        extent = dataset.GetExtent()
+        self.vois = []
+        lo, hi = [], []
+        for k in starts[2]:
+            for j in starts[1]:
+                for i in starts[0]:
+                    ends = [
+                        min(start + brick, n - 1)
+                        for start, n in zip((i, j, k), dataset.GetDimensions())
+                    ]
+                    values = grid[k : ends[2] + 1, j : ends[1] + 1, i : ends[0] + 1]
+                    lo.append(values.min())
+                    hi.append(values.max())
+                    voi = []
+                    for axis, (start, end) in enumerate(zip((i, j, k), ends)):
+                        voi += [extent[2 * axis] + start, extent[2 * axis] + end]
+                    self.vois.append(voi)
+        self.lo = np.array(lo)
+        self.hi = np.array(hi)
+        self._pipelines = {}
+
+    def candidates(self, value):
+        """
+        Returns the indexes of the bricks whose range contains value.
+        """
+        return np.flatnonzero((self.lo <= value) & (self.hi >= value))
+
+    def _pipeline(self, index):
+        if index not in self._pipelines:
+            from vtkmodules.vtkFiltersExtraction import (
+                vtkExtractGrid,
+                vtkExtractRectilinearGrid,
+            )
+            from vtkmodules.vtkImagingCore import vtkExtractVOI
+
+            if self.dataset.IsA("vtkImageData"):
+                extract = vtkExtractVOI()
+            elif self.dataset.IsA("vtkRectilinearGrid"):
+                extract = vtkExtractRectilinearGrid()
+            else:
+                extract = vtkExtractGrid()
+            extract.SetInputData(self.dataset)
+            extract.SetVOI(*self.vois[index])
+            contour = new_contour_filter(self.array_name)
+            contour.SetInputConnection(extract.GetOutputPort())
+            self._pipelines[index] = contour
+        return self._pipelines[index]
+
+    def contour(self, value):
+        """
+        Returns the isosurface at value, appended from the candidate bricks.
+        """
+        from vtkmodules.vtkCommonDataModel import vtkPolyData
+        from vtkmodules.vtkFiltersCore import vtkAppendPolyData
+
+        append = vtkAppendPolyData()
+        for index in self.candidates(value):
+            contour = self._pipeline(index)
+            contour.SetValue(0, value)
+            contour.Update()
+            append.AddInputData(contour.GetOutput())
+        output = vtkPolyData()
+        if append.GetNumberOfInputConnections(0):
+            append.Update()
+            output.ShallowCopy(append.GetOutput())
+        return output
+
+
+# Brick indexes and contour filters of the blocks contoured by sweep_contour,
+# keyed by block
+_sweep_contours = {}
+
+
+def contour_block(dataset, array_name, value):
+    """
+    Contours a dataset at value. Structured blocks are contoured through a
+    BrickIndex, other blocks through a vtkContourFilter with a span space.
+    Both are built on the first isovalue and reused until the block changes.
+    """
+    from vtkmodules.vtkCommonDataModel import vtkPolyData
+    from vtkmodules.vtkCommonExecutionModel import vtkSpanSpace
+
+    if dataset is None or dataset.GetPointData().GetArray(array_name) is None:
+        return vtkPolyData()
+    key = (dataset.GetAddressAsString("vtkDataObject"), array_name)
+    mtime = dataset.GetMTime()
+    if key not in _sweep_contours or _sweep_contours[key][0] != mtime:
+        if hasattr(dataset, "GetDimensions"):
+            contour = BrickIndex(dataset, array_name)
+        else:
+            contour = new_contour_filter(array_name)
+            contour.SetInputData(dataset)
+            contour.UseScalarTreeOn()
+            contour.SetScalarTree(vtkSpanSpace())
+        _sweep_contours[key] = (mtime, contour)
+    contour = _sweep_contours[key][1]
+    if isinstance(contour, BrickIndex):
+        return contour.contour(value)
+    contour.SetValue(0, value)
+    contour.Update()
+    output = vtkPolyData()
+    output.ShallowCopy(contour.GetOutput())
+    return output
+
+
+def sweep_contour(algorithm, array_name, value):
+    """
+    Body of a ProgrammableFilter that contours each block of its composite
+    input at value, reusing the contour filter of each block across calls.
+    """
+    source = algorithm.GetInputDataObject(0, 0)
+    output = algorithm.GetOutputDataObject(0)
+    output.CopyStructure(source)
+    iterator = source.NewIterator()
+    iterator.InitTraversal()
+    while not iterator.IsDoneWithTraversal():
+        block = iterator.GetCurrentDataObject()
+        output.SetDataSet(iterator, contour_block(block, array_name, value))
+        iterator.GoToNextItem()
+
+
+def read_legacy(filename):
+    """
+    Reads a legacy VTK file with all of its arrays.
+    """
+    from vtkmodules.vtkIOLegacy import vtkDataSetReader
+
+    reader = vtkDataSetReader()
+    reader.SetFileName(filename)
+    reader.ReadAllScalarsOn()
+    reader.ReadAllVectorsOn()
+    reader.ReadAllNormalsOn()
+    reader.ReadAllTensorsOn()
+    reader.ReadAllFieldsOn()
+    reader.Update()
+    return reader.GetOutput()
+
+
+def source_key(filename):
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def save_arrays(dataset, directory, key):
+    """
+    Stores an image or rectilinear grid as one .npy file per array and a
+    meta.json, which is written last so that a partial cache is never used.
+    Returns False for other dataset types.
+    """
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+
+    meta = {"type": dataset.GetClassName(), "source": key}
+    if dataset.IsA("vtkImageData"):
+        meta["origin"] = list(dataset.GetOrigin())
+        meta["spacing"] = list(dataset.GetSpacing())
+    elif not dataset.IsA("vtkRectilinearGrid"):
+        return False
+    meta["extent"] = list(dataset.GetExtent())
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {}
+    if dataset.IsA("vtkRectilinearGrid"):
+        arrays["coordinates"] = [
+            dataset.GetXCoordinates(),
+            dataset.GetYCoordinates(),
+            dataset.GetZCoordinates(),
+        ]
+    arrays["point"] = [
+        dataset.GetPointData().GetArray(i)
+        for i in range(dataset.GetPointData().GetNumberOfArrays())
+    ]
+    arrays["cell"] = [
+        dataset.GetCellData().GetArray(i)
+        for i in range(dataset.GetCellData().GetNumberOfArrays())
+    ]
+    for association, vtk_arrays in arrays.items():
+        meta[association] = []
+        for i, array in enumerate(vtk_arrays):
+            if array is None:
+                continue
+            name = "%s_%d.npy" % (association, i)
+            np.save(os.path.join(directory, name), vtk_to_numpy(array))
+            meta[association].append([array.GetName(), name])
+
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return True
+
+
+def load_arrays(directory, key):
+    """
+    Rebuilds a dataset stored by save_arrays, with its arrays memory mapped.
+    Returns None if there is no cache or it was made from another source.
+    """
+    from vtkmodules.util.numpy_support import numpy_to_vtk
+    from vtkmodules.vtkCommonDataModel import vtkImageData, vtkRectilinearGrid
+
+    try:
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta["source"] != key:
+        return None
+
+    def array(name, filename):
+        # copy-on-write mappings are writable, which VTK expects
+        values = np.load(os.path.join(directory, filename), mmap_mode="c")
+        vtk_array = numpy_to_vtk(values)
+        vtk_array.SetName(name)
+        return vtk_array
+
+    if meta["type"] == "vtkImageData":
+        dataset = vtkImageData()
+        dataset.SetOrigin(meta["origin"])
+        dataset.SetSpacing(meta["spacing"])
+    else:
+        dataset = vtkRectilinearGrid()
+    dataset.SetExtent(meta["extent"])
+    if meta.get("coordinates"):
+        x, y, z = (array(*entry) for entry in meta["coordinates"])
+        dataset.SetXCoordinates(x)
+        dataset.SetYCoordinates(y)
+        dataset.SetZCoordinates(z)
+    for entry in meta["point"]:
+        dataset.GetPointData().AddArray(array(*entry))
+    for entry in meta["cell"]:
+        dataset.GetCellData().AddArray(array(*entry))
+    return dataset
+
+
+class TimeSeriesPrefetcher:
+    """
+    Reads the datasets of a file series on a background thread, ahead of the
+    timestep being rendered, and keeps the most recently used ones decoded.
+    With a cache_dir, legacy VTK files are parsed once and stored as .npy
+    arrays that later runs map instead of parsing.
+    """
+
+    def __init__(self, files, cache_dir=None, lookahead=2, capacity=4):
+        self.files = list(files)
+        self.cache_dir = cache_dir
+        self.lookahead = lookahead
+        self.capacity = max(capacity, 1)
+        self.datasets = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.stats = {"hits": 0, "prefetched": 0, "misses": 0, "wait_s": 0.0}
+        self.read_s = []
+        self.converted = 0
+
+    def read(self, index):
+        start = time.perf_counter()
+        filename = self.files[index]
+        dataset = None
+        if self.cache_dir:
+            directory = os.path.join(
+                self.cache_dir, os.path.splitext(os.path.basename(filename))[0]
+            )
+            key = source_key(filename)
+            dataset = load_arrays(directory, key)
+        if dataset is None:
+            dataset = read_legacy(filename)
+            if self.cache_dir:
+                try:
+                    if save_arrays(dataset, directory, key):
+                        with self.lock:
+                            self.converted += 1
+                except OSError as e:
+                    print("Could not cache %s: %s" % (filename, e), flush=True)
+        with self.lock:
+            self.read_s.append(time.perf_counter() - start)
+        return dataset
+
+    def get(self, index):
+        """
+        Returns the dataset of timestep index and starts reading the next
+        lookahead timesteps.
+        """
+        start = time.perf_counter()
+        if index in self.datasets:
+            self.datasets.move_to_end(index)
+            dataset = self.datasets[index]
+            self.stats["hits"] += 1
+        elif index in self.pending:
+            dataset = self.pending.pop(index).result()
+            self.stats["prefetched"] += 1
+        else:
+            dataset = self.read(index)
+            self.stats["misses"] += 1
+        self.stats["wait_s"] += time.perf_counter() - start
+
+        self.datasets[index] = dataset
+        self.datasets.move_to_end(index)
+        while len(self.datasets) > self.capacity:
+            self.datasets.popitem(last=False)
+
+        for ahead in range(index + 1, min(index + 1 + self.lookahead, len(self.files))):
+            if ahead not in self.datasets and ahead not in self.pending:
+                self.pending[ahead] = self.executor.submit(self.read, ahead)
+        return dataset
+
+    def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        self.pending.clear()
+
+    def summary(self):
+        reads = len(self.read_s)
+        print(
+            "Series: %d reads (%.3f s mean, %d converted to the cache), "
+            "%d cache hits, %d prefetched, %d read on demand, %.3f s waiting"
+            % (
+                reads,
+                sum(self.read_s) / max(reads, 1),
+                self.converted,
+                self.stats["hits"],
+                self.stats["prefetched"],
+                self.stats["misses"],
+                self.stats["wait_s"],
+            ),
+            flush=True,
+        )
+
+
+# Time series served to ProgrammableSources, by name
+_series = {}
+
+
+def open_series(name, files, **kwargs):
+    """
+    Registers a TimeSeriesPrefetcher that a ProgrammableSource can serve with
+    series_information and series_data.
+    """
+    _series[name] = TimeSeriesPrefetcher(files, **kwargs)
+    return _series[name]
+
+
+def series_information(algorithm, name):
+    """
+    RequestInformation of a ProgrammableSource serving a time series. The
+    timesteps are the file indices, as for a reader given a list of files.
+    """
+    from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline
+
+    sddp = vtkStreamingDemandDrivenPipeline
+    series = _series[name]
+    info = algorithm.GetOutputInformation(0)
+    times = [float(t) for t in range(len(series.files))]
+    info.Remove(sddp.TIME_STEPS())
+    info.Set(sddp.TIME_STEPS(), times, len(times))
+    info.Remove(sddp.TIME_RANGE())
+    info.Set(sddp.TIME_RANGE(), [times[0], times[-1]], 2)
+    first = series.get(0)
+    if hasattr(first, "GetExtent"):
+        info.Set(sddp.WHOLE_EXTENT(), first.GetExtent(), 6)
+
+
+def series_data(algorithm, name):
+    """
+    RequestData of a ProgrammableSource serving a time series.
+    """
+    from vtkmodules.vtkCommonDataModel import vtkDataObject
+    from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline
+
+    sddp = vtkStreamingDemandDrivenPipeline
+    series = _series[name]
+    info = algorithm.GetOutputInformation(0)
+    time_step = 0.0
+    if info.Has(sddp.UPDATE_TIME_STEP()):
+        time_step = info.Get(sddp.UPDATE_TIME_STEP())
+    index = min(max(int(round(time_step)), 0), len(series.files) - 1)
+
+    output = algorithm.GetOutputDataObject(0)
+    output.ShallowCopy(series.get(index))
+    if info.Has(sddp.UPDATE_EXTENT()) and hasattr(output, "Crop"):
+        output.Crop(info.Get(sddp.UPDATE_EXTENT()))
+    output.GetInformation().Set(vtkDataObject.DATA_TIME_STEP(), float(index))
+
+
+# Filter properties that hold an expression over array names
+EXPRESSION_PROPERTIES = ["Function", "Expression"]
+
+# Display properties that name an array, with the property that enables them
+DISPLAY_ARRAYS = [
+    ("ColorArrayName", None),
+    ("OpacityArrayName", "UseSeparateOpacityArray"),
+    ("ColorArray2Name", "UseTransfer2D"),
+]
+
+
+def downstream_proxies(source):
+    """
+    Returns source and every pipeline proxy that consumes its output,
+    directly or through other filters.
+    """
+    from paraview import simple
+
+    proxies = list(simple.GetSources().values())
+    found = [source]
+    added = True
+    while added:
+        added = False
+        for proxy in proxies:
+            if proxy in found or "Input" not in proxy.ListProperties():
+                continue
+            inputs = proxy.Input
+            inputs = inputs if isinstance(inputs, (list, tuple)) else [inputs]
+            if any(i in found for i in inputs):
+                found.append(proxy)
+                added = True
+    return found
+
+
+def referenced_arrays(proxy):
+    """
+    Returns the array names a filter proxy selects, as [association, name]
+    properties, or uses in an expression.
+    """
+    names = set()
+    for name in proxy.ListProperties():
+        if name in EXPRESSION_PROPERTIES:
+            expression = proxy.GetPropertyValue(name)
+            if isinstance(expression, str):
+                names.update(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expression))
+            continue
+        try:
+            value = proxy.GetPropertyValue(name)
+        except Exception:
+            continue
+        if (
+            isinstance(value, (list, tuple))
+            and len(value) == 2
+            and value[0] in ("POINTS", "CELLS")
+        ):
+            names.add(value[1])
+    return names
+
+
+def displayed_arrays(proxy, views):
+    """
+    Returns the array names the visible displays of proxy color by.
+    """
+    from paraview import servermanager
+
+    names = set()
+    for view in views:
+        display = servermanager.GetRepresentation(proxy, view)
+        if display is None or not display.Visibility:
+            continue
+        for name, enabled_by in DISPLAY_ARRAYS:
+            if name not in display.ListProperties():
+                continue
+            if enabled_by and not (
+                enabled_by in display.ListProperties()
+                and display.GetPropertyValue(enabled_by)
+            ):
+                continue
+            value = display.GetPropertyValue(name)
+            if isinstance(value, (list, tuple)) and len(value) == 2:
+                names.add(value[1])
+    return names
+
+
+def consumed_arrays(reader, property_name="PointArrayStatus"):
+    """
+    Walks the filters and displays downstream of reader and returns the
+    arrays of property_name that they consume.
+    """
+    from paraview import simple
+
+    views = simple.GetViews()
+    names = set()
+    for proxy in downstream_proxies(reader):
+        names |= referenced_arrays(proxy)
+        names |= displayed_arrays(proxy, views)
+
+    reader.UpdatePipelineInformation()
+    available = reader.GetProperty(property_name).Available
+    return [name for name in available if name in names]
+
+
+def io_snapshot():
+    """
+    Returns the bytes read by this process and its resident memory in MB,
+    from /proc on Linux. Missing values are 0.
+    """
+    stats = {"rchar": 0, "read_bytes": 0, "VmRSS": 0, "VmHWM": 0}
+    for path in ("/proc/self/io", "/proc/self/status"):
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in stats:
+                        stats[key] = int(value.split()[0])
+        except OSError:
+            pass
+    return {
+        "read_MB": stats["rchar"] / 1024**2,
+        "storage_MB": stats["read_bytes"] / 1024**2,
+        "rss_MB": stats["VmRSS"] / 1024,
+        "peak_rss_MB": stats["VmHWM"] / 1024,
+    }
+
+
+def report_io(label, before, after):
+    """
+    Prints the bytes read and the memory growth between two io_snapshots.
+    """
+    print(
+        "%s: %.1f MB read (%.1f MB from storage), RSS %.1f -> %.1f MB, peak %.1f MB"
+        % (
+            label,
+            after["read_MB"] - before["read_MB"],
+            after["storage_MB"] - before["storage_MB"],
+            before["rss_MB"],
+            after["rss_MB"],
+            after["peak_rss_MB"],
+        ),
+        flush=True,
+    )
+
+
+def file_fingerprint(filenames):
+    """
+    Returns the size and modification time of each file and of the files a
+    .vtm or .pvd index references, without reading the data itself.
+    """
+    fingerprint = []
+    for filename in filenames:
+        files = [filename]
+        if filename.endswith((".vtm", ".pvd")):
+            with open(filename, "r") as f:
+                referenced = re.findall(r'file="([^"]+)"', f.read())
+            base = os.path.dirname(filename)
+            files += [os.path.join(base, name) for name in referenced]
+        for path in files:
+            stat = os.stat(path)
+            fingerprint.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def proxy_parameters(proxy):
+    """
+    Returns the property values of a proxy that are not other proxies.
+    """
+    parameters = {}
+    for name in proxy.ListProperties():
+        try:
+            value = proxy.GetPropertyValue(name)
+        except Exception:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if name == "Input" or any(hasattr(v, "SMProxy") for v in values):
+            continue
+        parameters[name] = value
+    return parameters
+
+
+# Script of the ProgrammableSources that serve the FilterCache entries
+CACHED_SOURCE_SCRIPT = """
+import vignette_utils
+vignette_utils.{}(self, "{}")
+"""
+
+
+class FilterCache:
+    """
+    Outputs of expensive filters, stored as uncompressed .npy arrays (see
+    save_arrays) that later runs memory map. An entry is keyed by the filter
+    type and parameters, the parameters of the reader it reads from and a
+    fingerprint of the reader's files, so any script that builds the same
+    filter on the same data can reuse it.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = []
+        self.stored = []
+        self.descriptions = {}
+
+    def key(self, proxy, reader):
+        description = {
+            "filter": proxy.GetXMLName(),
+            "parameters": proxy_parameters(proxy),
+            "reader": reader.GetXMLName(),
+            "reader_parameters": proxy_parameters(reader),
+            "files": file_fingerprint(reader.FileName),
+        }
+        text = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()[:32], description
+
+    def path(self, key, extension=""):
+        return os.path.join(self.directory, key + extension)
+
+    def load(self, proxy, reader):
+        """
+        Replaces proxy by a source of its cached output, if there is one.
+        Returns the key of the entry, which store() takes on a miss.
+        """
+        from paraview import simple
+
+        key, description = self.key(proxy, reader)
+        self.descriptions[key] = description
+        dataset = load_arrays(self.path(key), key)
+        if dataset is None:
+            return key, None
+        _cached_outputs[key] = dataset
+        name = next(n for (n, _), p in simple.GetSources().items() if p == proxy)
+        cached = simple.ProgrammableSource(registrationName=name + " (cached)")
+        cached.OutputDataSetType = dataset.GetClassName()
+        cached.ScriptRequestInformation = CACHED_SOURCE_SCRIPT.format(
+            "cached_information", key
+        )
+        cached.Script = CACHED_SOURCE_SCRIPT.format("cached_data", key)
+        replace_source(proxy, cached)
+        self.hits.append(key)
+        return key, cached
+
+    def store(self, proxy, key):
+        """
+        Stores the output of proxy, which must be up to date, in the cache.
+        """
+        dataset = proxy.GetClientSideObject().GetOutputDataObject(0)
+        if not save_arrays(dataset, self.path(key), key):
+            return
+        with open(self.path(key, ".json"), "w") as f:
+            json.dump(self.descriptions[key], f, indent=4, default=str)
+        self.stored.append(key)
+
+    def summary(self):
+        print(
+            "Filter cache %s: %d loaded, %d stored"
+            % (self.directory, len(self.hits), len(self.stored)),
+            flush=True,
+        )
+
+
+# Datasets loaded by FilterCache, served to ProgrammableSources by key
+_cached_outputs = {}
+
+
+def cached_information(algorithm, key):
+    """
+    RequestInformation of a ProgrammableSource serving a cached dataset.
+    """
+    from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline
+
+    info = algorithm.GetOutputInformation(0)
+    info.Set(
+        vtkStreamingDemandDrivenPipeline.WHOLE_EXTENT(),
+        _cached_outputs[key].GetExtent(),
+        6,
+    )
+
+
+def cached_data(algorithm, key):
+    """
+    RequestData of a ProgrammableSource serving a cached dataset.
+    """
+    from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline
+
+    sddp = vtkStreamingDemandDrivenPipeline
+    info = algorithm.GetOutputInformation(0)
+    output = algorithm.GetOutputDataObject(0)
+    output.ShallowCopy(_cached_outputs[key])
+    if info.Has(sddp.UPDATE_EXTENT()):
+        output.Crop(info.Get(sddp.UPDATE_EXTENT()))
+
+
+def replace_source(old, new):
+    """
+    Connects the filters and displays that read from old to new instead.
+    """
+    from paraview import simple, servermanager
+
+    for proxy in simple.GetSources().values():
+        if proxy not in (old, new) and "Input" in proxy.ListProperties():
+            if proxy.Input == old:
+                proxy.Input = new
+    for view in simple.GetViews():
+        display = servermanager.GetRepresentation(old, view)
+        if display is not None:
+            display.Input = new
+
+
+def visible_sources(view):
+    """
+    Returns the pipeline proxies with a visible display in view, without
+    creating displays for the others.
+    """
+    from paraview import simple, servermanager
+
+    sources = []
+    for source in simple.GetSources().values():
+        display = servermanager.GetRepresentation(source, view)
+        if display is not None and display.Visibility:
+            sources.append(source)
+    return sources
+
+
+def symmetric_ranks():
+    """
+    Returns (rank, count) of the MPI ranks that run this script. Only a
+    pvbatch started with --symmetric runs it on every rank; otherwise the
+    script runs on rank 0 alone and (0, 1) is returned.
+    """
+    from paraview import servermanager
+    from vtkmodules.vtkParallelCore import vtkMultiProcessController
+
+    process_module = servermanager.vtkProcessModule.GetProcessModule()
+    controller = vtkMultiProcessController.GetGlobalController()
+    if controller is None or not process_module.GetSymmetricMPIMode():
+        return 0, 1
+    return controller.GetLocalProcessId(), controller.GetNumberOfProcesses()
+
+
+class RankTimer:
+    """
+    Times the stages of a script on every rank of a symmetric pvbatch run and
+    reports the slowest, mean and fastest rank of each stage on rank 0. The
+    load imbalance is the slowest rank's time over the mean.
+    """
+
+    def __init__(self):
+        self.rank, self.ranks = symmetric_ranks()
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def gather(self):
+        """
+        Returns an array of the stage times with one row per rank on rank 0,
+        and None on the other ranks. Every rank must call it.
+        """
+        local = np.array(list(self.stages.values()), dtype=np.float64)
+        if self.ranks == 1:
+            return local.reshape(1, -1)
+
+        from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+        from vtkmodules.vtkCommonCore import vtkDoubleArray
+        from vtkmodules.vtkParallelCore import vtkMultiProcessController
+
+        received = vtkDoubleArray()
+        vtkMultiProcessController.GetGlobalController().Gather(
+            numpy_to_vtk(local, deep=1), received, 0
+        )
+        if self.rank != 0:
+            return None
+        return vtk_to_numpy(received).reshape(self.ranks, -1)
+
+    def report(self, filename=None):
+        """
+        Prints the stage times over the ranks and writes them, one row per
+        rank and stage, to a CSV file. Every rank must call it.
+        """
+        times = self.gather()
+        if times is None:
+            return
+        print(
+            "\n%-12s %9s %9s %9s %10s"
+            % ("stage", "min_s", "mean_s", "max_s", "imbalance")
+        )
+        for name, column in zip(self.stages, times.T):
+            mean = column.mean()
+            print(
+                "%-12s %9.3f %9.3f %9.3f %10.2f"
+                % (
+                    name,
+                    column.min(),
+                    mean,
+                    column.max(),
+                    column.max() / max(mean, 1e-9),
+                )
+            )
+        print("on %d rank(s)\n" % self.ranks, flush=True)
+        if filename:
+            with open(filename, "w") as f:
+                f.write("rank,stage,seconds\n")
+                for rank, row in enumerate(times):
+                    for name, seconds in zip(self.stages, row):
+                        f.write("%d,%s,%g\n" % (rank, name, seconds))
+
+
+class ScreenshotService:
+    """
+    Renders a view once at the output resolution and encodes the captured
+    image to several files on a background thread: a PNG with a tunable zlib
+    level, JPEG or WebP thumbnails for previews, and the raw pixels as .npy
+    for comparisons. SaveScreenshot instead renders again for every file
+    whose resolution differs from the view. The render times are also added
+    to log, a RenderLog, if one is given.
+    """
+
+    def __init__(
+        self,
+        view,
+        resolution=None,
+        png_level=5,
+        thumbnail_width=512,
+        quality=90,
+        log=None,
+    ):
+        self.view = view
+        self.log = log
+        if resolution:
+            view.ViewSize = list(resolution)
+        self.png_level = png_level
+        self.thumbnail_width = thumbnail_width
+        self.quality = quality
+        self.rank = symmetric_ranks()[0]
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+        self.pending = []
+        self.times = []
+
+    def save(self, filename, thumbnails=(), raw=False):
+        """
+        Renders and captures the view, then queues filename (a PNG), one
+        thumbnail per extension in thumbnails (".jpg" or ".webp") and, with
+        raw, the pixels as .npy. In a symmetric run every rank renders and
+        rank 0 writes.
+        """
+        start = time.perf_counter()
+        image = self.view.CaptureImage(1)
+        seconds = time.perf_counter() - start
+        self.times.append(("render", filename, seconds))
+        if self.log is not None:
+            self.log.add(os.path.basename(filename), seconds)
+        if self.rank != 0:
+            return
+
+        stem = os.path.splitext(filename)[0]
+        outputs = [(self.write_png, filename)]
+        outputs += [(self.write_thumbnail, stem + "_thumb" + ext) for ext in thumbnails]
+        if raw:
+            outputs.append((self.write_raw, stem + ".npy"))
+        for write, path in outputs:
+            self.pending.append(self.executor.submit(self.timed, write, image, path))
+
+    def timed(self, write, image, path):
+        start = time.perf_counter()
+        write(image, path)
+        self.times.append(("encode", path, time.perf_counter() - start))
+
+    def write_png(self, image, path):
+        from vtkmodules.vtkIOImage import vtkPNGWriter
+
+        writer = vtkPNGWriter()
+        writer.SetCompressionLevel(self.png_level)
+        writer.SetInputData(image)
+        writer.SetFileName(path)
+        writer.Write()
+
+    def write_thumbnail(self, image, path):
+        from vtkmodules.vtkImagingCore import vtkImageResize
+
+        width, height, _ = image.GetDimensions()
+        resize = vtkImageResize()
+        resize.SetInputData(image)
+        resize.SetOutputDimensions(
+            self.thumbnail_width,
+            max(round(height * self.thumbnail_width / width), 1),
+            1,
+        )
+        resize.Update()
+        thumbnail = resize.GetOutput()
+
+        if path.endswith(".webp"):
+            try:
+                from PIL import Image
+            except ImportError:
+                print("PIL is not available, skipping ", path, flush=True)
+                return
+            Image.fromarray(image_pixels(thumbnail)).save(path, quality=self.quality)
+            return
+
+        from vtkmodules.vtkIOImage import vtkJPEGWriter
+        from vtkmodules.vtkImagingCore import vtkImageExtractComponents
+
+        writer = vtkJPEGWriter()
+        if thumbnail.GetNumberOfScalarComponents() == 4:
+            rgb = vtkImageExtractComponents()
+            rgb.SetInputData(thumbnail)
+            rgb.SetComponents(0, 1, 2)
+            writer.SetInputConnection(rgb.GetOutputPort())
+        else:
+            writer.SetInputData(thumbnail)
+        writer.SetQuality(self.quality)
+        writer.SetFileName(path)
+        writer.Write()
+
+    def write_raw(self, image, path):
+        np.save(path, image_pixels(image))
+
+    def close(self):
+        """
+        Waits for the queued files and prints the render and encode times.
+        """
+        for future in self.pending:
+            future.result()
+        self.executor.shutdown(wait=True)
+        self.pending.clear()
+        if self.rank == 0:
+            for kind, path, seconds in self.times:
+                print("%-7s %7.3f s  %s" % (kind, seconds, path), flush=True)
+
+
+def image_pixels(image):
+    """
+    Returns the pixels of a vtkImageData as a (height, width, components)
+    array, top row first.
+    """
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+
+    width, height, _ = image.GetDimensions()
+    pixels = vtk_to_numpy(image.GetPointData().GetScalars())
+    return pixels.reshape(height, width, -1)[::-1]
+
+
+# Environment variable with the default render profile, set to "test" by the
+# test suite
+PROFILE_ENV = "VIGNETTE_RENDER_PROFILE"
+
+# Output resolution of the render profiles, as a fraction of the resolution
+# of each script. The vignettes rasterize without ray tracing, so the
+# resolution sets the render cost. The test suite scales the baselines down
+# to the resolution of the test profile before comparing.
+RENDER_PROFILES = {
+    "preview": {"scale": 0.25},
+    "test": {"scale": 0.5},
+    "publication": {"scale": 1.0},
+}
+
+
+def add_profile_argument(parser):
+    """
+    Adds the --profile option, which defaults to $VIGNETTE_RENDER_PROFILE or
+    "publication".
+    """
+    parser.add_argument(
+        "--profile",
+        choices=sorted(RENDER_PROFILES),
+        default=os.environ.get(PROFILE_ENV, "publication"),
+        help="Render profile (default: $%s or publication)." % PROFILE_ENV,
+    )
+
+
+def apply_render_profile(view, name):
+    """
+    Prints and returns a render profile.
+    """
+    profile = RENDER_PROFILES[name]
+    print("Render profile %s: scale %g" % (name, profile["scale"]), flush=True)
+    return profile
+
+
+def scaled_resolution(resolution, profile):
+    return [max(int(round(r * profile["scale"])), 1) for r in resolution]
+
+
+class RenderLog:
+    """
+    Records the time of every render of a script and, on rank 0, prints a
+    summary and writes them to a CSV file with the profile they used.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.rank = symmetric_ranks()[0]
+        self.times = []
+
+    def add(self, label, seconds):
+        self.times.append((label, seconds))
+
+    @contextmanager
+    def render(self, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(label, time.perf_counter() - start)
+
+    def report(self, filename=None):
+        if self.rank != 0 or not self.times:
+            return
+        seconds = np.array([s for _, s in self.times])
+        print(
+            "%d renders (%s profile): %.3f s total, mean %.3f s, min %.3f s, "
+            "max %.3f s"
+            % (
+                len(seconds),
+                self.profile,
+                seconds.sum(),
+                seconds.mean(),
+                seconds.min(),
+                seconds.max(),
+            ),
+            flush=True,
+        )
+        if filename:
+            with open(filename, "w") as f:
+                f.write("render,profile,seconds\n")
+                for label, s in self.times:
+                    f.write("%s,%s,%g\n" % (label, self.profile, s))
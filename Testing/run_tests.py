@@ -14,6 +14,7 @@ def is_gpu_available():
     except FileNotFoundError:
         return False
 
+
 def is_ppn_node():
     """Check if the current node contains 'ppn' in its hostname."""
     hostname = os.uname().nodename
@@ -51,9 +52,10 @@ def run_local_visit(script_path, args, output_dir):
     print("Visit script executed locally.")
 
 
-def run_local_paraview(script_path, args, output_dir):
+def run_local_paraview(script_path, args, output_dir, ranks=1):
     """
     Run the ParaView script locally using pvbatch and save logs in the output directory.
+    With more than one rank, pvbatch runs the script on every rank (--symmetric).
     """
     # Locate pvbatch and executables for mpirun/srun
     pvbatch_exec = find_executable("pvbatch", "PARAVIEW_PATH")
@@ -62,19 +64,25 @@ def run_local_paraview(script_path, args, output_dir):
         "srun", "SRUN_PATH"
     )  # Fall back to srun if mpirun is not available
 
-    if is_ppn_node() and is_gpu_available():
+    pvbatch_args = ["--force-offscreen-rendering"]
+    if ranks > 1:
+        pvbatch_args.append("--symmetric")
+
+    # a single pvbatch process cannot run more than one rank, so --np > 1
+    # goes through mpirun or srun on these nodes too
+    if is_ppn_node() and is_gpu_available() and ranks == 1:
         print("Running ParaView without mpirun or srun (using pvbatch only).")
-        cmd = ["pvbatch", "--force-offscreen-rendering", script_path]  
+        cmd = ["pvbatch", "--force-offscreen-rendering", script_path]
     elif mpi_exec:
         print("Running ParaView with mpirun")
         cmd = [
             mpi_exec,
             "-np",
-            "1",
+            str(ranks),
             "--bind-to",
             "none",
             pvbatch_exec,
-            "--force-offscreen-rendering",
+            *pvbatch_args,
             script_path,
         ]
     elif srun_exec:
@@ -82,7 +90,7 @@ def run_local_paraview(script_path, args, output_dir):
         cmd = [
             srun_exec,
             "--hint=nomultithread",
-            "--ntasks=1",
+            f"--ntasks={ranks}",
             "--ntasks-per-node=1",
             "--ntasks-per-socket=1",
             "--cpus-per-task=32",
@@ -90,7 +98,7 @@ def run_local_paraview(script_path, args, output_dir):
             "--mem-bind=v,none",
             "--cpu-bind=v,cores",
             pvbatch_exec,
-            "--force-offscreen-rendering",
+            *pvbatch_args,
             script_path,
         ]
     else:
@@ -103,6 +111,9 @@ def run_local_paraview(script_path, args, output_dir):
     env = os.environ.copy()  # Copy the current environment
     env["OMP_NUM_THREADS"] = "32"
     env["TBB_NUM_THREADS"] = "32"
+    # Render with the half resolution "test" profile, unless another profile
+    # was requested
+    env.setdefault("VIGNETTE_RENDER_PROFILE", "test")
 
     with open(os.path.join(output_dir, "output.log"), "w") as stdout_file, open(
         os.path.join(output_dir, "error.log"), "w"
@@ -144,6 +155,12 @@ def main():
     parser.add_argument(
         "test_dir", type=str, help="The test directory where the test script resides."
     )
+    parser.add_argument(
+        "--np",
+        type=int,
+        default=1,
+        help="Number of MPI ranks for ParaView scripts (default: 1).",
+    )
     args = parser.parse_args()
 
     test_dir = args.test_dir
@@ -156,7 +173,7 @@ def main():
     if "visit" in script_path.lower():
         run_local_visit(script_path, [], output_dir)
     elif "paraview" in script_path.lower():
-        run_local_paraview(script_path, [], output_dir)
+        run_local_paraview(script_path, [], output_dir, args.np)
     else:
         raise ValueError(f"Unknown script type for {script_path}")
 
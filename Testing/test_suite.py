@@ -17,7 +17,7 @@ from plot_metrics import (
 )
 
 
-def run_local_test(test_dir):
+def run_local_test(test_dir, ranks=1):
     """
     Run the local test using the centralized run_tests.py.
     """
@@ -33,7 +33,7 @@ def run_local_test(test_dir):
 
     # Run the script if it exists
     if os.path.exists(run_tests_path):
-        subprocess.run([python_exec, run_tests_path, test_dir])
+        subprocess.run([python_exec, run_tests_path, test_dir, "--np", str(ranks)])
     else:
         print(f"run_tests.py not found at {run_tests_path}")
 
@@ -148,10 +148,31 @@ def create_baseline_images(output_dir, max_images=5):
     return selected_images
 
 
+# Summed RGB difference above which a pixel counts as different. Images
+# rendered at a reduced resolution (the "test" render profile) are compared
+# with a downscaled baseline, which only matches up to resampling.
+PIXEL_TOLERANCE = 1
+RESCALED_PIXEL_TOLERANCE = 48
+
+
 def resize_to_match(baseline_image, output_image):
-    if baseline_image.size != output_image.size:
-        output_image = output_image.resize(baseline_image.size, Image.LANCZOS)
-    return output_image
+    """
+    Returns the two images at the same size and whether the baseline was
+    scaled down to a smaller output image.
+    """
+    if baseline_image.size == output_image.size:
+        return baseline_image, output_image, False
+    if output_image.size[0] < baseline_image.size[0]:
+        return (
+            baseline_image.resize(output_image.size, Image.LANCZOS),
+            output_image,
+            True,
+        )
+    return (
+        baseline_image,
+        output_image.resize(baseline_image.size, Image.LANCZOS),
+        False,
+    )
 
 
 def compare_images(baseline_dir, output_dir, selected_images):
@@ -177,13 +198,16 @@ def compare_images(baseline_dir, output_dir, selected_images):
                 # added to make sure images from different machines match before comparison
                 baseline_image = baseline_image.convert("RGB")
                 output_image = output_image.convert("RGB")
-                output_image = resize_to_match(baseline_image, output_image)
+                baseline_image, output_image, rescaled = resize_to_match(
+                    baseline_image, output_image
+                )
+                tolerance = RESCALED_PIXEL_TOLERANCE if rescaled else PIXEL_TOLERANCE
 
                 # Compare images
                 diff = ImageChops.difference(baseline_image, output_image)
 
                 # Count the number of differing pixels
-                diff_pixels = sum(1 for x in diff.getdata() if sum(x) > 1)
+                diff_pixels = sum(1 for x in diff.getdata() if sum(x) > tolerance)
 
                 threshold_pixels = 1000
                 if diff_pixels > threshold_pixels:  # Images are different
@@ -434,7 +458,7 @@ def run_test(test_dir, dir_name, args):
     elif not generate_metrics_only:
         print(f"Running {dir_name} locally.")
         start_time = time.time()
-        run_local_test(test_dir)
+        run_local_test(test_dir, args.np)
         end_time = time.time()
 
         # Gather and log performance metrics
@@ -572,6 +596,12 @@ def main():
         default=None,
         help="Specify the VisIt version (e.g., 3.2.0)",
     )
+    parser.add_argument(
+        "--np",
+        type=int,
+        default=1,
+        help="Number of MPI ranks for the ParaView tests (default: 1).",
+    )
     parser.add_argument(
         "--non_gpu_machine",
         action="store_true",
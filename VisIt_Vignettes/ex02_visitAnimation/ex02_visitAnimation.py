@@ -6,6 +6,9 @@
 #
 import os
 import sys
+import time
+import shutil
+import subprocess
 
 # import visit_utils, we will use it to help encode our movie
 from visit_utils import *
@@ -16,6 +19,77 @@ print("Running VisIt example script: ", sys.argv[0], "\n")
 script_dir = os.path.abspath(os.path.dirname(__file__))
 print("Running script from: ", script_dir)
 
+nsteps = 100
+input_pattern = script_dir + "/output/ex02_visit_%04d.png"
+
+# With '--workers N' this script only starts N 'visit -cli -nowin' workers on
+# this node, which each render every Nth frame, and then encodes the movie.
+# A worker is told its index and the worker count through the environment.
+workers = 1
+if "--workers" in sys.argv:
+    index = sys.argv.index("--workers")
+    workers = int(sys.argv[index + 1])
+    del sys.argv[index : index + 2]
+worker = int(os.environ.get("VIGNETTE_WORKER", 0))
+isWorker = "VIGNETTE_WORKERS" in os.environ
+if isWorker:
+    workers = int(os.environ["VIGNETTE_WORKERS"])
+
+
+def find_visit():
+    visit_path = os.environ.get("VISIT_PATH")
+    if visit_path:
+        visit = os.path.join(visit_path, "visit")
+        if os.access(visit, os.X_OK):
+            return visit
+    return shutil.which("visit")
+
+
+def run_workers(count):
+    """
+    Runs count workers on this node and waits for them. Returns the indices of
+    the workers that failed.
+    """
+    visit = find_visit()
+    if visit is None:
+        raise RuntimeError("visit not found, set VISIT_PATH")
+    # the workers use a local engine, so they must not join an MPI job
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith(("OMPI_", "PMI_", "PMIX_", "HYDRA_", "MPICH_", "SLURM_"))
+    }
+    processes = []
+    for index in range(count):
+        worker_env = dict(env, VIGNETTE_WORKER=str(index), VIGNETTE_WORKERS=str(count))
+        command = [visit, "-cli", "-nowin", "-s", os.path.abspath(__file__)]
+        processes.append(subprocess.Popen(command, env=worker_env))
+    return [i for i, p in enumerate(processes) if p.wait() != 0]
+
+
+if workers > 1 and not isWorker:
+    # remove the frames of an earlier run, so that the check below only
+    # counts the frames of this one
+    for i in range(nsteps):
+        if os.path.exists(input_pattern % i):
+            os.remove(input_pattern % i)
+    start = time.perf_counter()
+    failed = run_workers(workers)
+    print(
+        "%d workers rendered in %.2f s" % (workers, time.perf_counter() - start),
+        flush=True,
+    )
+    if failed:
+        print("Frame workers failed: ", failed)
+    missing = [i for i in range(nsteps) if not os.path.exists(input_pattern % i)]
+    if missing:
+        print("Missing %d frames: %s" % (len(missing), missing))
+        exit()
+    print("All %d frames were written" % nsteps)
+    encoding.encode(input_pattern, script_dir + "/ex02_visit.mp4", fdup=4)
+    print("\nFinished VisIt example script\n")
+    exit()
+
 # Open the compute engine if running on cluster
 if len(sys.argv) < 4:
     print("Running script locally, not launching a batch job\n")
@@ -54,7 +128,7 @@ elif sys.argv[4] == "ibex":
     )
 
 
-def fly():
+def fly(frames):
     # set basic save options
     swatts = SaveWindowAttributes()
 
@@ -150,9 +224,9 @@ def fly():
     # function which takes a t value from [0,1] a tuple of t values and a tuple
     # of control points. In this case, the control points are View3DAttributes
     # objects that we are using to animate the camera but they can be any object
-    # that supports +, * operators.
-    nsteps = 100
-    for i in range(nsteps):
+    # that supports +, * operators. Only the given frames are evaluated.
+    start = time.perf_counter()
+    for i in frames:
         t = float(i) / float(nsteps - 1)
         c = EvalCubicSpline(t, x, cpts)
         c.nearPlane = -34.461
@@ -161,6 +235,10 @@ def fly():
         swatts.fileName = "ex02_visit_%04d.png" % i
         SetSaveWindowAttributes(swatts)
         SaveWindow()
+    print(
+        "Rendered %d frames in %.2f s" % (len(frames), time.perf_counter() - start),
+        flush=True,
+    )
 
 
 # Open file and add basic plot
@@ -177,7 +255,10 @@ AnnotationAtts = AnnotationAttributes()
 AnnotationAtts.userInfoFlag = 0
 SetAnnotationAttributes(AnnotationAtts)
 
-fly()
+# a worker renders every Nth frame, starting with its own index
+fly(range(worker, nsteps, workers))
+if isWorker:
+    exit()
 
 
 ################
@@ -197,7 +278,6 @@ fly()
 #  Duplicating the frames allows you to slow the pace of the movie to something reasonable.
 #
 ################
-input_pattern = script_dir + "/output/ex02_visit_%04d.png"
 output_movie = script_dir + "/ex02_visit.mp4"
 encoding.encode(input_pattern, output_movie, fdup=4)
 
@@ -6,6 +6,8 @@
 #
 import os
 import sys
+import time
+import hashlib
 
 # import visit_utils, we will use it to help encode our movie
 from visit_utils import *
@@ -16,6 +18,12 @@ print("Running VisIt example script: ", sys.argv[0], "\n")
 script_dir = os.path.abspath(os.path.dirname(__file__))
 print("Running script from: ", script_dir)
 
+# With --reintegrate the streamlines are integrated again for every frame,
+# instead of once
+reintegrate = "--reintegrate" in sys.argv
+if reintegrate:
+    sys.argv.remove("--reintegrate")
+
 # Open the compute engine if running on cluster
 if len(sys.argv) < 4:
     print("Running script locally, not launching a batch job\n")
@@ -137,7 +145,10 @@ iatts.integrationType = iatts.DormandPrince
 iatts.issueStiffnessWarnings = 0
 iatts.issueCriticalPointsWarnings = 0
 SetOperatorOptions(iatts)
-DrawPlots()
+# without --reintegrate the curves are only drawn when they are exported,
+# so that cached curves are not integrated at all
+if reintegrate:
+    DrawPlots()
 
 
 # set style of streamlines
@@ -148,26 +159,124 @@ patts.headStyle = patts.Cones
 patts.endPointRadiusBBox = 0.01
 patts.colorTableName = "hot_desaturated"
 SetPlotOptions(patts)
-DrawPlots()
+if reintegrate:
+    DrawPlots()
 
 
-# Crop streamlines to render them at increasing time values
-iatts.cropValue = iatts.Time
-iatts.cropEndFlag = 1
-iatts.cropBeginFlag = 1
-iatts.cropBegin = 0
-for ts in range(0, 125):
-    # set the integral curve attributes to change the where we crop the streamlines
-    iatts.cropEnd = (ts + 1) * 0.5
+numFrames = 125
+frameTimes = []
 
-    print("\nSaving Image ", ts, " of 125", flush=True)
 
-    # update streamline attributes and draw the plot
-    SetOperatorOptions(iatts)
+def save_frame(ts, update):
+    """
+    Updates the plots for frame ts with update() and saves the window,
+    recording the time it took.
+    """
+    print("\nSaving Image ", ts, " of", numFrames, flush=True)
+    start = time.perf_counter()
+    update()
     DrawPlots()
     swatts.fileName = "ex04_visit_%04d.png" % ts
     SetSaveWindowAttributes(swatts)
     SaveWindow()
+    frameTimes.append(time.perf_counter() - start)
+    print("Frame time: %.3f s" % frameTimes[-1], flush=True)
+
+
+def export_curves(dataValue, name):
+    """
+    Exports the integral curves of the active plot, with dataValue as their
+    point values, to cacheDir and returns the file to open.
+    """
+    iatts.dataValue = dataValue
+    SetOperatorOptions(iatts)
+    DrawPlots()
+    eatts = ExportDBAttributes()
+    eatts.db_type = "VTK"
+    eatts.dirname = cacheDir
+    eatts.filename = name
+    eatts.variables = ("operators/IntegralCurve/grad",)
+    ExportDatabase(eatts)
+    # a parallel engine writes one file per domain and a .visit index
+    for ext in (".visit", ".vtk"):
+        if os.path.exists(os.path.join(cacheDir, name + ext)):
+            return os.path.join(cacheDir, name + ext)
+    raise RuntimeError("The curves were not exported to " + cacheDir)
+
+
+if reintegrate:
+    # Crop streamlines to render them at increasing time values
+    iatts.cropValue = iatts.Time
+    iatts.cropEndFlag = 1
+    iatts.cropBeginFlag = 1
+    iatts.cropBegin = 0
+
+    def crop(ts):
+        # set the integral curve attributes to change the where we crop the
+        # streamlines, which integrates them again
+        iatts.cropEnd = (ts + 1) * 0.5
+        SetOperatorOptions(iatts)
+
+    for ts in range(0, numFrames):
+        save_frame(ts, lambda: crop(ts))
+else:
+    # Integrate the curves once for their seed id and once for their
+    # integration time, and export them with these point values. The files
+    # are named by the integral curve settings and the data file time, so
+    # later runs with the same settings reuse them.
+    cacheDir = saveDir + "/curve_cache"
+    os.makedirs(cacheDir, exist_ok=True)
+    settings = str(iatts) + str(os.path.getmtime(dataFile))
+    key = hashlib.sha256(settings.encode()).hexdigest()[:12]
+    timeFile = seedFile = None
+    for ext in (".visit", ".vtk"):
+        if os.path.exists(os.path.join(cacheDir, "time_" + key + ext)):
+            timeFile = os.path.join(cacheDir, "time_" + key + ext)
+            seedFile = os.path.join(cacheDir, "seed_" + key + ext)
+
+    start = time.perf_counter()
+    if timeFile is None:
+        SetActivePlots(1)
+        seedFile = export_curves(iatts.SeedPointID, "seed_" + key)
+        timeFile = export_curves(iatts.Time, "time_" + key)
+        print("Integrated the curves in %.2f s" % (time.perf_counter() - start))
+    else:
+        print("Using the cached curves in ", cacheDir)
+
+    # Replace the integral curve plot by a plot of the cached curves, colored
+    # by seed id. The seed ids of the second export are mapped onto the same
+    # curves by connectivity. An Isovolume on the time crops the curves
+    # without integrating them again.
+    SetActivePlots(1)
+    DeleteActivePlots()
+    OpenDatabase("localhost:" + timeFile, 0)
+    DefineScalarExpression("time", "<operators/IntegralCurve/grad>")
+    DefineScalarExpression(
+        "seed", "conn_cmfe(<%s:operators/IntegralCurve/grad>, mesh)" % seedFile
+    )
+    AddPlot("Pseudocolor", "seed", 1, 0)
+    SetPlotOptions(patts)
+    AddOperator("Isovolume", 0)
+    isoatts = IsovolumeAttributes()
+    isoatts.variable = "time"
+    isoatts.lbound = 0
+
+    def crop(ts):
+        isoatts.ubound = (ts + 1) * 0.5
+        SetOperatorOptions(isoatts)
+
+    for ts in range(0, numFrames):
+        save_frame(ts, lambda: crop(ts))
+
+print(
+    "\n%d frames, mean frame time %.3f s, total %.2f s"
+    % (len(frameTimes), sum(frameTimes) / len(frameTimes), sum(frameTimes))
+)
+with open(saveDir + "/ex04_visit_frame_times.csv", "w") as f:
+    f.write("frame,seconds,mode\n")
+    mode = "reintegrate" if reintegrate else "incremental"
+    for ts, seconds in enumerate(frameTimes):
+        f.write("%d,%g,%s\n" % (ts, seconds, mode))
 
 
 ################
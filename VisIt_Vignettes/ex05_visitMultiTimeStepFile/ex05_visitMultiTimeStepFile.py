@@ -6,6 +6,7 @@
 #
 import os
 import sys
+import time
 
 # import visit_utils, we will use it to help encode our movie
 from visit_utils import *
@@ -61,6 +62,16 @@ elif sys.argv[4] == "ibex":
 # Open file and add basic plot
 #
 dataFile = script_dir + "/../../data/varying.visit"
+
+# Use the compressed XML series written by data/convert_varying_data.py when
+# it is up to date with the legacy files
+sys.path.insert(0, script_dir + "/../../data")
+import convert_varying_data
+
+converted = convert_varying_data.converted_series(script_dir + "/../../data")
+if converted:
+    dataFile = converted["visit"]
+print("Reading the time series: ", dataFile)
 OpenDatabase("localhost:" + dataFile, 0)
 AddPlot("Pseudocolor", "temp", 1, 0)
 PseudocolorAtts = PseudocolorAttributes()
@@ -135,14 +146,17 @@ outputName = "ex05_visit_%04d.png"
 # Loop over the time states
 #
 nTimeSteps = TimeSliderGetNStates()
+renderTime = 0.0
 
 for timeStep in range(0, nTimeSteps):
     # Save an image each step
     print("\nSaving image for timestep: ", timeStep, flush=True)
+    start = time.perf_counter()
     TimeSliderSetState(timeStep)
     saveAtts.fileName = outputName % timeStep
     SetSaveWindowAttributes(saveAtts)
     SaveWindow()
+    renderTime += time.perf_counter() - start
 
     # Query stats about data each step
     SetQueryFloatFormat("%g")
@@ -158,6 +172,8 @@ for timeStep in range(0, nTimeSteps):
     print("Volume:          ", Query("Volume"))
     print("Volume:          ", Query("Sample Statistics"))
 
+print("\nTime series read and rendered in %.2f s" % renderTime)
+
 ################
 # use visit_utils.encoding to encode these images into a "mp4" movie
 #
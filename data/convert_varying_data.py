@@ -0,0 +1,302 @@
+#
+# KAUST Visualization Vignettes
+#
+# Author: James Kress, <james.kress@kaust.edu.sa>
+# Copyright KAUST
+#
+# Converts the legacy VTK series in varying_data once into compressed,
+# appended binary VTK XML files with a .pvd and a .visit index, so that the
+# ex05 vignettes can skip the text parse. Run it with pvpython, or any Python
+# with the vtk package:
+#
+#     pvpython data/convert_varying_data.py
+#
+# A manifest records the checksum of every source file, and only the files
+# whose source changed are converted again. The vignettes import this module
+# to find the converted series.
+#
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import argparse
+
+SOURCE_DIR = "varying_data"
+OUTPUT_DIR = "varying_data_xml"
+MANIFEST = "manifest.json"
+COMPRESSORS = ["None", "ZLib", "LZ4", "LZMA"]
+
+
+def checksum(filename):
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def source_stat(filename):
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+
+
+def converted_series(data_dir):
+    """
+    Returns the paths of the converted .pvd and .visit files if the
+    conversion in data_dir is complete and its sources have not changed
+    since, otherwise None. Only file sizes and times are compared, so this is
+    cheap enough to call on every run.
+    """
+    source_dir = os.path.join(data_dir, SOURCE_DIR)
+    output_dir = os.path.join(data_dir, OUTPUT_DIR)
+    manifest = load_manifest(output_dir)
+    sources = sorted(glob.glob(os.path.join(source_dir, "*.vtk")))
+    if not sources or len(manifest["files"]) != len(sources):
+        return None
+    for source in sources:
+        entry = manifest["files"].get(os.path.basename(source))
+        if entry is None or entry["stat"] != source_stat(source):
+            return None
+        if not os.path.exists(os.path.join(output_dir, entry["output"])):
+            return None
+    return {
+        "pvd": os.path.join(output_dir, manifest["pvd"]),
+        "visit": os.path.join(output_dir, manifest["visit"]),
+    }
+
+
+def read_legacy(filename):
+    from vtkmodules.vtkIOLegacy import vtkDataSetReader
+
+    reader = vtkDataSetReader()
+    reader.SetFileName(filename)
+    reader.ReadAllScalarsOn()
+    reader.ReadAllVectorsOn()
+    reader.ReadAllNormalsOn()
+    reader.ReadAllTensorsOn()
+    reader.ReadAllFieldsOn()
+    reader.Update()
+    return reader.GetOutput()
+
+
+def uniform_image(grid, tolerance=1e-4):
+    """
+    Returns grid as vtkImageData if its coordinates are evenly spaced, within
+    tolerance of the spacing, otherwise None.
+    """
+    import numpy as np
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+    from vtkmodules.vtkCommonDataModel import vtkImageData
+
+    origin, spacing = [], []
+    for coordinates in (
+        grid.GetXCoordinates(),
+        grid.GetYCoordinates(),
+        grid.GetZCoordinates(),
+    ):
+        values = vtk_to_numpy(coordinates).astype(np.float64)
+        step = (values[-1] - values[0]) / (len(values) - 1) if len(values) > 1 else 1.0
+        if len(values) > 1 and not np.allclose(
+            np.diff(values), step, rtol=0, atol=abs(step) * tolerance
+        ):
+            return None
+        origin.append(values[0])
+        spacing.append(step)
+
+    image = vtkImageData()
+    image.SetExtent(grid.GetExtent())
+    image.SetOrigin(origin)
+    image.SetSpacing(spacing)
+    image.GetPointData().ShallowCopy(grid.GetPointData())
+    image.GetCellData().ShallowCopy(grid.GetCellData())
+    image.GetFieldData().ShallowCopy(grid.GetFieldData())
+    return image
+
+
+def convert(source, output_dir, compressor, level):
+    """
+    Converts one legacy file and returns the name of the file written.
+    Rectilinear grids with even spacing become image data (.vti).
+    """
+    from vtkmodules.vtkIOXML import vtkXMLDataObjectWriter
+
+    dataset = read_legacy(source)
+    if dataset.IsA("vtkRectilinearGrid"):
+        dataset = uniform_image(dataset) or dataset
+
+    writer = vtkXMLDataObjectWriter.NewWriter(dataset.GetDataObjectType())
+    stem = os.path.splitext(os.path.basename(source))[0]
+    name = stem + "." + writer.GetDefaultFileExtension()
+    writer.SetInputData(dataset)
+    writer.SetFileName(os.path.join(output_dir, name))
+    writer.SetDataModeToAppended()
+    writer.EncodeAppendedDataOff()
+    writer.SetCompressorType(COMPRESSORS.index(compressor))
+    if level is not None:
+        writer.SetCompressionLevel(level)
+    if not writer.Write():
+        raise RuntimeError("Could not write " + name)
+    return name
+
+
+def write_indexes(output_dir, names, series):
+    """
+    Writes the .pvd and .visit files of the converted series. Timestep t is
+    the t-th file, as for a reader given the list of legacy files.
+    """
+    pvd = series + ".pvd"
+    with open(os.path.join(output_dir, pvd), "w") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write('<VTKFile type="Collection" version="0.1">\n  <Collection>\n')
+        for timestep, name in enumerate(names):
+            f.write('    <DataSet timestep="%d" file="%s"/>\n' % (timestep, name))
+        f.write("  </Collection>\n</VTKFile>\n")
+
+    visit = series + ".visit"
+    with open(os.path.join(output_dir, visit), "w") as f:
+        f.write("".join(name + "\n" for name in names))
+    return pvd, visit
+
+
+def convert_series(data_dir, compressor="LZ4", level=None, force=False):
+    """
+    Converts every legacy file whose checksum, compressor or output changed
+    since the last run and rewrites the indexes and the manifest.
+    """
+    source_dir = os.path.join(data_dir, SOURCE_DIR)
+    output_dir = os.path.join(data_dir, OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    settings = {"compressor": compressor, "level": level}
+
+    sources = sorted(glob.glob(os.path.join(source_dir, "*.vtk")))
+    if not sources:
+        raise RuntimeError("No .vtk files in " + source_dir)
+
+    files = {}
+    converted = 0
+    for source in sources:
+        base = os.path.basename(source)
+        entry = manifest["files"].get(base)
+        digest = checksum(source)
+        if (
+            force
+            or entry is None
+            or entry["sha256"] != digest
+            or entry["settings"] != settings
+            or not os.path.exists(os.path.join(output_dir, entry["output"]))
+        ):
+            start = time.perf_counter()
+            output = convert(source, output_dir, compressor, level)
+            print("Converted %s in %.2f s" % (base, time.perf_counter() - start))
+            converted += 1
+        else:
+            output = entry["output"]
+        files[base] = {
+            "sha256": digest,
+            "stat": source_stat(source),
+            "settings": settings,
+            "output": output,
+            "bytes": os.path.getsize(os.path.join(output_dir, output)),
+        }
+
+    # remove the outputs of sources that no longer exist
+    for base, entry in manifest["files"].items():
+        path = os.path.join(output_dir, entry["output"])
+        if base not in files and os.path.exists(path):
+            os.remove(path)
+
+    series = os.path.basename(os.path.normpath(source_dir)).replace("_data", "")
+    names = [files[os.path.basename(s)]["output"] for s in sources]
+    pvd, visit = write_indexes(output_dir, names, series)
+    manifest = {"pvd": pvd, "visit": visit, "files": files}
+    with open(os.path.join(output_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    source_bytes = sum(os.path.getsize(s) for s in sources)
+    output_bytes = sum(f["bytes"] for f in files.values())
+    print(
+        "%d of %d files converted, %.1f MB -> %.1f MB in %s"
+        % (converted, len(sources), source_bytes / 1e6, output_bytes / 1e6, output_dir)
+    )
+    return manifest
+
+
+def benchmark(data_dir):
+    """
+    Times reading every legacy file and its converted counterpart.
+    """
+    from vtkmodules.vtkIOXML import vtkXMLGenericDataObjectReader
+
+    output_dir = os.path.join(data_dir, OUTPUT_DIR)
+    manifest = load_manifest(output_dir)
+    legacy_s = xml_s = 0.0
+    for base, entry in sorted(manifest["files"].items()):
+        start = time.perf_counter()
+        read_legacy(os.path.join(data_dir, SOURCE_DIR, base))
+        legacy_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reader = vtkXMLGenericDataObjectReader()
+        reader.SetFileName(os.path.join(output_dir, entry["output"]))
+        reader.Update()
+        xml_s += time.perf_counter() - start
+    count = max(len(manifest["files"]), 1)
+    print(
+        "Mean read time per file: legacy %.3f s, converted %.3f s (%.1fx)"
+        % (legacy_s / count, xml_s / count, legacy_s / max(xml_s, 1e-9))
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert the legacy VTK varying_data series to compressed "
+        "VTK XML files used automatically by the ex05 vignettes."
+    )
+    parser.add_argument(
+        "-d",
+        "--data-dir",
+        default=os.path.dirname(os.path.abspath(__file__)),
+        help="Directory that contains varying_data.",
+    )
+    parser.add_argument(
+        "-c",
+        "--compressor",
+        default="LZ4",
+        choices=COMPRESSORS,
+        help="Compressor of the appended data.",
+    )
+    parser.add_argument(
+        "-l", "--level", type=int, default=None, help="Compression level."
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Convert every file, even if its source did not change.",
+    )
+    parser.add_argument(
+        "-b",
+        "--benchmark",
+        action="store_true",
+        help="Compare the read time of the legacy and converted files.",
+    )
+    args = parser.parse_args()
+
+    try:
+        convert_series(args.data_dir, args.compressor, args.level, args.force)
+    except RuntimeError as e:
+        print("Error: ", e)
+        sys.exit(1)
+    if args.benchmark:
+        benchmark(args.data_dir)